@@ -1,43 +1,461 @@
 # catalog_automation.py
 
+import argparse
+import asyncio
 import logging
 import os
 import datetime
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Import scraper functions from their respective modules
 from scrapers.scraper_lidl import scrape_lidl_ch
 from scrapers.scraper_aldi import scrape_aldi_ch
+from scrapers.driver_pool import driver_pool
+from scrapers.async_engine import AsyncIOEngine, BlockingIOEngine
 
 # Import all necessary helper functions and constants from utils
 from scrapers.utils import (
     setup_logging,
     cleanup_directory,
-    clear_old_catalogs,
-    add_catalog_to_firestore,
-    download_pdf,
+    build_catalog_document,
+    publish_catalogs,
     convert_pdf_to_images,
-    upload_images_to_storage,
+    stream_pdf_to_storage,
+    index_catalog_text,
     extract_start_date,
+    parse_validity,
     get_stored_validity_strings, # <<< ADD THIS NEW IMPORT
+    get_scrape_path,
+    get_published_catalogs,
+    find_published_catalog,
+    shutdown_render_executor,
+    forget_known_page_objects,
+    catalog_document_id,
+    publish_state,
+    checkpoints,
+    release_schedule,
+    STATE_RECHECK_SECONDS,
+    DAEMON_OVERDUE_SECONDS,
+    download_stats,
+    metrics,
+    METRICS_REPORT_PATH,
+    METRICS_TEXTFILE_PATH,
     PDF_DOWNLOAD_DIR,
-    LOCAL_IMAGE_DIR
+    LOCAL_IMAGE_DIR,
+    MAX_CONCURRENT_JOBS,
+    PIPELINE_MODE,
+    STREAM_KEEP_FILES,
+    TILE_VARIANT,
+    IO_ENGINE,
+    ASYNC_DOWNLOAD_CONCURRENCY,
+    ASYNC_UPLOAD_CONCURRENCY,
+    ASYNC_FIRESTORE_CONCURRENCY
 )
 
-# --- SETUP LOGGING IMMEDIATELY ---
-setup_logging()
+# =========================================================================================
+# JOB EXECUTION
+# =========================================================================================
+
+async def process_market_language(engine, market_name, config, lang_code, direct_url):
+    """
+    Runs the full update pipeline for a single (market, language) pair.
+    Returns a short status string: 'up-to-date', 'updated', 'partial', 'skipped' or 'failed'.
+    All blocking I/O goes through `engine` (see scrapers.async_engine): a BlockingIOEngine on the
+    'threads' I/O engine, or the shared AsyncIOEngine, which also processes the current and next
+    catalog of a job concurrently.
+    """
+    logging.info(f"--- Processing {market_name.upper()} ({lang_code.upper()}) ---")
+    today = datetime.date.today()
+    if checkpoints.get(market_name, lang_code, 'publish') is not None:
+        logging.info(f"{market_name.upper()} ({lang_code}) was published by an interrupted run. Nothing left to do.")
+        return 'updated'
+
+    # 1. Scrape live data from the website to see what's currently available,
+    #    unless an interrupted run already scraped it and started downloading
+    live_catalogs = resumed_scrape(market_name, lang_code)
+    if live_catalogs is None:
+        with metrics.span('scrape', market_name, lang_code):
+            live_catalogs = await engine.offload(config["scraper"], market_name, lang_code, direct_url)
+        if live_catalogs:
+            checkpoints.record(market_name, lang_code, 'scrape', '', live_catalogs)
+    if not live_catalogs:
+        logging.error(f"No catalogs found on the website for {market_name.upper()} ({lang_code}). Skipping.")
+        return 'skipped'
+
+    live_validity_strings = sorted([cat[1] for cat in live_catalogs])
+
+    # 2. Compare with the local snapshot of the last publish; Firestore is only consulted
+    #    when it differs or every STATE_RECHECK_SECONDS
+    with metrics.span('compare', market_name, lang_code):
+        state_matches = publish_state.matches(market_name, lang_code, live_validity_strings, STATE_RECHECK_SECONDS)
+        # 3. Otherwise fetch currently stored data from Firestore and compare it with the live data
+        stored_validity_strings = None if state_matches else sorted(
+            await engine.firestore(get_stored_validity_strings, market_name, lang_code)
+        )
+    if state_matches:
+        logging.info(f"Catalogs for {market_name.upper()} ({lang_code}) match the local publish state. No action needed.")
+        return 'up-to-date'
+
+    if live_validity_strings == stored_validity_strings:
+        logging.info(f"Catalogs for {market_name.upper()} ({lang_code}) are already up-to-date. No action needed.")
+        publish_state.update(market_name, lang_code, validity=stored_validity_strings)
+        return 'up-to-date'
+
+    # --- IF WE REACH HERE, AN UPDATE IS REQUIRED ---
+    logging.info(f"New catalogs found for {market_name.upper()} ({lang_code}). Starting update process...")
+
+    catalogs_to_process = select_catalogs_to_process(live_catalogs, today)
+    if not catalogs_to_process:
+        logging.warning(f"Update required, but could not identify a clear current/next week catalog.")
+        return 'skipped'
+
+    published_catalogs = await engine.firestore(get_published_catalogs, market_name, lang_code)
+    # A catalog that raises is logged and left out like one that failed, so the other one is still published
+    documents = await asyncio.gather(*(
+        _process_catalog(engine, market_name, config, lang_code, i, catalog_data, published_catalogs)
+        for i, catalog_data in enumerate(catalogs_to_process)
+    ), return_exceptions=True)
+    catalog_documents = []
+    for catalog_data, document in zip(catalogs_to_process, documents):
+        if isinstance(document, Exception):
+            logging.error(
+                f"Processing the {catalog_data['week_type'].upper()} catalog for {market_name.upper()} ({lang_code}) failed: {document}",
+                exc_info=document
+            )
+        elif isinstance(document, BaseException):
+            raise document
+        elif document:
+            catalog_documents.append(document)
+
+    # Nothing is published unless at least one catalog made it, so a failed run never empties the app
+    if not catalog_documents:
+        return 'skipped'
+    # A live catalog that failed to process keeps its published document until a later run succeeds
+    failed_week_types = sorted(
+        {catalog['week_type'] for catalog in catalogs_to_process} - {document['weekType'] for document in catalog_documents}
+    )
+    with metrics.span('publish', market_name, lang_code):
+        published = await engine.firestore(publish_catalogs, market_name, lang_code, catalog_documents, failed_week_types)
+    return record_publish(market_name, lang_code, catalog_documents, len(catalogs_to_process), published)
+
+async def _process_catalog(engine, market_name, config, lang_code, index, catalog_data, published_catalogs):
+    """
+    Re-tags, reuses or downloads/renders/uploads one catalog. Returns its document, or None if it failed.
+    Catalogs that are already published (typically last week's 'next', which is now 'current') are
+    re-tagged from their stored document without downloading them again. Pages of PDFs that turn
+    out byte-identical to a published one after download are reused as well.
+    """
+    pdf_url = catalog_data['url']
+    validity_string = catalog_data['validity']
+    week_type = catalog_data['week_type']
+    logging.info(f"Processing {week_type.upper()} catalog. Validity: {validity_string}")
+
+    published = find_published_catalog(published_catalogs, pdf_url, validity_string)
+    if published:
+        logging.info(f"Catalog is already published as '{published['weekType']}'. Re-tagging it as '{week_type}' without reprocessing.")
+        metrics.count('catalogs_retagged', market=market_name, lang=lang_code)
+        downloaded_pdf_path, pdf_hash = None, published['pdfHash']
+    else:
+        downloaded_pdf_path, pdf_hash = resumed_download(market_name, lang_code, pdf_url)
+        if not downloaded_pdf_path:
+            with metrics.span('download', market_name, lang_code):
+                downloaded_pdf_path, pdf_hash = await engine.download_pdf(pdf_url, market_name, lang_code, index)
+            if not downloaded_pdf_path: return None
+            checkpoints.record(market_name, lang_code, 'download', pdf_url, [downloaded_pdf_path, pdf_hash])
+        published = next((catalog for catalog in published_catalogs if catalog['pdfHash'] == pdf_hash), None)
+        if published:
+            logging.info(f"PDF {pdf_hash[:12]} is unchanged. Reusing its published pages; skipping render and upload.")
+            metrics.count('catalogs_reused', market=market_name, lang=lang_code)
+
+    if published:
+        page_variants = published['pageVariants']
+        storage_urls, thumbnail_url = published['pages'], published['thumbnail']
+        search_index_url = published.get('searchIndex')
+    else:
+        # Keyed by PDF content; names the local render directory and the manifest's storage prefix
+        catalog_id = pdf_hash[:16]
+        image_output_dir = os.path.join(LOCAL_IMAGE_DIR, market_name, lang_code, catalog_id)
+        if PIPELINE_MODE == 'streaming':
+            if STREAM_KEEP_FILES:
+                os.makedirs(image_output_dir, exist_ok=True)
+            # Render and upload overlap in this mode, so they are timed as one stage
+            with metrics.span('render_upload', market_name, lang_code):
+                page_variants = await engine.offload(
+                    stream_pdf_to_storage, downloaded_pdf_path, market_name, lang_code, catalog_id,
+                    keep_files_dir=image_output_dir if STREAM_KEEP_FILES else None
+                )
+        else:
+            os.makedirs(image_output_dir, exist_ok=True)
+            variant_paths = resumed_render(market_name, lang_code, catalog_id)
+            if not variant_paths:
+                with metrics.span('render', market_name, lang_code):
+                    variant_paths = await engine.offload(convert_pdf_to_images, downloaded_pdf_path, image_output_dir)
+                if not variant_paths: return None
+                checkpoints.record(market_name, lang_code, 'render', catalog_id, variant_paths)
+            with metrics.span('upload', market_name, lang_code):
+                page_variants = await engine.upload_page_variants(variant_paths, market_name, lang_code, catalog_id)
+        if not page_variants: return None
+        metrics.count('pages_rendered', len(next(iter(page_variants.values()))), market=market_name, lang=lang_code)
+        storage_urls, thumbnail_url = pages_and_thumbnail(page_variants)
+        search_index_url = None
+    # Catalogs published before search existed get their index once their PDF is downloaded again
+    if not search_index_url and downloaded_pdf_path:
+        with metrics.span('index', market_name, lang_code):
+            search_index_url = await engine.offload(index_catalog_text, downloaded_pdf_path, market_name, lang_code, pdf_hash[:16])
+
+    logging.info(f"--- Successfully processed {week_type.upper()} catalog for {market_name.upper()} ({lang_code}). ---")
+    return build_catalog_document(
+        market_name, catalog_title(market_name, config, lang_code), validity_string, thumbnail_url, storage_urls,
+        lang_code, week_type, pdf_hash, page_variants, pdf_url, search_index_url
+    )
+
+def select_catalogs_to_process(live_catalogs, today):
+    """
+    Picks the current-week catalog (the latest one whose validity range contains `today`, else the
+    latest one started on or before it) and the next-week one (earliest start date after `today`)
+    from the scraped (pdf_url, validity) pairs. Returns a list of
+    {'url', 'validity', 'start_date', 'end_date', 'week_type'} dicts; end_date is None if the text has none.
+    """
+    dated_catalogs = []
+    for pdf_url, validity_string in live_catalogs: # Use live_catalogs we already scraped
+        parsed = parse_validity(validity_string, today)
+        if parsed:
+            dated_catalogs.append({
+                'url': pdf_url, 'validity': validity_string, 'start_date': parsed[0], 'end_date': parsed[1]
+            })
+
+    sorted_catalogs = sorted(dated_catalogs, key=lambda x: x['start_date'])
+
+    started_catalogs = [cat for cat in sorted_catalogs if cat['start_date'] <= today]
+    running_catalogs = [cat for cat in started_catalogs if cat['end_date'] is None or cat['end_date'] >= today]
+    current_week_catalog = (running_catalogs or started_catalogs or [None])[-1]
+    next_week_catalog = None
+
+    for cat in sorted_catalogs:
+        if cat['start_date'] > today:
+            next_week_catalog = cat
+            break
+
+    catalogs_to_process = []
+    if current_week_catalog:
+        current_week_catalog['week_type'] = 'current'
+        catalogs_to_process.append(current_week_catalog)
+    if next_week_catalog and (not current_week_catalog or next_week_catalog['url'] != current_week_catalog['url']):
+        next_week_catalog['week_type'] = 'next'
+        catalogs_to_process.append(next_week_catalog)
+
+    return catalogs_to_process
+
+def catalog_title(market_name, config, lang_code):
+    base_title = config["titles"].get(lang_code, "Weekly Catalog")
+    return f"{market_name.capitalize()} {base_title}"
+
+def pages_and_thumbnail(page_variants):
+    """The first ladder size is the full render; the smallest one is used for the list thumbnail. Tile pyramids are neither."""
+    sizes = [urls for name, urls in page_variants.items() if name != TILE_VARIANT]
+    return sizes[0], sizes[-1][0]
+
+def record_publish(market_name, lang_code, catalog_documents, expected_count, published):
+    """Updates the local publish state and checkpoint journal after publish_catalogs and returns the job status."""
+    if not published:
+        publish_state.forget(market_name, lang_code)
+        return 'failed'
+    doc_ids = [catalog_document_id(market_name, lang_code, document['weekType']) for document in catalog_documents]
+    publish_state.update(
+        market_name, lang_code,
+        validity=[document['validity'] for document in catalog_documents],
+        pdf_hashes=[document['pdfHash'] for document in catalog_documents],
+        doc_ids=doc_ids
+    )
+    if len(catalog_documents) != expected_count:
+        return 'partial'
+    checkpoints.record(market_name, lang_code, 'publish', '', doc_ids)
+    return 'updated'
+
+def resumed_scrape(market_name, lang_code):
+    """
+    Returns the live catalogs an interrupted run scraped, or None. They are only reused once that run
+    got as far as downloading, so a job that failed early scrapes afresh instead of replaying the journal.
+    """
+    live_catalogs = checkpoints.get(market_name, lang_code, 'scrape')
+    if live_catalogs is None or not checkpoints.completed(market_name, lang_code, 'download'):
+        return None
+    logging.info(f"Resuming {market_name.upper()} ({lang_code}) with the catalogs scraped by the interrupted run.")
+    return live_catalogs
+
+def resumed_download(market_name, lang_code, pdf_url):
+    """Returns (path, sha256) of a PDF an interrupted run downloaded, if it is still on disk, else (None, None)."""
+    recorded = checkpoints.get(market_name, lang_code, 'download', pdf_url)
+    if not recorded or not os.path.exists(recorded[0]):
+        return None, None
+    logging.info(f"Resuming with the PDF downloaded by the interrupted run: {recorded[0]}")
+    return recorded[0], recorded[1]
+
+def resumed_render(market_name, lang_code, catalog_id):
+    """
+    Returns the variant paths an interrupted run rendered for a catalog in staged mode, if all of
+    its files are still on disk, else None. Its uploaded pages are skipped by upload_page_variants.
+    """
+    recorded = checkpoints.get(market_name, lang_code, 'render', catalog_id)
+    if not recorded or not all(os.path.exists(path) for paths in recorded.values() for path in paths):
+        return None
+    logging.info(f"Resuming with the {len(next(iter(recorded.values())))} pages rendered by the interrupted run.")
+    return recorded
+
+async def _run_job(engine, market_name, config, lang_code, direct_url):
+    """Wraps a single job so that any failure stays isolated to that job."""
+    started = time.monotonic()
+    try:
+        status = await process_market_language(engine, market_name, config, lang_code, direct_url)
+        error = None
+    except Exception as e:
+        logging.exception(f"Job {market_name.upper()} ({lang_code}) failed: {e}")
+        status, error = 'failed', str(e)
+    return _job_result(market_name, lang_code, status, error, started)
+
+def _job_result(market_name, lang_code, status, error, started):
+    # Failed, partial and skipped jobs keep their checkpoints, so the next run resumes them
+    if status in ('up-to-date', 'updated'):
+        checkpoints.finish(market_name, lang_code)
+    metrics.record_span('job', time.monotonic() - started, market_name, lang_code, 'error' if status == 'failed' else 'ok')
+    return {
+        'market': market_name,
+        'language': lang_code,
+        'status': status,
+        'error': error,
+        'scrape_path': get_scrape_path(market_name, lang_code),
+        'duration': time.monotonic() - started
+    }
+
+def run_jobs(jobs, max_workers):
+    """
+    Runs every (market_name, config, lang_code, direct_url) job on a thread pool, or as coroutines
+    when IO_ENGINE is 'asyncio'. Results are returned in the same order as the submitted jobs.
+    """
+    max_workers = max(1, min(max_workers, len(jobs) or 1))
+    logging.info(f"Running {len(jobs)} jobs with {max_workers} worker(s) on the {IO_ENGINE} I/O engine...")
+    if IO_ENGINE == 'asyncio':
+        return asyncio.run(run_jobs_async(jobs, max_workers))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job') as executor:
+        futures = [executor.submit(_run_job_blocking, *job) for job in jobs]
+        return [future.result() for future in futures]
+
+def _run_job_blocking(*job):
+    """Runs one job on the calling thread, with every I/O call blocking it."""
+    return asyncio.run(_run_job(BlockingIOEngine(), *job))
+
+async def run_jobs_async(jobs, max_workers):
+    """Runs the jobs as coroutines, at most `max_workers` at a time, sharing one AsyncIOEngine."""
+    engine = AsyncIOEngine(ASYNC_DOWNLOAD_CONCURRENCY, ASYNC_UPLOAD_CONCURRENCY, ASYNC_FIRESTORE_CONCURRENCY)
+    job_slots = asyncio.Semaphore(max_workers)
+
+    async def run(job):
+        async with job_slots:
+            return await _run_job(engine, *job)
+
+    try:
+        return await asyncio.gather(*(run(job) for job in jobs))
+    finally:
+        await engine.close()
+
+def log_job_summary(results):
+    """Logs a one-line summary for each job followed by the overall totals."""
+    logging.info("===== JOB SUMMARY =====")
+    for result in results:
+        line = f"{result['market'].upper():<6} {result['language']:<3} {result['status']:<11} {result['duration']:7.1f}s  scrape={result['scrape_path'] or '-'}"
+        if result['error']:
+            line += f"  ({result['error']})"
+        logging.info(line)
+    failed = sum(1 for result in results if result['status'] == 'failed')
+    logging.info(f"{len(results)} jobs finished, {failed} failed.")
+    logging.info(f"Downloads: {download_stats.summary()}")
+    for stage, totals in metrics.stage_totals().items():
+        logging.info(
+            f"Stage {stage:<13} {totals['count']:3d}x  total {totals['seconds']:7.1f}s  "
+            f"p50 {totals['p50']:6.1f}s  p95 {totals['p95']:6.1f}s  errors {totals['errors']}"
+        )
+
+def write_run_reports(results):
+    """Exports this run's metrics as the JSON run report and the Prometheus textfile."""
+    metrics.write_json(METRICS_REPORT_PATH, results)
+    metrics.write_prometheus(METRICS_TEXTFILE_PATH, results)
+
+# =========================================================================================
+# DAEMON MODE
+# =========================================================================================
+
+def published_start_dates(market_name, lang_code):
+    """Start dates of the catalogs last published for a market/language, from the local publish state."""
+    entry = publish_state.get(market_name, lang_code) or {}
+    return [date for date in map(extract_start_date, entry.get('validity', [])) if date]
+
+def run_daemon(jobs):
+    """
+    Keeps running and checks every job on its own schedule (see ReleaseSchedule): often around the
+    expected release of its next brochure, rarely otherwise. The Firebase clients, WebDriver pool
+    and render/upload pools stay warm between checks. Stops cleanly on SIGINT/SIGTERM.
+    """
+    stop = threading.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_number, lambda *_: stop.set())
+    next_check = {(job[0], job[2]): 0.0 for job in jobs}
+    last_check = {}
+    logging.info(f"Daemon started with {len(jobs)} jobs.")
+
+    while not stop.is_set():
+        due = [job for job in jobs if next_check[(job[0], job[2])] <= time.time()]
+        if due:
+            cleanup_directory(LOCAL_IMAGE_DIR)
+            # Objects seen in earlier cycles may have been collected by maintenance.py gc since
+            forget_known_page_objects()
+            newest_before = {(job[0], job[2]): max(published_start_dates(job[0], job[2]), default=None) for job in due}
+            checked_at = time.time()
+            results = run_jobs(due, MAX_CONCURRENT_JOBS)
+            for result in results:
+                key = (result['market'], result['language'])
+                start_dates = published_start_dates(*key)
+                newest = max(start_dates, default=None)
+                # Only a release caught by a frequent check says when it really happened
+                if (result['status'] in ('updated', 'partial') and newest and newest_before[key] and newest > newest_before[key]
+                        and key in last_check and checked_at - last_check[key] <= DAEMON_OVERDUE_SECONDS):
+                    release_schedule.observe_release(*key, newest, datetime.datetime.fromtimestamp(checked_at))
+                last_check[key] = checked_at
+                delay = release_schedule.next_poll_delay(*key, start_dates)
+                next_check[key] = time.time() + delay
+                logging.info(f"Next check of {key[0].upper()} ({key[1]}) in {delay / 60:.0f} min.")
+            log_job_summary(results)
+            write_run_reports(results)
+            metrics.reset()
+        stop.wait(max(1.0, min(next_check.values()) - time.time()))
+    logging.info("Daemon stopping.")
 
 # =========================================================================================
 # MAIN CONTROLLER
 # =========================================================================================
 def main():
     """Main execution function with logic to check for updates before processing."""
+    parser = argparse.ArgumentParser(description="Scrape, render and publish the weekly catalogs.")
+    parser.add_argument('--daemon', action='store_true', help="Keep running and poll around expected release times.")
+    args = parser.parse_args()
+    # Set up here rather than at import time: render workers are spawned and re-import this module,
+    # which must not truncate the log file or add handlers in every worker
+    setup_logging(daemon=args.daemon)
     logging.info("--- STARTING CATALOG AUTOMATION SCRIPT ---")
 
-    # This initial cleanup can still happen if you want a clean slate for downloads
-    if not cleanup_directory(PDF_DOWNLOAD_DIR) or not cleanup_directory(LOCAL_IMAGE_DIR):
+    # This initial cleanup can still happen if you want a clean slate for downloads.
+    # After an interrupted run they are kept, so partial downloads and rendered pages can be resumed.
+    if checkpoints.has_pending():
+        logging.info("The last run was interrupted. Keeping temporary directories to resume it.")
+        os.makedirs(PDF_DOWNLOAD_DIR, exist_ok=True)
+        os.makedirs(LOCAL_IMAGE_DIR, exist_ok=True)
+    elif not cleanup_directory(PDF_DOWNLOAD_DIR) or not cleanup_directory(LOCAL_IMAGE_DIR):
         logging.critical("Could not create/clean temporary directories. Exiting script.")
         return
-    logging.info("Temporary directories created/cleaned successfully.")
+    else:
+        logging.info("Temporary directories created/cleaned successfully.")
 
     markets = {
         "lidl": {
@@ -64,99 +482,25 @@ def main():
         }
     }
 
-    today = datetime.date.today()
-
-    for market_name, config in markets.items():
-        logging.info(f"===== PROCESSING MARKET: {market_name.upper()} =====")
-        scraper_function = config["scraper"]
-
-        for lang_code, direct_url in config["languages"].items():
-            logging.info(f"--- Processing Language: {lang_code.upper()} ---")
-
-            # --- NEW UPDATE CHECKING LOGIC ---
-            
-            # 1. Scrape live data from the website to see what's currently available
-            live_catalogs = scraper_function(market_name, lang_code, direct_url)
-            if not live_catalogs:
-                logging.error(f"No catalogs found on the website for {market_name.upper()} ({lang_code}). Skipping.")
-                continue
-            
-            live_validity_strings = sorted([cat[1] for cat in live_catalogs])
-
-            # 2. Fetch currently stored data from Firestore
-            stored_validity_strings = sorted(get_stored_validity_strings(market_name, lang_code))
-            
-            # 3. Compare the live data with the stored data
-            if live_validity_strings == stored_validity_strings:
-                logging.info(f"Catalogs for {market_name.upper()} ({lang_code}) are already up-to-date. No action needed.")
-                continue # Skip to the next language/market
-            
-            # --- IF WE REACH HERE, AN UPDATE IS REQUIRED ---
-            logging.info(f"New catalogs found for {market_name.upper()} ({lang_code}). Starting update process...")
-
-            # The rest of the logic is the same as before, but now it only runs when needed.
-            dated_catalogs = []
-            for pdf_url, validity_string in live_catalogs: # Use live_catalogs we already scraped
-                start_date = extract_start_date(validity_string)
-                if start_date:
-                    dated_catalogs.append({
-                        'url': pdf_url, 'validity': validity_string, 'start_date': start_date
-                    })
-            
-            sorted_catalogs = sorted(dated_catalogs, key=lambda x: x['start_date'])
-
-            current_week_catalog = None
-            next_week_catalog = None
-
-            for cat in reversed(sorted_catalogs):
-                if cat['start_date'] <= today:
-                    current_week_catalog = cat
-                    break
-
-            for cat in sorted_catalogs:
-                if cat['start_date'] > today:
-                    next_week_catalog = cat
-                    break
-            
-            catalogs_to_process = []
-            if current_week_catalog:
-                current_week_catalog['week_type'] = 'current'
-                catalogs_to_process.append(current_week_catalog)
-            if next_week_catalog and (not current_week_catalog or next_week_catalog['url'] != current_week_catalog['url']):
-                next_week_catalog['week_type'] = 'next'
-                catalogs_to_process.append(next_week_catalog)
-
-            if not catalogs_to_process:
-                logging.warning(f"Update required, but could not identify a clear current/next week catalog.")
-                continue
-
-            clear_old_catalogs(market_name, lang_code)
-            
-            for i, catalog_data in enumerate(catalogs_to_process):
-                pdf_url = catalog_data['url']
-                validity_string = catalog_data['validity']
-                week_type = catalog_data['week_type']
-                
-                catalog_id = f"{week_type}_catalog_{i+1}"
-                logging.info(f"Processing {week_type.upper()} catalog. Validity: {validity_string}")
-
-                downloaded_pdf_path = download_pdf(pdf_url, market_name, lang_code, i)
-                if not downloaded_pdf_path: continue
-                
-                image_output_dir = os.path.join(LOCAL_IMAGE_DIR, market_name, lang_code, catalog_id)
-                os.makedirs(image_output_dir, exist_ok=True)
-                local_image_paths = convert_pdf_to_images(downloaded_pdf_path, image_output_dir)
-                if not local_image_paths: continue
-
-                storage_urls = upload_images_to_storage(local_image_paths, market_name, lang_code, catalog_id)
-                if not storage_urls: continue
-
-                thumbnail_url = storage_urls[0] if storage_urls else ''
-                base_title = config["titles"].get(lang_code, "Weekly Catalog")
-                catalog_title = f"{market_name.capitalize()} {base_title}"
-
-                add_catalog_to_firestore(market_name, catalog_title, validity_string, thumbnail_url, storage_urls, lang_code, week_type)
-                logging.info(f"--- Successfully processed {week_type.upper()} catalog for {market_name.upper()} ({lang_code}). ---")
+    jobs = [
+        (market_name, config, lang_code, direct_url)
+        for market_name, config in markets.items()
+        for lang_code, direct_url in config["languages"].items()
+    ]
+    if args.daemon:
+        try:
+            run_daemon(jobs)
+        finally:
+            driver_pool.close_all()
+            shutdown_render_executor()
+        return
+    try:
+        results = run_jobs(jobs, MAX_CONCURRENT_JOBS)
+    finally:
+        driver_pool.close_all()
+        shutdown_render_executor()
+    log_job_summary(results)
+    write_run_reports(results)
 
     logging.info("--- ALL CATALOG AUTOMATION FINISHED ---")
     # You may choose to leave the final cleanup or remove it depending on your needs
@@ -0,0 +1,297 @@
+# benchmark_pipeline.py
+#
+# End-to-end pipeline benchmark on synthetic brochures. Runs fully offline: PDFs are
+# generated with PyMuPDF, served from a local HTTP server and uploaded to the local
+# storage backend.
+#
+#   python benchmark_pipeline.py --pages 40 --runs 5 --mode staged --json bench.json
+#
+# Each stage is run through the same I/O engine call as automate_catalog._process_catalog,
+# so the numbers cover the production path of the chosen --io-engine.
+
+import argparse
+import asyncio
+import datetime
+import functools
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The benchmark must never touch the real Firebase project
+os.environ['CATALOG_BACKEND'] = 'local'
+
+import fitz  # PyMuPDF
+
+import scrapers.utils as utils
+from scrapers.async_engine import AsyncIOEngine, BlockingIOEngine
+from scrapers.pdf_cache import PdfCache
+from scrapers.checkpoint import CheckpointJournal
+
+PAGE_SIZES = {
+    'a4': fitz.paper_rect('a4'),
+    'a3': fitz.paper_rect('a3'),
+    'spread': fitz.Rect(0, 0, 2 * 595, 842),
+    'poster': fitz.paper_rect('a1')
+}
+
+# =========================================================================================
+# SYNTHETIC BROCHURES
+# =========================================================================================
+
+def generate_brochure(path, page_count, page_size, images_per_page, image_px, seed=0):
+    """
+    Writes a brochure-like PDF: a coloured header, price tags with text and `images_per_page`
+    noisy RGB product photos of `image_px` x `image_px` pixels per page.
+    """
+    rng = random.Random(seed)
+    document = fitz.open()
+    rect = PAGE_SIZES[page_size]
+    for page_num in range(page_count):
+        page = document.new_page(width=rect.width, height=rect.height)
+        page.draw_rect(fitz.Rect(0, 0, rect.width, 60), color=None, fill=(0.0, 0.3, 0.6))
+        page.insert_text((20, 40), f"Aktionen der Woche - Seite {page_num + 1}", fontsize=22, color=(1, 1, 1))
+        columns = 3
+        cell_w = (rect.width - 40) / columns
+        rows = max(1, -(-images_per_page // columns))
+        cell_h = (rect.height - 100) / rows
+        for index in range(images_per_page):
+            x = 20 + (index % columns) * cell_w
+            y = 80 + (index // columns) * cell_h
+            image_rect = fitz.Rect(x + 5, y + 5, x + cell_w - 5, y + cell_h - 40)
+            samples = bytes(rng.getrandbits(8) for _ in range(image_px * image_px * 3))
+            page.insert_image(image_rect, pixmap=fitz.Pixmap(fitz.csRGB, image_px, image_px, samples, 0))
+            price = f"{rng.randint(1, 49)}.{rng.choice(['95', '50', '99'])}"
+            page.insert_text((x + 8, y + cell_h - 15), f"Artikel {index + 1}  CHF {price}", fontsize=11)
+    document.save(path, deflate=True)
+    document.close()
+    return path
+
+# =========================================================================================
+# LOCAL HTTP SERVER
+# =========================================================================================
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(directory):
+    """Serves `directory` on a free localhost port. Returns (server, base_url)."""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# =========================================================================================
+# MEASUREMENT
+# =========================================================================================
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def peak_rss_mb():
+    """
+    Peak resident set size in MB as (main process, largest exited child), or None where unsupported.
+    Render workers only count as children once they have exited, so call this after shutting them down.
+    """
+    if resource is None:
+        return None
+    unit = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1e6
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 1e6
+    return own, children
+
+def reset_backend(run_dir):
+    """Points the pipeline at empty per-run directories so no cache or dedup hit skews a run."""
+    utils.PDF_DOWNLOAD_DIR = os.path.join(run_dir, 'temp_pdfs')
+    os.makedirs(utils.PDF_DOWNLOAD_DIR, exist_ok=True)
+    utils.pdf_cache = PdfCache(os.path.join(run_dir, 'pdf_cache'), utils.PDF_CACHE_MAX_BYTES)
+    utils.checkpoints = CheckpointJournal(os.path.join(run_dir, 'state', 'checkpoints.jsonl'), utils.CHECKPOINT_MAX_AGE_SECONDS)
+    utils.LOCAL_BACKEND_DIR = os.path.join(run_dir, 'local_backend')
+    utils._clients = None
+    utils._known_page_objects.clear()
+
+def run_once(pdf_url, run_dir, mode, workers, io_engine):
+    """Runs download, render/encode and upload once. Returns {stage: seconds} plus byte/page counts."""
+    reset_backend(run_dir)
+    return asyncio.run(_run_stages(pdf_url, run_dir, mode, workers, io_engine))
+
+async def _run_stages(pdf_url, run_dir, mode, workers, io_engine):
+    if io_engine == 'asyncio':
+        engine = AsyncIOEngine(utils.ASYNC_DOWNLOAD_CONCURRENCY, utils.ASYNC_UPLOAD_CONCURRENCY, utils.ASYNC_FIRESTORE_CONCURRENCY)
+    else:
+        engine = BlockingIOEngine()
+    try:
+        return await _timed_stages(engine, pdf_url, run_dir, mode, workers)
+    finally:
+        await engine.close()
+
+async def _timed_stages(engine, pdf_url, run_dir, mode, workers):
+    timings = {}
+
+    started = time.perf_counter()
+    pdf_path, pdf_hash = await engine.download_pdf(pdf_url, 'bench', 'de', 0)
+    timings['download'] = time.perf_counter() - started
+    if not pdf_path:
+        raise RuntimeError(f"Download of {pdf_url} failed.")
+
+    image_dir = os.path.join(run_dir, 'images')
+    os.makedirs(image_dir, exist_ok=True)
+    if mode == 'streaming':
+        started = time.perf_counter()
+        page_variants = await engine.offload(utils.stream_pdf_to_storage, pdf_path, 'bench', 'de', pdf_hash[:16], workers=workers)
+        timings['render+upload'] = time.perf_counter() - started
+    else:
+        started = time.perf_counter()
+        variant_paths = await engine.offload(utils.convert_pdf_to_images, pdf_path, image_dir, workers=workers)
+        timings['render'] = time.perf_counter() - started
+        started = time.perf_counter()
+        page_variants = await engine.upload_page_variants(variant_paths, 'bench', 'de', pdf_hash[:16])
+        timings['upload'] = time.perf_counter() - started
+    if not page_variants:
+        raise RuntimeError("Render/upload produced no pages.")
+
+    bucket_dir = os.path.join(utils.LOCAL_BACKEND_DIR, 'bucket')
+    image_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(bucket_dir) for name in names
+    )
+    return {
+        'timings': timings,
+        'pdf_bytes': os.path.getsize(pdf_path),
+        'image_bytes': image_bytes,
+        'pages': len(next(iter(page_variants.values())))
+    }
+
+def summarize(results, total_seconds, rss):
+    """Aggregates per-run results into throughput figures and per-stage latency percentiles."""
+    stages = {}
+    for result in results:
+        for stage, seconds in result['timings'].items():
+            stages.setdefault(stage, []).append(seconds)
+    pipeline_seconds = [sum(result['timings'].values()) for result in results]
+    pages = sum(result['pages'] for result in results)
+    pdf_bytes = sum(result['pdf_bytes'] for result in results)
+    image_bytes = sum(result['image_bytes'] for result in results)
+    return {
+        'runs': len(results),
+        'pages_per_second': pages / sum(pipeline_seconds),
+        'download_mb_per_second': pdf_bytes / 1e6 / sum(stages['download']),
+        'output_mb_per_second': image_bytes / 1e6 / sum(pipeline_seconds),
+        'pdf_mb': pdf_bytes / 1e6 / len(results),
+        'output_mb': image_bytes / 1e6 / len(results),
+        'peak_rss_mb': rss[0] if rss else None,
+        'peak_worker_rss_mb': rss[1] if rss else None,
+        'wall_seconds': total_seconds,
+        'stages': {
+            stage: {
+                'p50': percentile(values, 50),
+                'p90': percentile(values, 90),
+                'p99': percentile(values, 99),
+                'max': max(values)
+            }
+            for stage, values in stages.items()
+        }
+    }
+
+def print_report(summary, config):
+    print(f"\n=== Pipeline benchmark: {config['pages']} pages ({config['page_size']}, {config['images_per_page']} images/page), "
+          f"mode={config['mode']}, io={config['io_engine']}, format={utils.IMAGE_FORMAT}, workers={config['workers']}, "
+          f"render budget={str(config['render_memory_mb']) + ' MB' if config['render_memory_mb'] else 'off'} ===")
+    print(f"runs               {summary['runs']}")
+    print(f"pages/sec          {summary['pages_per_second']:.2f}")
+    print(f"download MB/s      {summary['download_mb_per_second']:.1f}  (PDF {summary['pdf_mb']:.1f} MB)")
+    print(f"output MB/s        {summary['output_mb_per_second']:.1f}  (images {summary['output_mb']:.1f} MB)")
+    if summary['peak_rss_mb'] is not None:
+        print(f"peak RSS           {summary['peak_rss_mb']:.0f} MB main, {summary['peak_worker_rss_mb']:.0f} MB largest render worker")
+    print(f"{'stage':<16}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for stage, stats in summary['stages'].items():
+        print(f"{stage:<16}" + ''.join(f"{stats[key]:>8.2f}s" for key in ('p50', 'p90', 'p99', 'max')))
+
+# =========================================================================================
+# MAIN
+# =========================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark download/render/encode/upload on synthetic brochures.")
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--page-size', choices=sorted(PAGE_SIZES), default='a4')
+    parser.add_argument('--images-per-page', type=int, default=6)
+    parser.add_argument('--image-px', type=int, default=400, help="Edge length of each embedded product image.")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--warmup', type=int, default=1, help="Untimed runs before measuring (starts the worker pools).")
+    parser.add_argument('--mode', choices=['staged', 'streaming'], default=utils.PIPELINE_MODE)
+    parser.add_argument('--io-engine', choices=['threads', 'asyncio'], default=utils.IO_ENGINE)
+    parser.add_argument('--workers', type=int, default=utils.RENDER_WORKERS)
+    parser.add_argument('--render-memory-mb', type=int,
+                        help="Per-page render memory limit; 0 renders every page in one pass (default: CATALOG_RENDER_MEMORY_MB).")
+    parser.add_argument('--json', help="Write the summary to this JSON file as well.")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary benchmark directory.")
+    args = parser.parse_args()
+    # Include the PNG encode that reports the bytes saved by IMAGE_FORMAT, like the original measurements
+    utils.IMAGE_MEASURE_BASELINE = True
+    if args.render_memory_mb is not None:
+        utils.RENDER_BUDGET = dict(
+            utils.RENDER_BUDGET or {'band_bytes': utils.RENDER_BAND_BYTES, 'min_dpi': utils.RENDER_MIN_DPI},
+            memory_bytes=args.render_memory_mb * 1024 * 1024
+        ) if args.render_memory_mb else None
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - [%(levelname)s] - %(message)s')
+    work_dir = tempfile.mkdtemp(prefix='catalog_bench_')
+    served_dir = os.path.join(work_dir, 'served')
+    os.makedirs(served_dir)
+    server = None
+    try:
+        started = time.perf_counter()
+        generate_brochure(os.path.join(served_dir, 'brochure.pdf'), args.pages, args.page_size, args.images_per_page, args.image_px)
+        print(f"Generated synthetic brochure in {time.perf_counter() - started:.1f}s.")
+        server, base_url = start_http_server(served_dir)
+        pdf_url = f"{base_url}/brochure.pdf"
+
+        for index in range(args.warmup):
+            run_once(pdf_url, os.path.join(work_dir, f"warmup_{index}"), args.mode, args.workers, args.io_engine)
+        results = []
+        started = time.perf_counter()
+        for index in range(args.runs):
+            results.append(run_once(pdf_url, os.path.join(work_dir, f"run_{index}"), args.mode, args.workers, args.io_engine))
+        total_seconds = time.perf_counter() - started
+        utils.shutdown_render_executor()
+
+        config = {
+            'pages': args.pages, 'page_size': args.page_size, 'images_per_page': args.images_per_page,
+            'image_px': args.image_px, 'mode': args.mode, 'io_engine': args.io_engine, 'workers': args.workers, 'format': utils.IMAGE_FORMAT,
+            'ladder': [variant['name'] for variant in utils.IMAGE_LADDER],
+            'render_memory_mb': utils.RENDER_BUDGET['memory_bytes'] // (1024 * 1024) if utils.RENDER_BUDGET else 0,
+            'created': datetime.datetime.now().isoformat()
+        }
+        summary = summarize(results, total_seconds, peak_rss_mb())
+        print_report(summary, config)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump({'config': config, 'summary': summary}, f, indent=2)
+            print(f"\nSummary written to {args.json}")
+    finally:
+        if server:
+            server.shutdown()
+        utils.shutdown_render_executor()
+        if args.keep:
+            print(f"Benchmark files kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# maintenance.py
+#
+# Storage maintenance for the catalog bucket. Replaces the old delete.py script.
+#
+#   python maintenance.py usage                 # objects and bytes per catalogs/{market}/{lang} prefix
+#   python maintenance.py gc --dry-run          # list objects no brochure references any more
+#   python maintenance.py gc                    # delete them
+
+import argparse
+import datetime
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from scrapers.utils import (
+    setup_logging,
+    get_db,
+    blob_name_from_url,
+    iter_blob_pages,
+    delete_blob_batch,
+    GC_MIN_AGE_SECONDS,
+    GC_DELETE_BATCH_SIZE,
+    GC_DELETE_WORKERS
+)
+
+STORAGE_ROOT = 'catalogs/'
+
+# =========================================================================================
+# REFERENCES
+# =========================================================================================
+
+def catalog_prefix(blob_name):
+    """Returns `catalogs/{market}/{lang}/{catalog_id}/` for objects stored per catalog, else None."""
+    parts = blob_name.split('/')
+    if len(parts) >= 5 and parts[2] != 'pages':
+        return '/'.join(parts[:4]) + '/'
+    return None
+
+def load_live_references():
+    """
+    Reads every 'brochures' document and returns (document count, referenced object names, live catalog prefixes).
+    A catalog prefix is live while a brochure with that PDF hash is published, which keeps its
+    manifest and any other per-catalog objects. Raises if Firestore cannot be read.
+    """
+    fields = ['marketName', 'language', 'pdfHash', 'pages', 'thumbnail', 'pageVariants', 'searchIndex']
+    referenced, live_prefixes = set(), set()
+    documents = 0
+    for doc in get_db().collection('brochures').select(fields).stream():
+        data = doc.to_dict()
+        documents += 1
+        urls = list(data.get('pages') or []) + [data.get('thumbnail'), data.get('searchIndex')]
+        for variant_urls in (data.get('pageVariants') or {}).values():
+            urls.extend(variant_urls)
+        referenced.update(name for name in map(blob_name_from_url, urls) if name)
+        if data.get('pdfHash') and data.get('marketName') and data.get('language'):
+            live_prefixes.add(f"{STORAGE_ROOT}{data['marketName']}/{data['language']}/{data['pdfHash'][:16]}/")
+    logging.info(f"{documents} brochures reference {len(referenced)} objects and {len(live_prefixes)} catalog prefixes.")
+    return documents, referenced, live_prefixes
+
+# =========================================================================================
+# COMMANDS
+# =========================================================================================
+
+def find_orphans(prefix, referenced, live_prefixes, min_age_seconds):
+    """
+    Scans the bucket under `prefix` page by page. Returns (orphans, scanned, kept_young) where
+    orphans is a list of (name, size) for objects that no brochure references.
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=min_age_seconds)
+    orphans, scanned, kept_young = [], 0, 0
+    for page in iter_blob_pages(prefix):
+        for blob in page:
+            scanned += 1
+            if blob.name in referenced or catalog_prefix(blob.name) in live_prefixes:
+                continue
+            if blob.updated is None or blob.updated > cutoff:
+                kept_young += 1
+                continue
+            orphans.append((blob.name, blob.size or 0))
+        logging.info(f"Scanned {scanned} objects, {len(orphans)} orphaned so far...")
+    return orphans, scanned, kept_young
+
+def delete_orphans(names):
+    """Deletes objects in batches of GC_DELETE_BATCH_SIZE, GC_DELETE_WORKERS batches at a time. Returns the count sent."""
+    batches = [names[start:start + GC_DELETE_BATCH_SIZE] for start in range(0, len(names), GC_DELETE_BATCH_SIZE)]
+    deleted = 0
+    with ThreadPoolExecutor(max_workers=GC_DELETE_WORKERS, thread_name_prefix='delete') as executor:
+        for count in executor.map(delete_blob_batch, batches):
+            deleted += count
+            logging.info(f"Deleted {deleted}/{len(names)} orphaned objects.")
+    return deleted
+
+def run_gc(prefix, dry_run, min_age_seconds, force):
+    """Deletes (or, with `dry_run`, lists) every object under `prefix` that no brochure references."""
+    documents, referenced, live_prefixes = load_live_references()
+    if not documents and not force:
+        logging.error("No brochures found. Refusing to treat the whole bucket as orphaned (use --force to override).")
+        return False
+    orphans, scanned, kept_young = find_orphans(prefix, referenced, live_prefixes, min_age_seconds)
+    orphan_bytes = sum(size for _, size in orphans)
+    logging.info(
+        f"{scanned} objects scanned under '{prefix}': {len(orphans)} orphaned ({orphan_bytes / 1e6:.1f} MB), "
+        f"{kept_young} unreferenced but younger than {min_age_seconds / 3600:.0f}h kept."
+    )
+    if dry_run:
+        for name, size in orphans:
+            print(f"would delete  {size:>10}  {name}")
+        return True
+    if orphans:
+        delete_orphans([name for name, _ in orphans])
+    return True
+
+def run_usage(prefix):
+    """Logs object count and size per `catalogs/{market}/{lang or pages}` prefix."""
+    totals = {}
+    for page in iter_blob_pages(prefix):
+        for blob in page:
+            parts = blob.name.split('/')
+            group = posixpath.join(*parts[:3]) if len(parts) > 3 else posixpath.dirname(blob.name) or blob.name
+            count, size = totals.get(group, (0, 0))
+            totals[group] = (count + 1, size + (blob.size or 0))
+    for group, (count, size) in sorted(totals.items()):
+        print(f"{group:<40} {count:>8} objects {size / 1e6:>10.1f} MB")
+    print(f"{'total':<40} {sum(c for c, _ in totals.values()):>8} objects {sum(s for _, s in totals.values()) / 1e6:>10.1f} MB")
+    return True
+
+# =========================================================================================
+# MAIN
+# =========================================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog storage maintenance.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    usage_parser = subparsers.add_parser('usage', help="Show object count and size per market/language prefix.")
+    usage_parser.add_argument('--prefix', default=STORAGE_ROOT)
+    gc_parser = subparsers.add_parser('gc', help="Delete objects that no brochure references.")
+    gc_parser.add_argument('--prefix', default=STORAGE_ROOT)
+    gc_parser.add_argument('--dry-run', action='store_true', help="Only list what would be deleted.")
+    gc_parser.add_argument('--min-age-hours', type=float, default=GC_MIN_AGE_SECONDS / 3600,
+                           help="Keep unreferenced objects younger than this (uploads of a run still in progress).")
+    gc_parser.add_argument('--force', action='store_true', help="Run even if no brochures are published.")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.command == 'usage':
+        ok = run_usage(args.prefix)
+    else:
+        ok = run_gc(args.prefix, args.dry_run, args.min_age_hours * 3600, args.force)
+    raise SystemExit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # optional: downloads fall back to the blocking client on a worker thread
+    aiohttp = None
+
+from . import utils
+
+# =========================================================================================
+# ASYNCIO I/O ENGINE
+# =========================================================================================
+
+class AsyncIOEngine:
+    """
+    Runs the I/O stages of the pipeline as coroutines on one event loop, each stage behind its own
+    concurrency limit. PDFs are downloaded with aiohttp when it is installed. The storage and
+    Firestore clients have no asyncio API here, so their calls are offloaded: page uploads to a
+    pool of `upload_limit` threads, Firestore calls to the loop's default executor.
+    Must be created inside the running loop and closed with `await engine.close()`.
+    """
+
+    def __init__(self, download_limit, upload_limit, firestore_limit):
+        self._download_slots = asyncio.Semaphore(max(1, download_limit))
+        self._firestore_slots = asyncio.Semaphore(max(1, firestore_limit))
+        self._download_limit = max(1, download_limit)
+        self._upload_executor = ThreadPoolExecutor(max_workers=max(1, upload_limit), thread_name_prefix='async-upload')
+        self._session = None
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._upload_executor.shutdown(wait=False)
+
+    async def offload(self, function, *args, **kwargs):
+        """Runs a blocking call (scraping, rendering) on the default executor."""
+        return await asyncio.to_thread(function, *args, **kwargs)
+
+    async def firestore(self, function, *args):
+        """Runs a blocking Firestore helper from scrapers.utils, at most `firestore_limit` at a time."""
+        async with self._firestore_slots:
+            return await asyncio.to_thread(function, *args)
+
+    # --- Downloads ---
+
+    async def download_pdf(self, pdf_url, market_name, lang_code, catalog_index):
+        """Async counterpart of utils.download_pdf with the same cache, resume and retry behaviour. Returns (path, sha256)."""
+        async with self._download_slots:
+            if aiohttp is None:
+                return await asyncio.to_thread(utils.download_pdf, pdf_url, market_name, lang_code, catalog_index)
+            return await self._download_with_aiohttp(pdf_url, market_name, lang_code, catalog_index)
+
+    async def _download_with_aiohttp(self, pdf_url, market_name, lang_code, catalog_index):
+        """utils.download_pdf with aiohttp as the HTTP client; the cache, resume and retry steps are utils'."""
+        if not pdf_url: return None, None
+        partial_path = utils._partial_download_path(market_name, lang_code, catalog_index)
+        logging.info(f"Downloading PDF from: {pdf_url}")
+        started = time.monotonic()
+
+        for attempt in range(1, utils.DOWNLOAD_MAX_ATTEMPTS + 1):
+            try:
+                response_headers = await self._stream_to_file(pdf_url, partial_path, utils._download_headers(pdf_url, partial_path))
+                # Hashing and moving the file into the cache is blocking disk work
+                return await asyncio.to_thread(
+                    utils._finish_download, pdf_url, partial_path, response_headers, market_name, lang_code, started
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                delay = utils._download_retry_delay(pdf_url, attempt, e, market_name, lang_code)
+                if delay is None:
+                    break
+                await asyncio.sleep(delay)
+        return None, None
+
+    async def _stream_to_file(self, url, partial_path, headers):
+        """Async counterpart of utils._stream_to_file. Returns the response headers, or None on 304."""
+        headers, offset = utils._resume_headers(partial_path, headers)
+        timeout = aiohttp.ClientTimeout(sock_connect=utils.DOWNLOAD_TIMEOUT, sock_read=utils.DOWNLOAD_TIMEOUT)
+        async with self._get_session().get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 304:
+                return None
+            if response.status == 416 and offset:
+                return utils._complete_partial_headers(partial_path, response.headers)
+            response.raise_for_status()
+            received = 0
+            with utils._open_partial_download(url, partial_path, offset, response.status, response.headers) as f:
+                async for chunk in response.content.iter_chunked(utils.DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+                    utils.download_stats.add_bytes(len(chunk))
+            utils._check_download_complete(received, response.headers)
+            return response.headers
+
+    def _get_session(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._download_limit * 2, limit_per_host=self._download_limit)
+            self._session = aiohttp.ClientSession(headers=utils.HTTP_HEADERS, connector=connector)
+        return self._session
+
+    # --- Uploads ---
+
+    async def upload_page_variants(self, variant_paths, market_name, lang_code, catalog_id):
+        """
+        Async counterpart of utils.upload_page_variants: every page of every size is its own task,
+        so uploads of all catalogs in flight share the upload pool; so does every file of a tile pyramid.
+        Returns {variant_name: [urls]} or {}.
+        """
+        resumed_pages, pending_paths, page_count = utils._pending_page_uploads(variant_paths, market_name, lang_code, catalog_id)
+        page_variants = utils._page_image_variants(pending_paths)
+        all_paths = [path for paths in page_variants.values() for path in paths]
+        if all_paths:
+            logging.info(f"Uploading {len(all_paths)} images to Firebase Storage...")
+        loop = asyncio.get_running_loop()
+        pyramids = utils._tile_pyramid_batch(pending_paths, market_name, lang_code, catalog_id)
+        uploaded, *tile_uploads = await asyncio.gather(
+            asyncio.gather(*(
+                loop.run_in_executor(self._upload_executor, utils._upload_page, path, market_name) for path in all_paths
+            )),
+            *(asyncio.gather(*(
+                loop.run_in_executor(self._upload_executor, functools.partial(utils._store_catalog_object, blob_name, local_path=local_path))
+                for local_path, blob_name in files
+            )) for files in pyramids)
+        )
+        uploaded_by_variant = utils._group_by_variant(page_variants, uploaded)
+        if utils.TILE_VARIANT in pending_paths:
+            uploaded_by_variant[utils.TILE_VARIANT] = [utils._pyramid_result(page_results) for page_results in tile_uploads]
+        # Journal writes and the manifest upload block
+        return await asyncio.to_thread(
+            utils._finish_page_uploads, uploaded_by_variant, resumed_pages, page_count, market_name, lang_code, catalog_id
+        )
+
+
+# =========================================================================================
+# BLOCKING I/O ENGINE
+# =========================================================================================
+
+class BlockingIOEngine:
+    """
+    The AsyncIOEngine interface over the plain blocking helpers of scrapers.utils, for the 'threads'
+    I/O engine: each job runs the shared coroutine pipeline on its own worker thread, and every
+    call simply blocks that thread, as a plain function call would.
+    """
+
+    async def close(self):
+        pass
+
+    async def offload(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    async def firestore(self, function, *args):
+        return function(*args)
+
+    async def download_pdf(self, pdf_url, market_name, lang_code, catalog_index):
+        return utils.download_pdf(pdf_url, market_name, lang_code, catalog_index)
+
+    async def upload_page_variants(self, variant_paths, market_name, lang_code, catalog_id):
+        return utils.upload_page_variants(variant_paths, market_name, lang_code, catalog_id)
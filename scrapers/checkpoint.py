@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# =========================================================================================
+# CHECKPOINT JOURNAL
+# =========================================================================================
+
+class CheckpointJournal:
+    """
+    Durable journal of the work units a job has completed, so a run that dies half-way resumes
+    where it stopped instead of starting over. Units are (unit, key) pairs per market/language:
+    'scrape', 'download' per PDF URL, 'render' per catalog rendered to files (staged mode),
+    'page' per rendered and uploaded catalog page, 'publish'.
+    Every record is appended to a JSON-lines file and fsynced before record() returns; a torn
+    last line from a crash is ignored on load. Entries older than `max_age_seconds` are not
+    resumed, and a job's entries are dropped once it finishes.
+    """
+
+    def __init__(self, path, max_age_seconds):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def record(self, market_name, language, unit, key, value):
+        """Marks (unit, key) of a market/language as done with a JSON-serialisable `value`."""
+        entry = {'job': self._key(market_name, language), 'unit': unit, 'key': key, 'value': value, 'at': time.time()}
+        line = json.dumps(entry, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._load()[(entry['job'], unit, key)] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def get(self, market_name, language, unit, key=''):
+        """Returns the value recorded for (unit, key), or None if that unit has not completed."""
+        with self._lock:
+            entry = self._load().get((self._key(market_name, language), unit, key))
+        return entry['value'] if entry and self._fresh(entry) else None
+
+    def completed(self, market_name, language, unit):
+        """Returns {key: value} of every completed `unit` of a market/language."""
+        job = self._key(market_name, language)
+        with self._lock:
+            entries = list(self._load().values())
+        return {
+            entry['key']: entry['value'] for entry in entries
+            if entry['job'] == job and entry['unit'] == unit and self._fresh(entry)
+        }
+
+    def finish(self, market_name, language):
+        """Drops the entries of a finished market/language and compacts the journal file."""
+        job = self._key(market_name, language)
+        with self._lock:
+            entries = self._load()
+            for entry_key in [entry_key for entry_key in entries if entry_key[0] == job]:
+                del entries[entry_key]
+            self._rewrite()
+
+    def has_pending(self):
+        """True if any job left resumable entries behind, i.e. the last run was interrupted."""
+        with self._lock:
+            return any(self._fresh(entry) for entry in self._load().values())
+
+    @staticmethod
+    def _key(market_name, language):
+        return f"{market_name}/{language}"
+
+    def _fresh(self, entry):
+        return time.time() - entry['at'] < self.max_age_seconds
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            torn = False
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            torn = True
+                            continue
+                        self._entries[(entry['job'], entry['unit'], entry['key'])] = entry
+            except OSError:
+                pass
+            if torn:
+                # Rewrite the file, so the next record is not appended to the torn line
+                logging.warning(f"Ignoring a torn record in checkpoint journal {self.path}.")
+                self._rewrite()
+        return self._entries
+
+    def _rewrite(self):
+        live = [entry for entry in self._entries.values() if self._fresh(entry)]
+        if not live:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in live:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
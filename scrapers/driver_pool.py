@@ -0,0 +1,171 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from .utils import setup_driver, MAX_CONCURRENT_JOBS, DRIVER_MAX_USES
+
+# =========================================================================================
+# WEBDRIVER POOL
+# =========================================================================================
+
+class PooledDriver:
+    """A warm WebDriver session together with the bookkeeping the pool needs."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.market = None
+        # Set by the scrapers once the OneTrust banner has been accepted in this session.
+        # The consent cookie survives a release, so the banner is only handled once per market.
+        self.consent_accepted = False
+
+    def is_healthy(self):
+        """Returns True if the browser still answers a trivial script call."""
+        try:
+            return self.driver.execute_script("return 1;") == 1
+        except Exception:
+            return False
+
+    def reset_storage(self):
+        """Clears local/session storage of the current origin and parks the session on a blank page."""
+        try:
+            origin = self.driver.execute_script("return window.location.origin;")
+            if origin and origin != 'null':
+                self.driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                    'origin': origin,
+                    'storageTypes': 'local_storage,session_storage,indexeddb,cache_storage,service_workers'
+                })
+            self.driver.get('about:blank')
+            return True
+        except Exception as e:
+            logging.warning(f"Could not reset WebDriver storage: {e}")
+            return False
+
+    def reset_cookies(self):
+        """Removes every cookie in the browser, including consent cookies from other markets."""
+        try:
+            self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            self.consent_accepted = False
+            return True
+        except Exception as e:
+            logging.warning(f"Could not clear WebDriver cookies: {e}")
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error while quitting WebDriver: {e}")
+
+
+class WebDriverPool:
+    """
+    Keeps up to `max_size` headless Chrome sessions warm and leases them to the scrapers.
+    Sessions are health-checked on lease, cleaned on release and recycled after `max_uses` leases.
+    """
+
+    def __init__(self, max_size, max_uses, factory=setup_driver):
+        self.max_size = max(1, max_size)
+        self.max_uses = max(1, max_uses)
+        self.factory = factory
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, market_name):
+        """Returns a healthy session, preferring one that last served the same market."""
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("WebDriver pool has been closed.")
+                session = self._take_idle(market_name)
+                if session is None and self._total < self.max_size:
+                    self._total += 1
+                    create_new = True
+                elif session is None:
+                    self._condition.wait()
+                    continue
+                else:
+                    create_new = False
+
+            if create_new:
+                try:
+                    logging.info("Starting a new pooled WebDriver session...")
+                    session = PooledDriver(self.factory())
+                except Exception:
+                    self._forget()
+                    raise
+            elif not session.is_healthy():
+                logging.warning("Pooled WebDriver session failed its health check. Replacing it.")
+                session.quit()
+                self._forget()
+                continue
+
+            if session.market != market_name:
+                if session.market is not None:
+                    session.reset_cookies()
+                session.market = market_name
+            session.uses += 1
+            return session
+
+    def release(self, session, discard=False):
+        """Returns a session to the pool, or quits it if it is broken or has reached `max_uses`."""
+        if not discard:
+            discard = not session.reset_storage()
+        # Checked under the lock, so close_all() cannot run between the check and the append
+        # and leave a session idle in a closed pool
+        with self._condition:
+            if not discard and session.uses < self.max_uses and not self._closed:
+                self._idle.append(session)
+                self._condition.notify()
+                return
+            closed = self._closed
+        if discard:
+            reason = "discarded"
+        elif closed:
+            reason = "pool closed"
+        else:
+            reason = f"recycled after {session.uses} uses"
+        logging.info(f"Quitting pooled WebDriver session ({reason}).")
+        session.quit()
+        self._forget()
+
+    @contextmanager
+    def lease(self, market_name):
+        """Context manager around acquire()/release(). A session that raised is kept only if still healthy."""
+        session = self.acquire(market_name)
+        try:
+            yield session
+        except Exception:
+            self.release(session, discard=not session.is_healthy())
+            raise
+        else:
+            self.release(session)
+
+    def close_all(self):
+        """Quits every idle session and refuses new leases. Leased sessions quit on release."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for session in idle:
+            session.quit()
+        if idle:
+            logging.info(f"Closed {len(idle)} pooled WebDriver session(s).")
+
+    def _take_idle(self, market_name):
+        for index, session in enumerate(self._idle):
+            if session.market == market_name:
+                return self._idle.pop(index)
+        return self._idle.pop() if self._idle else None
+
+    def _forget(self):
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+
+# Shared pool used by all scrapers. No browser is started until the first lease.
+driver_pool = WebDriverPool(MAX_CONCURRENT_JOBS, DRIVER_MAX_USES)
@@ -0,0 +1,325 @@
+import os
+import copy
+import json
+import uuid
+import shutil
+import datetime
+import threading
+from pathlib import Path
+
+# =========================================================================================
+# LOCAL STORAGE / DATABASE BACKEND
+# =========================================================================================
+# Stand-ins for the parts of the Firestore and Cloud Storage clients that the pipeline uses,
+# so it can run (and be benchmarked) offline without credentials.
+
+_OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a is not None and a < b,
+    '<=': lambda a, b: a is not None and a <= b,
+    '>': lambda a, b: a is not None and a > b,
+    '>=': lambda a, b: a is not None and a >= b,
+    'in': lambda a, b: a in b,
+    'array_contains': lambda a, b: isinstance(a, list) and b in a
+}
+
+
+class LocalFirestore:
+    """
+    In-memory document database with the Firestore client API subset used by scrapers.utils.
+    When `path` is given, every committed write is persisted to that JSON file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._collections = self._read() if path else {}
+
+    def collection(self, name):
+        return LocalCollection(self, name)
+
+    def batch(self):
+        return LocalWriteBatch(self)
+
+    def transaction(self):
+        return LocalWriteBatch(self)
+
+    def run_transaction(self, function):
+        """Runs `function(transaction)` under the database lock and commits its writes atomically."""
+        with self._lock:
+            transaction = LocalWriteBatch(self)
+            result = function(transaction)
+            transaction.commit()
+            return result
+
+    def _documents(self, collection_name):
+        return self._collections.setdefault(collection_name, {})
+
+    def _apply(self, writes):
+        with self._lock:
+            for operation, reference, data in writes:
+                documents = self._documents(reference.collection_name)
+                if operation == 'set':
+                    documents[reference.id] = copy.deepcopy(_resolve_timestamps(data))
+                elif operation == 'update':
+                    documents.setdefault(reference.id, {}).update(copy.deepcopy(_resolve_timestamps(data)))
+                elif operation == 'delete':
+                    documents.pop(reference.id, None)
+            self._write()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f, object_hook=_decode_value)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._collections, f, indent=2, default=_encode_value)
+        os.replace(tmp_path, self.path)
+
+
+class LocalQuery:
+    def __init__(self, db, collection_name, filters=(), fields=None, order=(), limit=None):
+        self._db = db
+        self.collection_name = collection_name
+        self._filters = tuple(filters)
+        self._fields = fields
+        self._order = tuple(order)
+        self._limit = limit
+
+    def where(self, field, operator, value):
+        return LocalQuery(self._db, self.collection_name, self._filters + ((field, operator, value),), self._fields, self._order, self._limit)
+
+    def select(self, fields):
+        return LocalQuery(self._db, self.collection_name, self._filters, list(fields), self._order, self._limit)
+
+    def order_by(self, field, direction='ASCENDING'):
+        return LocalQuery(self._db, self.collection_name, self._filters, self._fields, self._order + ((field, direction),), self._limit)
+
+    def limit(self, count):
+        return LocalQuery(self._db, self.collection_name, self._filters, self._fields, self._order, count)
+
+    def stream(self, transaction=None):
+        with self._db._lock:
+            items = list(self._db._documents(self.collection_name).items())
+        matches = [
+            (doc_id, data) for doc_id, data in items
+            if all(_OPERATORS[operator](data.get(field), value) for field, operator, value in self._filters)
+        ]
+        for field, direction in reversed(self._order):
+            matches.sort(key=lambda item: (item[1].get(field) is None, item[1].get(field)), reverse=direction == 'DESCENDING')
+        if self._limit is not None:
+            matches = matches[:self._limit]
+        for doc_id, data in matches:
+            if self._fields is not None:
+                data = {field: data[field] for field in self._fields if field in data}
+            yield LocalDocumentSnapshot(LocalDocumentReference(self._db, self.collection_name, doc_id), copy.deepcopy(data))
+
+    def get(self, transaction=None):
+        return list(self.stream(transaction))
+
+
+class LocalCollection(LocalQuery):
+    def __init__(self, db, name):
+        super().__init__(db, name)
+
+    def document(self, doc_id=None):
+        return LocalDocumentReference(self._db, self.collection_name, doc_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        reference = self.document()
+        reference.set(data)
+        return datetime.datetime.now(datetime.timezone.utc), reference
+
+
+class LocalDocumentReference:
+    def __init__(self, db, collection_name, doc_id):
+        self._db = db
+        self.collection_name = collection_name
+        self.id = doc_id
+
+    def get(self, transaction=None):
+        with self._db._lock:
+            data = self._db._documents(self.collection_name).get(self.id)
+        return LocalDocumentSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data, merge=False):
+        self._db._apply([('update' if merge else 'set', self, data)])
+
+    def update(self, data):
+        self._db._apply([('update', self, data)])
+
+    def delete(self):
+        self._db._apply([('delete', self, None)])
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class LocalWriteBatch:
+    """Collects writes and applies them together on commit(); used for both batches and transactions."""
+
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(('update' if merge else 'set', reference, data))
+
+    def update(self, reference, data):
+        self._writes.append(('update', reference, data))
+
+    def delete(self, reference):
+        self._writes.append(('delete', reference, None))
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        self._db._apply(writes)
+        return writes
+
+
+class LocalBucket:
+    """Cloud Storage bucket stand-in that keeps objects as files under `root_dir`."""
+
+    def __init__(self, root_dir, base_url=None):
+        self.root_dir = root_dir
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.name = os.path.basename(os.path.normpath(root_dir))
+
+    def blob(self, name):
+        return LocalBlob(self, name)
+
+    def list_blobs(self, prefix=None, max_results=None, page_token=None, page_size=None):
+        """Returns an iterator over the blobs in name order that, like the GCS one, also exposes `.pages`."""
+        root = Path(self.root_dir)
+        names = sorted(
+            path.relative_to(root).as_posix()
+            for path in root.rglob('*') if path.is_file()
+        ) if root.exists() else []
+        names = [name for name in names if not prefix or name.startswith(prefix)]
+        if page_token:
+            names = [name for name in names if name > page_token]
+        if max_results is not None:
+            names = names[:max_results]
+        return LocalBlobIterator([LocalBlob(self, name) for name in names], page_size)
+
+    def delete_blobs(self, blobs, on_error=None):
+        for blob in blobs:
+            try:
+                blob.delete()
+            except FileNotFoundError:
+                if on_error:
+                    on_error(blob)
+
+
+class LocalBlobIterator:
+    def __init__(self, blobs, page_size=None):
+        self._blobs = blobs
+        self._page_size = page_size or len(blobs) or 1
+
+    def __iter__(self):
+        return iter(self._blobs)
+
+    @property
+    def pages(self):
+        for start in range(0, len(self._blobs), self._page_size):
+            yield self._blobs[start:start + self._page_size]
+
+
+class LocalBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = None
+        self.cache_control = None
+        self.content_type = None
+        self.metadata = None
+
+    @property
+    def _path(self):
+        return os.path.join(self.bucket.root_dir, *self.name.split('/'))
+
+    @property
+    def public_url(self):
+        if self.bucket.base_url:
+            return f"{self.bucket.base_url}/{self.name}"
+        return Path(os.path.abspath(self._path)).as_uri()
+
+    @property
+    def size(self):
+        return os.path.getsize(self._path) if os.path.exists(self._path) else None
+
+    @property
+    def updated(self):
+        if not os.path.exists(self._path):
+            return None
+        return datetime.datetime.fromtimestamp(os.path.getmtime(self._path), datetime.timezone.utc)
+
+    def exists(self):
+        return os.path.exists(self._path)
+
+    def upload_from_filename(self, filename, content_type=None, predefined_acl=None):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        shutil.copyfile(filename, self._path)
+        self.content_type = content_type
+
+    def upload_from_string(self, data, content_type=None, predefined_acl=None):
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        with open(self._path, 'wb') as f:
+            f.write(data)
+        self.content_type = content_type
+
+    def download_as_bytes(self):
+        with open(self._path, 'rb') as f:
+            return f.read()
+
+    def make_public(self):
+        pass
+
+    def patch(self):
+        # Like a metadata patch in GCS, this bumps the object's `updated` time
+        os.utime(self._path)
+
+    def delete(self):
+        os.remove(self._path)
+
+
+# Placeholder written for firestore.SERVER_TIMESTAMP; replaced with the commit time
+SERVER_TIMESTAMP = object()
+
+def _resolve_timestamps(data):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return {key: now if value is SERVER_TIMESTAMP else value for key, value in data.items()}
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in the local backend.")
+
+def _decode_value(value):
+    if set(value) == {'__datetime__'}:
+        return datetime.datetime.fromisoformat(value['__datetime__'])
+    return value
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import logging
+import datetime
+import threading
+from contextlib import contextmanager
+
+# =========================================================================================
+# RUN METRICS
+# =========================================================================================
+
+class RunMetrics:
+    """
+    Thread-safe timing spans and counters for one pipeline run.
+    Spans and counters carry optional market/lang labels, so per-job and per-run totals can
+    both be derived. Exported as a JSON run report and as a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Starts a new run; used by the daemon between polling cycles."""
+        with self._lock:
+            self.started_at = time.time()
+            self._spans = []
+            self._counters = {}
+
+    @contextmanager
+    def span(self, stage, market=None, lang=None):
+        """Times the enclosed block as one `stage` span. A block that raises is recorded with status 'error'."""
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            yield
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            self.record_span(stage, time.perf_counter() - started, market, lang, status)
+
+    def record_span(self, stage, seconds, market=None, lang=None, status='ok'):
+        with self._lock:
+            self._spans.append({
+                'stage': stage, 'market': market, 'lang': lang,
+                'seconds': seconds, 'status': status, 'ended': time.time() - self.started_at
+            })
+
+    def count(self, name, value=1, market=None, lang=None):
+        """Adds `value` to the counter `name` for the given labels."""
+        with self._lock:
+            key = (name, market, lang)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def stage_totals(self):
+        """Returns {stage: {count, errors, seconds, p50, p95, max}} over all spans of the run."""
+        with self._lock:
+            spans = list(self._spans)
+        totals = {}
+        for stage in dict.fromkeys(span['stage'] for span in spans):
+            durations = sorted(span['seconds'] for span in spans if span['stage'] == stage)
+            totals[stage] = {
+                'count': len(durations),
+                'errors': sum(1 for span in spans if span['stage'] == stage and span['status'] != 'ok'),
+                'seconds': sum(durations),
+                'p50': _percentile(durations, 50),
+                'p95': _percentile(durations, 95),
+                'max': durations[-1]
+            }
+        return totals
+
+    def counter_totals(self):
+        """Returns {counter: value} summed over all labels."""
+        with self._lock:
+            counters = dict(self._counters)
+        totals = {}
+        for (name, _, _), value in counters.items():
+            totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def report(self, jobs=None):
+        """Builds the JSON-serialisable run report. `jobs` are the per-job results of automate_catalog.run_jobs."""
+        with self._lock:
+            spans = [dict(span) for span in self._spans]
+            counters = [
+                {'name': name, 'market': market, 'lang': lang, 'value': value}
+                for (name, market, lang), value in sorted(self._counters.items(), key=lambda item: tuple(map(str, item[0])))
+            ]
+        return {
+            'started_at': datetime.datetime.fromtimestamp(self.started_at, datetime.timezone.utc).isoformat(),
+            'duration_seconds': time.time() - self.started_at,
+            'stages': self.stage_totals(),
+            'totals': self.counter_totals(),
+            'counters': counters,
+            'jobs': jobs or [],
+            'spans': spans
+        }
+
+    def write_json(self, path, jobs=None):
+        """Writes the run report to `path`. Failures are logged, not fatal."""
+        try:
+            _write_atomically(path, json.dumps(self.report(jobs), indent=2, default=str))
+            logging.info(f"Run report written to {path}.")
+        except OSError as e:
+            logging.warning(f"Could not write run report {path}. Error: {e}")
+
+    def write_prometheus(self, path, jobs=None):
+        """
+        Writes the run in Prometheus text exposition format for node_exporter's textfile collector.
+        The file is replaced atomically so the collector never reads a partial file.
+        """
+        with self._lock:
+            spans = list(self._spans)
+            counters = dict(self._counters)
+        lines = [
+            '# HELP catalog_run_timestamp_seconds Start time of the last pipeline run.',
+            '# TYPE catalog_run_timestamp_seconds gauge',
+            f"catalog_run_timestamp_seconds {self.started_at:.0f}",
+            '# HELP catalog_run_duration_seconds Wall time of the last pipeline run.',
+            '# TYPE catalog_run_duration_seconds gauge',
+            f"catalog_run_duration_seconds {time.time() - self.started_at:.3f}",
+            '# HELP catalog_stage_duration_seconds Time spent per stage, market and language in the last run.',
+            '# TYPE catalog_stage_duration_seconds summary'
+        ]
+        stage_series = {}
+        for span in spans:
+            series = stage_series.setdefault((span['stage'], span['market'], span['lang']), [0.0, 0, 0])
+            series[0] += span['seconds']
+            series[1] += 1
+            series[2] += span['status'] != 'ok'
+        for (stage, market, lang), (seconds, count, _) in sorted(stage_series.items(), key=lambda item: tuple(map(str, item[0]))):
+            labels = _labels(stage=stage, market=market, lang=lang)
+            lines.append(f"catalog_stage_duration_seconds_sum{labels} {seconds:.3f}")
+            lines.append(f"catalog_stage_duration_seconds_count{labels} {count}")
+        lines += [
+            '# HELP catalog_stage_errors Spans per stage that ended with an exception in the last run.',
+            '# TYPE catalog_stage_errors gauge'
+        ]
+        for (stage, market, lang), (_, _, errors) in sorted(stage_series.items(), key=lambda item: tuple(map(str, item[0]))):
+            lines.append(f"catalog_stage_errors{_labels(stage=stage, market=market, lang=lang)} {errors}")
+        for name in sorted({name for name, _, _ in counters}):
+            lines += [f"# TYPE catalog_{name} gauge"]
+            for (counter, market, lang), value in sorted(counters.items(), key=lambda item: tuple(map(str, item[0]))):
+                if counter == name:
+                    lines.append(f"catalog_{name}{_labels(market=market, lang=lang)} {value}")
+        if jobs:
+            lines += [
+                '# HELP catalog_job_status Outcome of each job in the last run (1 for the reported status).',
+                '# TYPE catalog_job_status gauge'
+            ]
+            for job in jobs:
+                lines.append(f"catalog_job_status{_labels(market=job['market'], lang=job['language'], status=job['status'])} 1")
+        try:
+            _write_atomically(path, '\n'.join(lines) + '\n')
+            logging.info(f"Prometheus metrics written to {path}.")
+        except OSError as e:
+            logging.warning(f"Could not write Prometheus metrics {path}. Error: {e}")
+
+
+def _labels(**labels):
+    present = [f'{key}="{value}"' for key, value in labels.items() if value is not None]
+    return '{' + ','.join(present) + '}' if present else ''
+
+def _percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def _write_atomically(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
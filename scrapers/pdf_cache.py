@@ -0,0 +1,128 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import threading
+import time
+
+# =========================================================================================
+# CONTENT-ADDRESSED PDF CACHE
+# =========================================================================================
+
+class PdfCache:
+    """
+    Persistent on-disk PDF cache keyed by URL.
+    Bodies are stored once per SHA-256 as `{sha256}.pdf`; `index.json` maps every URL to its
+    ETag/Last-Modified validators, body hash and last use. The least recently used bodies are
+    evicted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        self._index = None
+
+    def conditional_headers(self, url):
+        """Returns If-None-Match/If-Modified-Since headers for a cached URL, or {}."""
+        entry = self._entry(url)
+        if not entry:
+            return {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def hit(self, url):
+        """Marks a cached URL as used and returns (path, sha256), or (None, None) if it is not cached."""
+        with self._lock:
+            entry = self._load().get(url)
+            if not entry or not os.path.exists(self._blob_path(entry['sha256'])):
+                return None, None
+            entry['last_used'] = time.time()
+            self._save()
+            return self._blob_path(entry['sha256']), entry['sha256']
+
+    def store(self, url, downloaded_path, response_headers):
+        """
+        Moves a freshly downloaded file into the cache and records its validators.
+        Returns (path, sha256) of the cached body.
+        """
+        sha256 = file_sha256(downloaded_path)
+        blob_path = self._blob_path(sha256)
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if os.path.exists(blob_path):
+                os.remove(downloaded_path)
+            else:
+                shutil.move(downloaded_path, blob_path)
+            self._load()[url] = {
+                'sha256': sha256,
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified'),
+                'size': os.path.getsize(blob_path),
+                'last_used': time.time()
+            }
+            self._evict(keep=sha256)
+            self._save()
+        return blob_path, sha256
+
+    def _entry(self, url):
+        with self._lock:
+            entry = self._load().get(url)
+            if entry and os.path.exists(self._blob_path(entry['sha256'])):
+                return dict(entry)
+            return None
+
+    def _evict(self, keep):
+        """Drops least recently used bodies (and every URL pointing at them) until under max_bytes."""
+        index = self._load()
+        blobs = {}
+        for entry in index.values():
+            blob = blobs.setdefault(entry['sha256'], {'size': entry['size'], 'last_used': 0})
+            blob['last_used'] = max(blob['last_used'], entry['last_used'])
+        total = sum(blob['size'] for blob in blobs.values())
+        for sha256, blob in sorted(blobs.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                os.remove(self._blob_path(sha256))
+            except FileNotFoundError:
+                pass
+            for url in [url for url, entry in index.items() if entry['sha256'] == sha256]:
+                del index[url]
+            total -= blob['size']
+            logging.info(f"Evicted cached PDF {sha256[:12]} ({blob['size'] / 1e6:.1f} MB).")
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.cache_dir, f"{sha256}.pdf")
+
+    def _load(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+
+def file_sha256(path):
+    """Returns the hex SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,73 @@
+import os
+import json
+import threading
+import time
+
+# =========================================================================================
+# LOCAL PUBLISH STATE
+# =========================================================================================
+
+class PublishState:
+    """
+    Local snapshot of what was last published per (market, language): sorted validity strings,
+    PDF hashes, document IDs and when Firestore was last consulted. Lets a run decide that a
+    market/language is up to date without any Firestore reads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = None
+
+    def get(self, market_name, language):
+        """Returns a copy of the stored entry for a market/language, or None."""
+        with self._lock:
+            entry = self._load().get(self._key(market_name, language))
+            return dict(entry) if entry else None
+
+    def matches(self, market_name, language, live_validity_strings, recheck_seconds):
+        """
+        True if the last published validity strings equal the live ones and Firestore was
+        consulted less than `recheck_seconds` ago.
+        """
+        entry = self.get(market_name, language)
+        if not entry or entry.get('validity') != sorted(live_validity_strings):
+            return False
+        return time.time() - entry.get('checked_at', 0) < recheck_seconds
+
+    def update(self, market_name, language, **fields):
+        """Merges `fields` into the entry of a market/language and marks it as just checked."""
+        with self._lock:
+            state = self._load()
+            entry = state.setdefault(self._key(market_name, language), {})
+            entry.update(fields)
+            if 'validity' in fields:
+                entry['validity'] = sorted(fields['validity'])
+            entry['checked_at'] = time.time()
+            self._save()
+
+    def forget(self, market_name, language):
+        """Drops the entry of a market/language so the next run consults Firestore."""
+        with self._lock:
+            if self._load().pop(self._key(market_name, language), None) is not None:
+                self._save()
+
+    @staticmethod
+    def _key(market_name, language):
+        return f"{market_name}/{language}"
+
+    def _load(self):
+        if self._state is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,99 @@
+import os
+import json
+import logging
+import datetime
+import threading
+
+# =========================================================================================
+# RELEASE-AWARE POLL SCHEDULE
+# =========================================================================================
+
+class ReleaseSchedule:
+    """
+    Plans when the daemon checks a (market, language) again. Brochures come out on a fixed
+    cadence, so the next one is expected `cadence_days` after the newest published start date,
+    released `lead` ahead of that date. The lead is learned per market/language from observed
+    releases and persisted to `path`; until then `default_lead_seconds` is assumed.
+    """
+
+    def __init__(self, path, fast_seconds, overdue_seconds, slow_seconds, window_seconds, default_lead_seconds, cadence_days=7):
+        self.path = path
+        self.fast_seconds = fast_seconds
+        self.overdue_seconds = overdue_seconds
+        self.slow_seconds = slow_seconds
+        self.window_seconds = window_seconds
+        self.default_lead_seconds = default_lead_seconds
+        self.cadence_days = cadence_days
+        self._lock = threading.Lock()
+        self._state = None
+
+    def lead_seconds(self, market_name, language):
+        with self._lock:
+            entry = self._load().get(self._key(market_name, language))
+        return entry['lead_seconds'] if entry else self.default_lead_seconds
+
+    def expected_release(self, market_name, language, start_dates):
+        """Returns the datetime the brochure after the newest of `start_dates` is expected, or None."""
+        if not start_dates:
+            return None
+        next_start = max(start_dates) + datetime.timedelta(days=self.cadence_days)
+        return datetime.datetime.combine(next_start, datetime.time()) - datetime.timedelta(
+            seconds=self.lead_seconds(market_name, language)
+        )
+
+    def next_poll_delay(self, market_name, language, start_dates, now=None):
+        """
+        Seconds until the next check: `fast_seconds` inside the release window, `overdue_seconds` once
+        the window has passed without a new brochure, otherwise until the window opens (at most
+        `slow_seconds`). Without any known start date the release cannot be predicted, so the
+        overdue interval is used.
+        """
+        now = now or datetime.datetime.now()
+        release = self.expected_release(market_name, language, start_dates)
+        if release is None:
+            return self.overdue_seconds
+        window = datetime.timedelta(seconds=self.window_seconds)
+        if now < release - window:
+            return min(self.slow_seconds, (release - window - now).total_seconds())
+        if now <= release + window:
+            return self.fast_seconds
+        return self.overdue_seconds
+
+    def observe_release(self, market_name, language, start_date, seen_at=None, weight=0.5):
+        """Folds a brochure starting on `start_date` that appeared at `seen_at` into the learned lead."""
+        seen_at = seen_at or datetime.datetime.now()
+        observed = (datetime.datetime.combine(start_date, datetime.time()) - seen_at).total_seconds()
+        with self._lock:
+            state = self._load()
+            entry = state.get(self._key(market_name, language))
+            lead = observed if entry is None else (1 - weight) * entry['lead_seconds'] + weight * observed
+            state[self._key(market_name, language)] = {
+                'lead_seconds': lead,
+                'last_release': seen_at.isoformat(timespec='seconds'),
+                'last_start_date': start_date.isoformat()
+            }
+            self._save()
+        logging.info(
+            f"Observed {market_name.upper()} ({language}) release {observed / 3600:.1f}h before its start date; "
+            f"expected lead is now {lead / 3600:.1f}h."
+        )
+
+    @staticmethod
+    def _key(market_name, language):
+        return f"{market_name}/{language}"
+
+    def _load(self):
+        if self._state is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2)
+        os.replace(tmp_path, self.path)
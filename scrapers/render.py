@@ -0,0 +1,223 @@
+import io
+import os
+import math
+import signal
+from PIL import Image
+import fitz  # PyMuPDF
+
+try:
+    # Older Pillow releases only encode AVIF through this plugin
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# =========================================================================================
+# PAGE RENDERING
+# =========================================================================================
+# Kept free of Firebase/Selenium imports: these functions run inside render worker
+# processes, which import this module on their own.
+
+# Pillow save() options per output format
+ENCODER_SETTINGS = {
+    'webp': {'quality': 80, 'method': 4},
+    'avif': {'quality': 60, 'speed': 6},
+    'jpeg': {'quality': 85, 'progressive': True, 'optimize': True},
+    'png': {'optimize': True}
+}
+IMAGE_EXTENSIONS = {'webp': 'webp', 'avif': 'avif', 'jpeg': 'jpg', 'png': 'png'}
+IMAGE_CONTENT_TYPES = {'webp': 'image/webp', 'avif': 'image/avif', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+DZI_NAMESPACE = 'http://schemas.microsoft.com/deepzoom/2008'
+# A pixmap holds 3 bytes per RGB pixel; PIL stores RGB images with 4 bytes per pixel, so the
+# conversion in pixmap_to_image is a copy and a single-pass render peaks at 7 bytes per pixel
+PIXMAP_BYTES_PER_PIXEL = 3
+IMAGE_BYTES_PER_PIXEL = 4
+
+def init_render_worker():
+    """Render pool initializer. Ctrl+C is left to the parent, which shuts the pool down cleanly."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def render_page_range(pdf_path, output_image_dir, dpi, start, stop, image_format='png', measure_baseline=False, ladder=None, tiles=None, budget=None):
+    """
+    Renders pages [start, stop) of a PDF once at `dpi` and encodes every size of `ladder` from it.
+    `ladder` is a list of {'name', 'width', 'quality'} dicts ordered from largest to smallest; the
+    first entry keeps the full render size, the others are downscaled from the previous size.
+    With `tiles` ({'name', 'size', 'overlap', 'quality'}), the full render is also cut into a DZI tile
+    pyramid under `output_image_dir/tiles`, and the variant `tiles['name']` is the page's .dzi file.
+    With `budget`, every page is rendered within its memory limit (see plan_page_render).
+    Returns one ({variant: image_path}, encoded_bytes, baseline_png_bytes) tuple per page, in page order,
+    where the byte counts refer to the first (full-size) variant.
+    """
+    ladder = ladder or [{'name': 'zoom'}]
+    results = []
+    extension = IMAGE_EXTENSIONS[image_format]
+    with fitz.open(pdf_path) as pdf_document:
+        for page_num in range(start, stop):
+            # Drop the previous page first, so two full renders never coexist
+            img = variant_img = None
+            img = render_page_image(pdf_document.load_page(page_num), dpi, budget)
+            variant_paths = {}
+            encoded_bytes = 0
+            if tiles:
+                variant_paths[tiles['name']] = write_files(
+                    os.path.join(output_image_dir, 'tiles'),
+                    render_tile_pyramid(img, f"page_{page_num + 1:02d}", tiles, image_format)
+                )
+            for index, (variant, variant_img) in enumerate(_ladder_images(img, ladder)):
+                suffix = f".{variant['name']}" if index else ''
+                image_path = os.path.join(output_image_dir, f"page_{page_num + 1:02d}{suffix}.{extension}")
+                size = encode_image(variant_img, image_format, image_path, variant.get('quality'))
+                variant_paths[variant['name']] = image_path
+                if not index:
+                    encoded_bytes = size
+                    baseline_bytes = _default_png_size(variant_img) if measure_baseline else 0
+            results.append((variant_paths, encoded_bytes, baseline_bytes))
+    return results
+
+def render_page_to_memory(pdf_path, page_num, dpi, image_format='png', ladder=None, tiles=None, budget=None):
+    """
+    Renders a single page like render_page_range, but returns {variant: encoded bytes} instead of writing files.
+    With `tiles`, the entry `tiles['name']` holds the page's tile pyramid as from render_tile_pyramid.
+    """
+    ladder = ladder or [{'name': 'zoom'}]
+    encoded = {}
+    with fitz.open(pdf_path) as pdf_document:
+        img = render_page_image(pdf_document.load_page(page_num), dpi, budget)
+        if tiles:
+            encoded[tiles['name']] = render_tile_pyramid(img, f"page_{page_num + 1:02d}", tiles, image_format)
+        for variant, variant_img in _ladder_images(img, ladder):
+            buffer = io.BytesIO()
+            encode_image(variant_img, image_format, buffer, variant.get('quality'))
+            encoded[variant['name']] = buffer.getvalue()
+    return encoded
+
+def plan_page_render(page_rect, dpi, budget):
+    """
+    Decides how to render a page of `page_rect` (in points) so that it peaks below
+    budget['memory_bytes']. Returns (dpi, band_height):
+    - pages that fit are rendered in one pixmap at `dpi` (band_height None);
+    - larger pages are rendered in horizontal bands of band_height pixel rows into a preallocated
+      image, which saves the full-page pixmap; each band uses at most budget['band_bytes'];
+    - pages whose image alone would not fit get a lower DPI, sized from their physical area,
+      but never below budget['min_dpi'], so text stays legible on posters and spreads.
+    """
+    if not budget:
+        return dpi, None
+    area_square_inches = (page_rect.width / 72) * (page_rect.height / 72)
+    pixels = area_square_inches * dpi * dpi
+    if pixels * (PIXMAP_BYTES_PER_PIXEL + IMAGE_BYTES_PER_PIXEL) <= budget['memory_bytes']:
+        return dpi, None
+    image_pixels = max(0, budget['memory_bytes'] - budget['band_bytes']) / IMAGE_BYTES_PER_PIXEL
+    if pixels > image_pixels:
+        dpi = max(budget['min_dpi'], math.sqrt(image_pixels / area_square_inches))
+    width = math.ceil(page_rect.width * dpi / 72)
+    band_height = max(1, budget['band_bytes'] // (width * (PIXMAP_BYTES_PER_PIXEL + IMAGE_BYTES_PER_PIXEL)))
+    return dpi, band_height
+
+def render_page_image(page, dpi, budget=None):
+    """Renders a fitz page to a PIL RGB image, in bands and/or at a lower DPI when `budget` requires it."""
+    dpi, band_height = plan_page_render(page.rect, dpi, budget)
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
+    if not band_height:
+        return pixmap_to_image(page.get_pixmap(matrix=mat, alpha=False))
+    bbox = (page.rect * mat).irect
+    img = Image.new('RGB', (bbox.width, bbox.height), 'white')
+    inverse = ~mat
+    for top in range(bbox.y0, bbox.y1, band_height):
+        band = fitz.IRect(bbox.x0, top, bbox.x1, min(bbox.y1, top + band_height))
+        pix = page.get_pixmap(matrix=mat, clip=fitz.Rect(band) * inverse, alpha=False)
+        # The pixmap's origin is its device-space position, so rounding at band edges cannot leave seams
+        img.paste(pixmap_to_image(pix), (pix.x - bbox.x0, pix.y - bbox.y0))
+        pix = None
+    return img
+
+def render_tile_pyramid(img, stem, tiles, image_format):
+    """
+    Cuts a rendered page into a Deep Zoom (DZI) pyramid. The highest level is `img` itself and every
+    level below is half the size of the one above, down to 1x1 pixel; each level is halved from the
+    previous one rather than rendered again. Tiles are `tiles['size']` pixels plus `tiles['overlap']`
+    on every inner edge. Returns [(relative_path, bytes)]: the tiles as
+    `{stem}_files/{level}/{column}_{row}.{ext}`, followed by the `{stem}.dzi` descriptor.
+    """
+    tile_size, overlap = tiles['size'], tiles.get('overlap', 0)
+    extension = IMAGE_EXTENSIONS[image_format]
+    full_width, full_height = img.size
+    max_level = math.ceil(math.log2(max(full_width, full_height, 1)))
+    files = []
+    for level in range(max_level, -1, -1):
+        if level != max_level:
+            img = img.resize(((img.width + 1) // 2, (img.height + 1) // 2), Image.BOX)
+        for column in range(math.ceil(img.width / tile_size)):
+            for row in range(math.ceil(img.height / tile_size)):
+                box = (
+                    max(0, column * tile_size - overlap), max(0, row * tile_size - overlap),
+                    min(img.width, (column + 1) * tile_size + overlap), min(img.height, (row + 1) * tile_size + overlap)
+                )
+                buffer = io.BytesIO()
+                encode_image(img.crop(box), image_format, buffer, tiles.get('quality'))
+                files.append((f"{stem}_files/{level}/{column}_{row}.{extension}", buffer.getvalue()))
+    descriptor = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="{DZI_NAMESPACE}" TileSize="{tile_size}" Overlap="{overlap}" Format="{extension}">'
+        f'<Size Width="{full_width}" Height="{full_height}"/></Image>\n'
+    )
+    files.append((f"{stem}.dzi", descriptor.encode('utf-8')))
+    return files
+
+def write_files(root_dir, files):
+    """Writes [(relative_path, bytes)] under `root_dir` and returns the path of the last file."""
+    for relative_path, data in files:
+        path = os.path.join(root_dir, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return path
+
+def _ladder_images(img, ladder):
+    """Yields (variant, image) for every ladder size, each downscaled from the previous one."""
+    for index, variant in enumerate(ladder):
+        if index:
+            img = downscale(img, variant.get('width'))
+        yield variant, img
+
+def downscale(img, width):
+    """Returns `img` resized to `width` pixels wide (keeping its aspect ratio), or unchanged if it is already narrower."""
+    if not width or img.width <= width:
+        return img
+    height = max(1, round(img.height * width / img.width))
+    return img.resize((width, height), Image.LANCZOS)
+
+def pixmap_to_image(pix):
+    """Wraps a pixmap's sample buffer in a PIL image without first copying it into a bytes object."""
+    samples = pix.samples_mv if hasattr(pix, 'samples_mv') else pix.samples
+    return Image.frombuffer("RGB", (pix.width, pix.height), samples, "raw", "RGB", pix.stride, 1)
+
+def encode_image(img, image_format, output, quality=None):
+    """
+    Encodes a PIL image with the ENCODER_SETTINGS of `image_format` (optionally overriding the quality)
+    to a path or file object. Returns the byte size.
+    """
+    options = dict(ENCODER_SETTINGS[image_format])
+    if quality is not None and 'quality' in options:
+        options['quality'] = quality
+    pil_format = 'JPEG' if image_format == 'jpeg' else image_format.upper()
+    img.save(output, format=pil_format, **options)
+    if isinstance(output, str):
+        return os.path.getsize(output)
+    return output.tell()
+
+def _default_png_size(img):
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.tell()
+
+def split_page_ranges(page_count, parts):
+    """Splits range(page_count) into at most `parts` contiguous, near-equal (start, stop) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for index in range(parts):
+        stop = start + size + (1 if index < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
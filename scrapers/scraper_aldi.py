@@ -1,12 +1,21 @@
 import logging
+import re
 import time 
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 
-# Import the shared WebDriver setup function from utils
-from .utils import setup_driver
+# Import the shared WebDriver pool and HTTP helpers
+from .driver_pool import driver_pool
+from .utils import fetch_page, html_to_text, unescape_json_url, record_scrape_path
+
+# Words that identify a weekly flyer card (as opposed to recipe/info brochures)
+VALIDITY_KEYWORDS = {
+    "de": ["gültig", "woche", "aktionen", "montag", "donnerstag"],
+    "fr": ["valables", "semaine", "actions", "lundi", "jeudi"],
+    "it": ["valide", "settimana", "azioni", "lunedì", "giovedì"]
+}
 
 def scrape_aldi_ch(market_name, lang_code, market_url):
     """
@@ -14,72 +23,110 @@ def scrape_aldi_ch(market_name, lang_code, market_url):
     Scrapes all available weekly catalogs for Aldi Suisse with a more robust wait strategy.
     """
     logging.info(f"Starting Aldi scraper for language: {lang_code}")
-    driver = setup_driver()
-    found_catalogs = []
+    found_catalogs = _scrape_aldi_http(lang_code, market_url)
+    if found_catalogs:
+        record_scrape_path(market_name, lang_code, 'http')
+        return found_catalogs
+
+    logging.info("HTTP fast path found no Aldi catalogs. Falling back to Selenium.")
     try:
-        driver.get(market_url)
-        logging.info(f"Navigated to Aldi brochures page: {market_url}")
+        with driver_pool.lease(market_name) as session:
+            found_catalogs = _scrape_aldi_page(session, lang_code, market_url)
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during Aldi scrape for {lang_code}: {e}")
+        return []
+    if found_catalogs:
+        record_scrape_path(market_name, lang_code, 'selenium')
+    return found_catalogs
+
+def _scrape_aldi_http(lang_code, market_url):
+    """
+    Reads the flyer cards straight from the server-rendered HTML.
+    Returns the same [(pdf_url, validity_text)] list as the Selenium path, or [] if nothing was found.
+    """
+    page_html = fetch_page(market_url)
+    if not page_html:
+        return []
+
+    validity_keywords = VALIDITY_KEYWORDS.get(lang_code, [])
+    found_catalogs = []
+    for article_html in re.findall(r'<article\b[^>]*class="[^"]*\bwrapper\b[^"]*"[^>]*>(.*?)</article>', page_html, flags=re.S | re.I):
+        content_match = re.search(r'class="[^"]*\bcard_leaflet__content\b[^"]*"[^>]*>(.*)', article_html, flags=re.S | re.I)
+        link_match = re.search(r'href="([^"]*s7g10[^"]*)"', article_html, flags=re.I)
+        if not content_match or not link_match:
+            continue
+        content_html = content_match.group(1)
+        if not any(keyword in html_to_text(content_html).lower() for keyword in validity_keywords):
+            continue
+        paragraph_match = re.search(r'<p\b[^>]*>(.*?)</p>', content_html, flags=re.S | re.I)
+        if not paragraph_match:
+            continue
+        validity_text = html_to_text(paragraph_match.group(1))
+        found_catalogs.append((unescape_json_url(link_match.group(1)), validity_text))
+        logging.info(f"Found valid Aldi catalog over HTTP. Validity: '{validity_text}'")
+
+    logging.info(f"HTTP fast path found {len(found_catalogs)} valid catalogs for Aldi.")
+    return found_catalogs
+
+def _scrape_aldi_page(session, lang_code, market_url):
+    """Runs the Selenium steps of the Aldi scrape on a leased WebDriver session."""
+    driver = session.driver
+    found_catalogs = []
+    driver.get(market_url)
+    logging.info(f"Navigated to Aldi brochures page: {market_url}")
 
-        # Handle Cookies and Pop-ups
+    # Handle Cookies and Pop-ups (the consent cookie is kept for the lifetime of the pooled session)
+    if session.consent_accepted:
+        logging.info("Aldi cookie preferences already accepted in this browser session.")
+    else:
         try:
             WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler"))).click()
             logging.info("Accepted Aldi main cookie preferences.")
+            session.consent_accepted = True
         except:
             logging.info("Aldi main cookie banner not found or already handled.")
-        try:
-            WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button.close-modal"))).click()
-            logging.info("Closed promotion pop-up.")
-        except:
-            logging.info("Promotion pop-up not found or already handled.")
-
-        # --- NEW, MORE STABLE WAIT STRATEGY ---
-        try:
-            # 1. Wait specifically for the INNER CONTENT (the validity text) to be present.
-            # This is much more reliable than waiting for just the outer container.
-            logging.info("Waiting for catalog content to fully load...")
-            wait = WebDriverWait(driver, 20)
-            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.wrapper .card_leaflet__content p")))
-            
-            # 2. Add a small, static pause as a final safety net for any slow JS rendering.
-            time.sleep(2)
-            logging.info("Catalog content loaded.")
+    try:
+        WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button.close-modal"))).click()
+        logging.info("Closed promotion pop-up.")
+    except:
+        logging.info("Promotion pop-up not found or already handled.")
 
-        except TimeoutException:
-            logging.error("Timeout: The main catalog content did not load in time. The page might be empty or changed.")
-            # Close the driver and return an empty list to prevent further errors
-            driver.quit()
-            return []
+    # --- NEW, MORE STABLE WAIT STRATEGY ---
+    try:
+        # 1. Wait specifically for the INNER CONTENT (the validity text) to be present.
+        # This is much more reliable than waiting for just the outer container.
+        logging.info("Waiting for catalog content to fully load...")
+        wait = WebDriverWait(driver, 20)
+        wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article.wrapper .card_leaflet__content p")))
         
-        # Now that we're sure the content is loaded, we can safely find all elements.
-        all_catalog_elements = driver.find_elements(By.CSS_SELECTOR, "article.wrapper")
-        logging.info(f"Found {len(all_catalog_elements)} potential Aldi flyers.")
+        # 2. Add a small, static pause as a final safety net for any slow JS rendering.
+        time.sleep(2)
+        logging.info("Catalog content loaded.")
 
-        keyword_map = {
-            "de": ["gültig", "woche", "aktionen", "montag", "donnerstag"],
-            "fr": ["valables", "semaine", "actions", "lundi", "jeudi"],
-            "it": ["valide", "settimana", "azioni", "lunedì", "giovedì"]
-        }
-        validity_keywords = keyword_map.get(lang_code, [])
+    except TimeoutException:
+        logging.error("Timeout: The main catalog content did not load in time. The page might be empty or changed.")
+        # Return an empty list to prevent further errors; the session goes back to the pool
+        return []
+    
+    # Now that we're sure the content is loaded, we can safely find all elements.
+    all_catalog_elements = driver.find_elements(By.CSS_SELECTOR, "article.wrapper")
+    logging.info(f"Found {len(all_catalog_elements)} potential Aldi flyers.")
 
-        for element in all_catalog_elements:
-            try:
-                content_element = element.find_element(By.CSS_SELECTOR, ".card_leaflet__content")
-                content_text = content_element.text.lower()
+    validity_keywords = VALIDITY_KEYWORDS.get(lang_code, [])
+
+    for element in all_catalog_elements:
+        try:
+            content_element = element.find_element(By.CSS_SELECTOR, ".card_leaflet__content")
+            content_text = content_element.text.lower()
+            
+            if any(keyword in content_text for keyword in validity_keywords):
+                validity_text_element = content_element.find_element(By.CSS_SELECTOR, "p")
+                pdf_url = element.find_element(By.CSS_SELECTOR, "a[href*='s7g10']").get_attribute("href")
                 
-                if any(keyword in content_text for keyword in validity_keywords):
-                    validity_text_element = content_element.find_element(By.CSS_SELECTOR, "p")
-                    pdf_url = element.find_element(By.CSS_SELECTOR, "a[href*='s7g10']").get_attribute("href")
-                    
-                    found_catalogs.append((pdf_url, validity_text_element.text))
-                    logging.info(f"Found valid Aldi catalog. Validity: '{validity_text_element.text}'")
-            except NoSuchElementException:
-                continue
+                found_catalogs.append((pdf_url, validity_text_element.text))
+                logging.info(f"Found valid Aldi catalog. Validity: '{validity_text_element.text}'")
+        except NoSuchElementException:
+            continue
 
-        logging.info(f"Scraping finished. Found a total of {len(found_catalogs)} valid catalogs for Aldi.")
-        return found_catalogs
-    except Exception as e:
-        logging.error(f"An unexpected error occurred during Aldi scrape for {lang_code}: {e}")
-        return []
-    finally:
-        if driver:
-            driver.quit()
\ No newline at end of file
+    logging.info(f"Scraping finished. Found a total of {len(found_catalogs)} valid catalogs for Aldi.")
+    return found_catalogs
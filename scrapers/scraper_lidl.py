@@ -1,12 +1,23 @@
 import logging
 import re
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import ElementClickInterceptedException
 
-# Import the shared WebDriver setup function from utils
-from .utils import setup_driver
+# Import the shared WebDriver pool and HTTP helpers
+from .driver_pool import driver_pool
+from .utils import fetch_page, html_to_text, unescape_json_url, record_scrape_path
+
+VALIDITY_PATTERN = r'(\d{1,2}\.\d{1,2}\.?\s*[–-]\s*\d{1,2}\.\d{1,2}\.?)'
+# Absolute .pdf URL, possibly escaped inside embedded JSON
+PDF_URL_PATTERN = r'https?:(?:\\?/){2}[^"\'\s<>]+?\.pdf(?:\?[^"\'\s<>]*)?'
+# Where the flyer preview page names its own PDF: the download button in the menu (the link the
+# Selenium path clicks) or the flyer's 'pdfUrl' in the embedded JSON. Other .pdf links on the page
+# (terms, recall notices, other flyers) are ignored.
+PDF_LINK_PATTERN = r'<a\b(?=[^>]*(?:\sdownload[\s=>]|class="[^"]*\bbutton--primary\b))[^>]*\bhref="(' + PDF_URL_PATTERN + r')"'
+PDF_JSON_PATTERN = r'\\?"pdfUrl\\?"\s*:\s*\\?"(' + PDF_URL_PATTERN + r')'
 
 def scrape_lidl_ch(market_name, lang_code, market_url):
     """
@@ -15,70 +26,125 @@ def scrape_lidl_ch(market_name, lang_code, market_url):
     Returns a list containing a single tuple: [(pdf_url, validity_string)]
     """
     logging.info(f"Starting Lidl scraper for language: {lang_code}")
-    driver = setup_driver()
+    found_catalogs = _scrape_lidl_http(market_url)
+    if found_catalogs:
+        record_scrape_path(market_name, lang_code, 'http')
+        return found_catalogs
+
+    logging.info("HTTP fast path found no Lidl catalog. Falling back to Selenium.")
     try:
-        logging.info(f"Navigating to {market_name.upper()} at {market_url}...")
-        driver.get(market_url)
+        with driver_pool.lease(market_name) as session:
+            found_catalogs = _scrape_lidl_page(session, market_name, market_url)
+    except Exception as e:
+        logging.exception(f"An unexpected error occurred during the Selenium process for Lidl: {e}")
+        return []
+    if found_catalogs:
+        record_scrape_path(market_name, lang_code, 'selenium')
+    return found_catalogs
 
-        # --- Handle Cookie Consent ---
+def _scrape_lidl_http(market_url):
+    """
+    Reads the first a.flyer from the server-rendered HTML, then looks for the PDF link
+    in the flyer preview page's HTML or embedded JSON. Returns [] if either step finds nothing.
+    """
+    page_html = fetch_page(market_url)
+    if not page_html:
+        return []
+
+    flyer_match = re.search(r'<a\b([^>]*class="[^"]*\bflyer\b[^"]*"[^>]*)>(.*?)</a>', page_html, flags=re.S | re.I)
+    if not flyer_match:
+        return []
+    href_match = re.search(r'href="([^"]+)"', flyer_match.group(1), flags=re.I)
+    if not href_match:
+        return []
+    flyer_preview_url = urljoin(market_url, unescape_json_url(href_match.group(1)))
+
+    date_match = re.search(VALIDITY_PATTERN, html_to_text(flyer_match.group(2)))
+    if not date_match:
+        logging.info("HTTP fast path: flyer found but no date pattern in its text.")
+        return []
+    validity_text = date_match.group(0).replace("–", "-").strip()
+
+    preview_html = fetch_page(flyer_preview_url)
+    if not preview_html:
+        return []
+    pdf_url = find_flyer_pdf_url(preview_html)
+    if not pdf_url:
+        logging.info("HTTP fast path: no flyer download link in the preview page.")
+        return []
+    logging.info(f"Found Lidl catalog over HTTP. Validity: '{validity_text}', PDF: {pdf_url}")
+    return [(pdf_url, validity_text)]
+
+def find_flyer_pdf_url(preview_html):
+    """Returns the flyer's PDF URL from its download link or embedded JSON in a preview page, or None."""
+    for pattern in (PDF_LINK_PATTERN, PDF_JSON_PATTERN):
+        pdf_match = re.search(pattern, preview_html, flags=re.I)
+        if pdf_match:
+            return unescape_json_url(pdf_match.group(1).rstrip('\\'))
+    return None
+
+def _scrape_lidl_page(session, market_name, market_url):
+    """Runs the Selenium steps of the Lidl scrape on a leased WebDriver session."""
+    driver = session.driver
+    logging.info(f"Navigating to {market_name.upper()} at {market_url}...")
+    driver.get(market_url)
+
+    # --- Handle Cookie Consent (kept for the lifetime of the pooled session) ---
+    if session.consent_accepted:
+        logging.info("Lidl cookie preferences already accepted in this browser session.")
+    else:
         try:
             accept_button = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, "#onetrust-accept-btn-handler")))
             accept_button.click()
             logging.info("Accepted Lidl cookie preferences.")
+            session.consent_accepted = True
             WebDriverWait(driver, 5).until(EC.invisibility_of_element_located((By.CSS_SELECTOR, "#onetrust-accept-btn-handler")))
         except:
             logging.info("Lidl cookie banner not found or timed out.")
 
-        # 1. Find the flyer and extract info
-        logging.info("Waiting for main page flyers to load...")
-        latest_flyer_element = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.flyer')))
-        
-        # --- Scrape Validity Date ---
-        validity_text = "Valid this week"
-        try:
-            flyer_full_text = latest_flyer_element.text
-            match = re.search(r'(\d{1,2}\.\d{1,2}\.?\s*[–-]\s*\d{1,2}\.\d{1,2}\.?)', flyer_full_text)
-            if match:
-                validity_text = match.group(0).replace("–", "-").strip()
-                logging.info(f"Successfully scraped validity date: '{validity_text}'")
-            else:
-                logging.warning("Could not find a date pattern in the flyer text.")
-        except:
-            logging.warning("An error occurred during date scraping.")
+    # 1. Find the flyer and extract info
+    logging.info("Waiting for main page flyers to load...")
+    latest_flyer_element = WebDriverWait(driver, 20).until(EC.element_to_be_clickable((By.CSS_SELECTOR, 'a.flyer')))
+    
+    # --- Scrape Validity Date ---
+    validity_text = "Valid this week"
+    try:
+        flyer_full_text = latest_flyer_element.text
+        match = re.search(VALIDITY_PATTERN, flyer_full_text)
+        if match:
+            validity_text = match.group(0).replace("–", "-").strip()
+            logging.info(f"Successfully scraped validity date: '{validity_text}'")
+        else:
+            logging.warning("Could not find a date pattern in the flyer text.")
+    except:
+        logging.warning("An error occurred during date scraping.")
 
-        flyer_preview_url = latest_flyer_element.get_attribute('href')
-        logging.info(f"Found latest flyer preview URL: {flyer_preview_url}")
+    flyer_preview_url = latest_flyer_element.get_attribute('href')
+    logging.info(f"Found latest flyer preview URL: {flyer_preview_url}")
 
-        try:
-            latest_flyer_element.click()
-        except ElementClickInterceptedException:
-            logging.warning("Click on flyer element was intercepted. Trying JavaScript click...")
-            driver.execute_script("arguments[0].click();", latest_flyer_element)
+    try:
+        latest_flyer_element.click()
+    except ElementClickInterceptedException:
+        logging.warning("Click on flyer element was intercepted. Trying JavaScript click...")
+        driver.execute_script("arguments[0].click();", latest_flyer_element)
 
-        # 2. Wait for preview page to load menu button
-        logging.info("Waiting for preview page and menu button to appear...")
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'span.button__icon svg.icon-bars-horizontal, a[href*=".pdf"]')))
+    # 2. Wait for preview page to load menu button
+    logging.info("Waiting for preview page and menu button to appear...")
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, 'span.button__icon svg.icon-bars-horizontal, a[href*=".pdf"]')))
 
-        # 3. Click menu and find download link
-        try:
-            menu_button_icon = driver.find_element(By.CSS_SELECTOR, 'span.button__icon svg.icon-bars-horizontal')
-            menu_button = menu_button_icon.find_element(By.XPATH, './ancestor::button')
-            WebDriverWait(driver, 10).until(EC.element_to_be_clickable(menu_button)).click()
-            logging.info("Clicked on menu button.")
-            
-            pdf_download_link_xpath = "//a[contains(@class, 'button--primary') and (contains(., 'PDF') or contains(., 'herunterladen') or contains(., 'prospectus') or contains(., 'volantino'))]"
-            pdf_download_link = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, pdf_download_link_xpath)))
-            pdf_url = pdf_download_link.get_attribute('href')
-            logging.info(f"Found PDF download URL in menu: {pdf_url}")
-            # Return in list format to be consistent with other scrapers
-            return [(pdf_url, validity_text)]
-        except Exception as e:
-            logging.error(f"Could not find PDF download link via menu. Error: {e}")
-            return []
+    # 3. Click menu and find download link
+    try:
+        menu_button_icon = driver.find_element(By.CSS_SELECTOR, 'span.button__icon svg.icon-bars-horizontal')
+        menu_button = menu_button_icon.find_element(By.XPATH, './ancestor::button')
+        WebDriverWait(driver, 10).until(EC.element_to_be_clickable(menu_button)).click()
+        logging.info("Clicked on menu button.")
+        
+        pdf_download_link_xpath = "//a[contains(@class, 'button--primary') and (contains(., 'PDF') or contains(., 'herunterladen') or contains(., 'prospectus') or contains(., 'volantino'))]"
+        pdf_download_link = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, pdf_download_link_xpath)))
+        pdf_url = pdf_download_link.get_attribute('href')
+        logging.info(f"Found PDF download URL in menu: {pdf_url}")
+        # Return in list format to be consistent with other scrapers
+        return [(pdf_url, validity_text)]
     except Exception as e:
-        logging.exception(f"An unexpected error occurred during the Selenium process for Lidl: {e}")
+        logging.error(f"Could not find PDF download link via menu. Error: {e}")
         return []
-    finally:
-        if driver:
-            logging.info("Quitting WebDriver.")
-            driver.quit()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import re
+import json
+import bisect
+import unicodedata
+
+# =========================================================================================
+# OFFER SEARCH INDEX
+# =========================================================================================
+# Index layout (JSON, one per catalog):
+#   {'version': 1,
+#    'pages': [{'boxes': [[x0, y0, x1, y1], ...], 'prices': [[text, box], ...]}, ...],
+#    'terms': {term: [page, box, page, box, ...]}}
+# Boxes are fractions of the page size, so they map onto every rendered image size.
+# Pages in postings are 0-based; search results are 1-based like the page files.
+
+INDEX_VERSION = 1
+MIN_TERM_LENGTH = 2
+_WORD_PATTERN = re.compile(r"[^\W_]+(?:['’-][^\W_]+)*")
+_PRICE_PATTERN = re.compile(r"^\d{1,4}(?:[.,]\d{2}|[.,][-–]{1,2}|\.)$")
+_CENTS_PATTERN = re.compile(r"^[.,]?\d{2}$|^[.,]?[-–]{1,2}$")
+
+def normalize_term(word):
+    """Case-folds a word and strips diacritics and umlauts, so 'Käse' and 'kase' index the same."""
+    decomposed = unicodedata.normalize('NFKD', word.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def terms_of(text):
+    """Splits text into normalized terms of at least MIN_TERM_LENGTH characters."""
+    terms = (normalize_term(match.group()) for match in _WORD_PATTERN.finditer(text))
+    return [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+
+def extract_page_words(pdf_path):
+    """
+    Reads the text layer of every page. Returns one list per page of
+    (text, x0, y0, x1, y1, block, line) tuples with coordinates as fractions of the page size.
+    """
+    import fitz  # PyMuPDF
+    pages = []
+    with fitz.open(pdf_path) as pdf_document:
+        for page in pdf_document:
+            width, height = page.rect.width or 1, page.rect.height or 1
+            pages.append([
+                (text, x0 / width, y0 / height, x1 / width, y1 / height, block, line)
+                for x0, y0, x1, y1, text, block, line, _ in page.get_text('words')
+            ])
+    return pages
+
+def build_search_index(page_words):
+    """Builds the index dict from extract_page_words output."""
+    terms = {}
+    pages = []
+    for page_num, words in enumerate(page_words):
+        boxes, prices = [], []
+        for index, (text, x0, y0, x1, y1, block, line) in enumerate(words):
+            box = len(boxes)
+            boxes.append([round(x0, 4), round(y0, 4), round(x1, 4), round(y1, 4)])
+            for term in dict.fromkeys(terms_of(text)):
+                terms.setdefault(term, []).extend((page_num, box))
+            price = _price_at(words, index)
+            if price:
+                prices.append([price, box])
+        pages.append({'boxes': boxes, 'prices': prices})
+    return {'version': INDEX_VERSION, 'pages': pages, 'terms': terms}
+
+def _price_at(words, index):
+    """
+    Returns the price starting at words[index] ('2.95', '3.–'), also when the cents are set as a
+    separate word on the same line, as brochures usually print them smaller. Otherwise None.
+    """
+    text = words[index][0]
+    if _PRICE_PATTERN.match(text) and not text.endswith('.'):
+        return text
+    if text.rstrip('.').isdigit() and len(text.rstrip('.')) <= 4 and index + 1 < len(words):
+        following = words[index + 1]
+        if following[5:7] == words[index][5:7] and _CENTS_PATTERN.match(following[0]):
+            cents = following[0].lstrip('.,')
+            return f"{text.rstrip('.')}.{cents}"
+    return None
+
+
+class SearchIndex:
+    """Query API over one catalog's index. Terms are kept sorted, so prefix lookups are a binary search."""
+
+    def __init__(self, index):
+        self.pages = index['pages']
+        self._postings = index['terms']
+        self._terms = sorted(self._postings)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text))
+
+    def search(self, query, prefix=True, limit=None):
+        """
+        Returns the pages containing every term of `query`, best first, as
+        [{'page': 1-based page, 'hits': [box, ...], 'price': nearest price text or None}].
+        With `prefix`, a term also matches longer words ('kaffee' finds 'Kaffeebohnen').
+        """
+        query_terms = terms_of(query)
+        if not query_terms:
+            return []
+        page_hits = None
+        for term in query_terms:
+            hits = {}
+            for posting in self._matching_postings(term, prefix):
+                for offset in range(0, len(posting), 2):
+                    hits.setdefault(posting[offset], set()).add(posting[offset + 1])
+            page_hits = hits if page_hits is None else {
+                page: page_hits[page] | boxes for page, boxes in hits.items() if page in page_hits
+            }
+            if not page_hits:
+                return []
+        results = []
+        for page_num, box_indexes in page_hits.items():
+            page = self.pages[page_num]
+            boxes = [page['boxes'][box] for box in sorted(box_indexes)]
+            results.append({'page': page_num + 1, 'hits': boxes, 'price': _nearest_price(page, boxes[0])})
+        results.sort(key=lambda result: (-len(result['hits']), result['page']))
+        return results[:limit] if limit else results
+
+    def _matching_postings(self, term, prefix):
+        if not prefix:
+            return [self._postings[term]] if term in self._postings else []
+        position = bisect.bisect_left(self._terms, term)
+        postings = []
+        while position < len(self._terms) and self._terms[position].startswith(term):
+            postings.append(self._postings[self._terms[position]])
+            position += 1
+        return postings
+
+
+def _nearest_price(page, box):
+    """The price on the page closest to `box`, preferring prices below or right of it."""
+    best, best_distance = None, None
+    center_x, center_y = (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+    for text, price_box in page['prices']:
+        price_x, price_y = (page['boxes'][price_box][0] + page['boxes'][price_box][2]) / 2, page['boxes'][price_box][1]
+        distance = abs(price_x - center_x) + abs(price_y - center_y) * (1 if price_y >= center_y else 2)
+        if best_distance is None or distance < best_distance:
+            best, best_distance = text, distance
+    return best
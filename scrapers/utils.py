@@ -1,24 +1,48 @@
 import os
 import shutil
 import logging
-import firebase_admin
-from firebase_admin import credentials, firestore, storage
+import logging.handlers
 import requests
-from PIL import Image
 import fitz  # PyMuPDF
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 import datetime
 import re
+import html
+import threading
+import time
+import json
+import hashlib
+import multiprocessing
+import zoneinfo
+from urllib.parse import unquote, urlsplit
+from requests.adapters import HTTPAdapter
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .pdf_cache import PdfCache, file_sha256
+from .publish_state import PublishState
+from .checkpoint import CheckpointJournal
+from .release_schedule import ReleaseSchedule
+from .metrics import RunMetrics
+from . import local_backend
+from .search_index import SearchIndex, build_search_index, extract_page_words
+from .validity import parse_validity, validity_range
+from .render import init_render_worker, render_page_range, render_page_to_memory, plan_page_render, split_page_ranges, write_files, IMAGE_CONTENT_TYPES, IMAGE_EXTENSIONS
 
 # =========================================================================================
 # GLOBAL CONFIGURATION
 # =========================================================================================
 
 # --- Firebase Configuration ---
-SERVICE_ACCOUNT_KEY_PATH = 'C:\\Users\\TAACAMU4\\Work\\Projects\\PORTFOLIO\\catalog_app\\serviceAccountKey.json'
+SERVICE_ACCOUNT_KEY_PATH = os.environ.get(
+    'CATALOG_SERVICE_ACCOUNT_KEY',
+    'C:\\Users\\TAACAMU4\\Work\\Projects\\PORTFOLIO\\catalog_app\\serviceAccountKey.json'
+)
 FIREBASE_STORAGE_BUCKET = 'catalogapp-7b5bc.firebasestorage.app'
+# 'firebase' or 'local'. The firebase backend talks to the emulator instead when
+# FIRESTORE_EMULATOR_HOST / STORAGE_EMULATOR_HOST are set. The local backend keeps
+# documents in LOCAL_BACKEND_DIR/firestore.json and objects under LOCAL_BACKEND_DIR/bucket.
+BACKEND = os.environ.get('CATALOG_BACKEND', 'firebase')
 
 # --- Selenium WebDriver Path ---
 CHROME_DRIVER_PATH = 'C:\\Users\\TAACAMU4\\Work\\Projects\\PORTFOLIO\\catalog_app\\chromedriver.exe'
@@ -28,21 +52,173 @@ CHROME_DRIVER_PATH = 'C:\\Users\\TAACAMU4\\Work\\Projects\\PORTFOLIO\\catalog_ap
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 PDF_DOWNLOAD_DIR = os.path.join(PROJECT_ROOT, 'temp_pdfs')
 LOCAL_IMAGE_DIR = os.path.join(PROJECT_ROOT, 'temp_images')
+# Persistent across runs (unlike the temp directories above, which main() wipes)
+PDF_CACHE_DIR = os.path.join(PROJECT_ROOT, 'pdf_cache')
+PDF_CACHE_MAX_BYTES = int(os.environ.get('CATALOG_PDF_CACHE_MB', '500')) * 1024 * 1024
+# Last published validity/PDF hashes/doc IDs per market and language
+PUBLISH_STATE_PATH = os.path.join(PROJECT_ROOT, 'state', 'publish_state.json')
+# While the live scrape matches the local state, Firestore is only re-read this often
+STATE_RECHECK_SECONDS = int(os.environ.get('CATALOG_STATE_RECHECK_HOURS', '6')) * 3600
+LOCAL_BACKEND_DIR = os.environ.get('CATALOG_LOCAL_BACKEND_DIR', os.path.join(PROJECT_ROOT, 'local_backend'))
+# Optional http(s) base URL under which LOCAL_BACKEND_DIR/bucket is served; file:// URLs otherwise
+LOCAL_BACKEND_BASE_URL = os.environ.get('CATALOG_LOCAL_BASE_URL')
+# Work units completed by each job, so an interrupted run resumes where it stopped. Entries expire well
+# before GC_MIN_AGE_SECONDS, so the journal never points at uploads that maintenance gc may have removed
+CHECKPOINT_JOURNAL_PATH = os.path.join(PROJECT_ROOT, 'state', 'checkpoints.jsonl')
+CHECKPOINT_MAX_AGE_SECONDS = int(os.environ.get('CATALOG_CHECKPOINT_MAX_AGE_HOURS', '12')) * 3600
+# Per-run timings and counters: a JSON report, and a Prometheus file for node_exporter's textfile collector
+METRICS_REPORT_PATH = os.environ.get('CATALOG_METRICS_REPORT', os.path.join(PROJECT_ROOT, 'state', 'run_report.json'))
+METRICS_TEXTFILE_PATH = os.environ.get('CATALOG_METRICS_TEXTFILE', os.path.join(PROJECT_ROOT, 'state', 'catalog_pipeline.prom'))
+
+# --- Daemon Mode ---
+# `automate_catalog.py --daemon` checks a market/language every DAEMON_FAST_SECONDS inside its expected
+# release window, every DAEMON_OVERDUE_SECONDS once the window passed without a new brochure, and
+# otherwise sleeps until the window opens (waking at least every DAEMON_SLOW_SECONDS)
+DAEMON_FAST_SECONDS = int(os.environ.get('CATALOG_DAEMON_FAST_MINUTES', '10')) * 60
+DAEMON_OVERDUE_SECONDS = int(os.environ.get('CATALOG_DAEMON_OVERDUE_MINUTES', '60')) * 60
+DAEMON_SLOW_SECONDS = int(os.environ.get('CATALOG_DAEMON_SLOW_HOURS', '6')) * 3600
+# Half-width of the window around the expected release of the next brochure
+RELEASE_WINDOW_SECONDS = 12 * 3600
+# Assumed until a release has been observed: brochures appear this long before their start date
+RELEASE_DEFAULT_LEAD_SECONDS = 3 * 24 * 3600
+# Days between the start dates of consecutive brochures
+RELEASE_CADENCE_DAYS = 7
+RELEASE_SCHEDULE_PATH = os.path.join(PROJECT_ROOT, 'state', 'release_schedule.json')
+# The daemon appends to its log and rotates it at this size, keeping DAEMON_LOG_BACKUPS old files
+DAEMON_LOG_MAX_BYTES = int(os.environ.get('CATALOG_DAEMON_LOG_MB', '10')) * 1024 * 1024
+DAEMON_LOG_BACKUPS = 5
+
+# --- Validity Dates ---
+# Validity texts are parsed into 'validFrom'/'validTo' Timestamps at midnight in this time zone
+VALIDITY_TIMEZONE_NAME = 'Europe/Zurich'
+# A validity text that only names its first day ('Gültig ab ...') is taken to cover this many days
+VALIDITY_DEFAULT_DAYS = 7
+
+# --- Storage Maintenance ---
+# Objects listed per request while scanning the bucket
+LIST_PAGE_SIZE = 1000
+# Orphaned objects younger than this are kept, so pages of a run that has not published yet survive
+GC_MIN_AGE_SECONDS = int(os.environ.get('CATALOG_GC_MIN_AGE_HOURS', '24')) * 3600
+# Deletes are sent as batch requests of GC_DELETE_BATCH_SIZE (GCS allows up to 100), GC_DELETE_WORKERS in parallel
+GC_DELETE_BATCH_SIZE = 100
+GC_DELETE_WORKERS = 8
+
+# --- Concurrency ---
+# Number of (market, language) jobs processed in parallel by automate_catalog.main
+MAX_CONCURRENT_JOBS = int(os.environ.get('CATALOG_MAX_WORKERS', '3'))
+# A pooled Chrome session is quit and replaced after this many scrapes
+DRIVER_MAX_USES = int(os.environ.get('CATALOG_DRIVER_MAX_USES', '10'))
+
+# --- HTTP Scraping ---
+# Browser-like headers for the plain HTTP fast path that runs before Selenium
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Accept-Language': 'de-CH,de;q=0.9,fr-CH;q=0.8,it-CH;q=0.7'
+}
+HTTP_PAGE_TIMEOUT = 15
+
+# --- PDF Downloads ---
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_TIMEOUT = 60
+DOWNLOAD_MAX_ATTEMPTS = 4
+# Wait before retry n is DOWNLOAD_BACKOFF_SECONDS * 2**(n-1)
+DOWNLOAD_BACKOFF_SECONDS = 2
+
+# --- Page Rendering ---
+# Size of the process pool shared by all jobs for rendering PDF pages
+RENDER_WORKERS = int(os.environ.get('CATALOG_RENDER_WORKERS', str(os.cpu_count() or 1)))
+# Documents with fewer pages are rendered serially; the pool start-up isn't worth it
+RENDER_PARALLEL_MIN_PAGES = 8
+# Render workers are spawned on every platform, as on Windows: forking a process whose upload and
+# job threads may hold locks can deadlock the child
+RENDER_START_METHOD = 'spawn'
+# Memory limit for rendering one page (0 disables it). Pages that would exceed it (posters, spreads)
+# are rendered in bands of at most RENDER_BAND_BYTES and, if that is not enough, at a DPI lowered to
+# fit, but not below RENDER_MIN_DPI. Peak render memory is about RENDER_WORKERS times this limit.
+RENDER_MEMORY_LIMIT_BYTES = int(os.environ.get('CATALOG_RENDER_MEMORY_MB', '256')) * 1024 * 1024
+RENDER_BAND_BYTES = 16 * 1024 * 1024
+RENDER_MIN_DPI = 110
+RENDER_BUDGET = {
+    'memory_bytes': RENDER_MEMORY_LIMIT_BYTES, 'band_bytes': RENDER_BAND_BYTES, 'min_dpi': RENDER_MIN_DPI
+} if RENDER_MEMORY_LIMIT_BYTES else None
+
+# --- Image Encoding ---
+# Page image format: 'webp', 'avif', 'jpeg' or 'png' (quality settings live in render.ENCODER_SETTINGS)
+IMAGE_FORMAT = os.environ.get('CATALOG_IMAGE_FORMAT', 'webp')
+# Also encode each page as a default PNG to report the bytes saved by IMAGE_FORMAT. Off in production,
+# where it would add a full PNG encode per page; benchmark_pipeline.py turns it on
+IMAGE_MEASURE_BASELINE = os.environ.get('CATALOG_IMAGE_BASELINE', '0') == '1'
+# Sizes produced for every page, largest first. The first entry is the full render at `dpi`
+# and becomes the brochure's 'pages'; the rest are downscaled to `width` pixels.
+IMAGE_LADDER = [
+    {'name': 'zoom'},
+    {'name': 'screen', 'width': 1080},
+    {'name': 'thumbnail', 'width': 240, 'quality': 60}
+]
+
+# --- Tile Pyramid ---
+# With CATALOG_TILES=1 every page is also cut into a Deep Zoom (DZI) tile pyramid, published as the
+# 'tiles' entry of pageVariants: one .dzi descriptor URL per page, its tiles stored next to it under
+# {page}_files/{level}/{column}_{row}.{ext}, so viewers only fetch the tiles visible at the current zoom
+TILE_VARIANT = 'tiles'
+TILE_PYRAMID = {'name': TILE_VARIANT, 'size': 254, 'overlap': 1} if os.environ.get('CATALOG_TILES', '0') == '1' else None
+TILE_DESCRIPTOR_CONTENT_TYPE = 'application/xml'
+
+# --- Storage Uploads ---
+# Size of the thread pool shared by all jobs for uploading page images
+UPLOAD_WORKERS = int(os.environ.get('CATALOG_UPLOAD_WORKERS', '16'))
+UPLOAD_MAX_ATTEMPTS = 4
+# Wait before retry n is UPLOAD_BACKOFF_SECONDS * 2**(n-1)
+UPLOAD_BACKOFF_SECONDS = 1
+# Files larger than this are sent as chunked resumable uploads of UPLOAD_CHUNK_SIZE
+UPLOAD_RESUMABLE_THRESHOLD = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # must be a multiple of 256 KB
+# Page objects are named after their content hash, so they never change once written
+PAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# --- Search Index ---
+# Parsed search indexes kept in memory by load_search_index; they never change once written
+SEARCH_INDEX_CACHE_SIZE = 32
+
+# --- Pipeline Mode ---
+# 'streaming' renders pages into memory and uploads them while later pages still render;
+# 'staged' renders every page to LOCAL_IMAGE_DIR first and then uploads the files
+PIPELINE_MODE = os.environ.get('CATALOG_PIPELINE_MODE', 'streaming')
+# Pages allowed to wait between two streaming stages; bounds peak memory
+STREAM_QUEUE_DEPTH = int(os.environ.get('CATALOG_STREAM_DEPTH', '8'))
+# Also write the streamed page images to LOCAL_IMAGE_DIR (for debugging)
+STREAM_KEEP_FILES = os.environ.get('CATALOG_STREAM_KEEP_FILES', '0') == '1'
+
+# --- I/O Engine ---
+# 'threads' runs every job on its own thread with blocking I/O; 'asyncio' runs all jobs as coroutines
+# on one event loop with a concurrency limit per I/O stage (see scrapers.async_engine)
+IO_ENGINE = os.environ.get('CATALOG_IO_ENGINE', 'threads')
+ASYNC_DOWNLOAD_CONCURRENCY = int(os.environ.get('CATALOG_ASYNC_DOWNLOADS', '4'))
+ASYNC_UPLOAD_CONCURRENCY = int(os.environ.get('CATALOG_ASYNC_UPLOADS', '32'))
+ASYNC_FIRESTORE_CONCURRENCY = int(os.environ.get('CATALOG_ASYNC_FIRESTORE', '4'))
 
 # =========================================================================================
 # INITIALIZATION FUNCTIONS
 # =========================================================================================
 
-def setup_logging():
-    """Configures logging for the script to provide detailed, professional output."""
+def setup_logging(daemon=False):
+    """
+    Configures logging for the script to provide detailed, professional output.
+    A single run overwrites the log file; the daemon appends to it and rotates it instead.
+    """
     log_formatter = logging.Formatter(
-        '%(asctime)s - [%(levelname)s] - [%(funcName)s:%(lineno)d] - %(message)s'
+        '%(asctime)s - [%(levelname)s] - [%(threadName)s] - [%(funcName)s:%(lineno)d] - %(message)s'
     )
     root_logger = logging.getLogger()
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
     root_logger.setLevel(logging.INFO)
-    file_handler = logging.FileHandler('catalog_automation.log', mode='w', encoding='utf-8')
+    if daemon:
+        file_handler = logging.handlers.RotatingFileHandler(
+            'catalog_automation.log', mode='a', maxBytes=DAEMON_LOG_MAX_BYTES, backupCount=DAEMON_LOG_BACKUPS, encoding='utf-8'
+        )
+    else:
+        file_handler = logging.FileHandler('catalog_automation.log', mode='w', encoding='utf-8')
     file_handler.setFormatter(log_formatter)
     root_logger.addHandler(file_handler)
     console_handler = logging.StreamHandler()
@@ -50,26 +226,112 @@ def setup_logging():
     root_logger.addHandler(console_handler)
 
 def initialize_firebase():
-    """Initializes the Firebase Admin SDK and returns db and bucket clients."""
+    """
+    Initializes the Firebase Admin SDK and returns db and bucket clients.
+    Raises RuntimeError if the SDK cannot be initialized.
+    """
     try:
         logging.info("Initializing Firebase Admin SDK...")
-        cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
+        import firebase_admin
+        from firebase_admin import credentials, firestore, storage
         if not firebase_admin._apps:
-            firebase_admin.initialize_app(cred, {'storageBucket': FIREBASE_STORAGE_BUCKET})
+            if os.environ.get('FIRESTORE_EMULATOR_HOST'):
+                # The emulators accept any project; no service account is needed
+                firebase_admin.initialize_app(options={'storageBucket': FIREBASE_STORAGE_BUCKET, 'projectId': 'demo-catalogapp'})
+            else:
+                cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
+                firebase_admin.initialize_app(cred, {'storageBucket': FIREBASE_STORAGE_BUCKET})
         db = firestore.client()
         bucket = storage.bucket()
         logging.info("Firebase Admin SDK initialized successfully.")
         return db, bucket
     except Exception as e:
         logging.critical(f"Firebase Admin SDK initialization error: {e}")
-        exit()
+        raise RuntimeError(f"Firebase Admin SDK initialization failed: {e}") from e
 
-# Initialize Firebase and get clients
-db, bucket = initialize_firebase()
+def initialize_local_backend():
+    """Returns db and bucket clients of the offline backend stored in LOCAL_BACKEND_DIR."""
+    logging.info(f"Using local storage/database backend in {LOCAL_BACKEND_DIR}")
+    db = local_backend.LocalFirestore(os.path.join(LOCAL_BACKEND_DIR, 'firestore.json'))
+    bucket = local_backend.LocalBucket(os.path.join(LOCAL_BACKEND_DIR, 'bucket'), LOCAL_BACKEND_BASE_URL)
+    return db, bucket
+
+# Clients are created on first use, so importing this module needs no credentials
+_clients = None
+_clients_lock = threading.Lock()
+
+def _get_clients():
+    global _clients
+    with _clients_lock:
+        if _clients is None:
+            _clients = initialize_local_backend() if BACKEND == 'local' else initialize_firebase()
+        return _clients
+
+def get_db():
+    """Returns the document database client of the configured BACKEND."""
+    return _get_clients()[0]
+
+def get_bucket():
+    """Returns the storage bucket client of the configured BACKEND."""
+    return _get_clients()[1]
+
+def server_timestamp():
+    """Sentinel that makes the backend store its own commit time in a field."""
+    if BACKEND == 'local':
+        return local_backend.SERVER_TIMESTAMP
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
+def run_transaction(function):
+    """Runs `function(transaction)` in a backend transaction, retrying on contention where supported."""
+    db = get_db()
+    if BACKEND == 'local':
+        return db.run_transaction(function)
+    from firebase_admin import firestore
+    return firestore.transactional(function)(db.transaction())
+
+def blob_name_from_url(url):
+    """
+    Returns the object name (`catalogs/...`) behind a stored URL, or None.
+    Handles public storage.googleapis.com URLs, Firebase download URLs (`/o/catalogs%2F...`),
+    legacy gs:// paths and the file:// or http URLs of the local backend.
+    """
+    if not url:
+        return None
+    path = unquote(urlsplit(url).path)
+    index = path.rfind('/catalogs/')
+    return path[index + 1:] if index != -1 else None
+
+def iter_blob_pages(prefix, page_size=LIST_PAGE_SIZE):
+    """Yields the objects under `prefix` one listing page (at most `page_size` blobs) at a time."""
+    for page in get_bucket().list_blobs(prefix=prefix, page_size=page_size).pages:
+        yield list(page)
+
+def delete_blob_batch(blob_names):
+    """
+    Deletes up to GC_DELETE_BATCH_SIZE objects in a single batch request. Objects that are already
+    gone are ignored. Returns the number of names that were sent.
+    """
+    bucket = get_bucket()
+    if BACKEND == 'local':
+        bucket.delete_blobs([bucket.blob(name) for name in blob_names], on_error=lambda blob: None)
+        return len(blob_names)
+    from google.api_core.exceptions import NotFound
+    try:
+        with bucket.client.batch():
+            for name in blob_names:
+                bucket.blob(name).delete()
+    except NotFound:
+        # The whole batch is still sent; a 404 only means one of the objects was already deleted
+        pass
+    return len(blob_names)
 
 
 def setup_driver():
     """Configures and returns a Selenium WebDriver instance."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
     options = Options()
     options.add_argument("--headless")
     options.add_argument("--no-sandbox")
@@ -88,6 +350,67 @@ def setup_driver():
     driver = webdriver.Chrome(service=service, options=options)
     return driver
 
+# =========================================================================================
+# SCRAPING HELPERS
+# =========================================================================================
+
+# One keep-alive session per host, shared by page fetches and PDF downloads
+_http_sessions = {}
+_http_sessions_lock = threading.Lock()
+
+# Which scrape path ('http' or 'selenium') produced the result of each (market, language)
+_scrape_paths = {}
+_scrape_paths_lock = threading.Lock()
+
+def get_http_session(url):
+    """Returns the shared keep-alive requests.Session for the host of `url`."""
+    host = urlsplit(url).netloc.lower()
+    with _http_sessions_lock:
+        session = _http_sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HTTP_HEADERS)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(4, MAX_CONCURRENT_JOBS))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_sessions[host] = session
+        return session
+
+def fetch_page(url):
+    """Fetches a page over plain HTTP. Returns the response text, or None on any failure."""
+    try:
+        response = get_http_session(url).get(url, timeout=HTTP_PAGE_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+    except requests.exceptions.RequestException as e:
+        logging.info(f"HTTP fetch of {url} failed: {e}")
+        return None
+
+def html_to_text(fragment):
+    """Strips tags from an HTML fragment and returns its whitespace-normalized text."""
+    text = re.sub(r'<(script|style)\b.*?</\1>', ' ', fragment, flags=re.S | re.I)
+    # Block-level tags become line breaks, inline tags disappear (like a browser's innerText)
+    text = re.sub(r'<(br|/?p|/?div|/?li|/?h\d)\b[^>]*>', '\n', text, flags=re.I)
+    text = html.unescape(re.sub(r'<[^>]+>', '', text))
+    lines = [' '.join(line.split()) for line in text.split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+def unescape_json_url(url):
+    """Undoes the escaping of URLs found inside embedded JSON/JS blobs."""
+    url = url.replace('\\/', '/').replace('\\u002F', '/').replace('\\u0026', '&')
+    return html.unescape(url)
+
+def record_scrape_path(market_name, lang_code, path):
+    """Remembers which scrape path succeeded for a market/language."""
+    with _scrape_paths_lock:
+        _scrape_paths[(market_name, lang_code)] = path
+    logging.info(f"Scrape path for {market_name.upper()} ({lang_code}): {path}")
+
+def get_scrape_path(market_name, lang_code):
+    """Returns the scrape path recorded for a market/language, or None if none succeeded."""
+    with _scrape_paths_lock:
+        return _scrape_paths.get((market_name, lang_code))
+
 # =========================================================================================
 # HELPER FUNCTIONS
 # =========================================================================================
@@ -104,124 +427,739 @@ def cleanup_directory(dir_path):
     return True
 
 def download_pdf(pdf_url, market_name, lang_code, catalog_index):
-    """Downloads a PDF from the given URL."""
-    if not pdf_url: return None
-    filename = f"{market_name}_{lang_code}_catalog_{catalog_index}.pdf"
-    filepath = os.path.join(PDF_DOWNLOAD_DIR, filename)
+    """
+    Streams a PDF from the given URL into the persistent PDF cache and returns (path, sha256).
+    A conditional GET is sent for URLs already in the cache, so unchanged brochures are not
+    transferred again. Interrupted transfers are resumed with an HTTP Range request guarded by
+    If-Range (see _download_headers) and retried with exponential backoff. Returns (None, None) on failure.
+    The cache, resume and retry steps are shared with AsyncIOEngine.download_pdf.
+    """
+    if not pdf_url: return None, None
+    partial_path = _partial_download_path(market_name, lang_code, catalog_index)
     logging.info(f"Downloading PDF from: {pdf_url}")
-    try:
-        response = requests.get(pdf_url, stream=True, timeout=60)
+    started = time.monotonic()
+
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        try:
+            response_headers = _stream_to_file(pdf_url, partial_path, _download_headers(pdf_url, partial_path))
+            return _finish_download(pdf_url, partial_path, response_headers, market_name, lang_code, started)
+        except (requests.exceptions.RequestException, OSError) as e:
+            delay = _download_retry_delay(pdf_url, attempt, e, market_name, lang_code)
+            if delay is None:
+                break
+            time.sleep(delay)
+    return None, None
+
+def _stream_to_file(url, partial_path, headers=None):
+    """
+    Downloads `url` into `partial_path`, continuing from the bytes already on disk when the
+    server honours the Range header. Returns the response headers, or None on 304 Not Modified.
+    """
+    headers, offset = _resume_headers(partial_path, headers)
+    with get_http_session(url).get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 304:
+            return None
+        if response.status_code == 416 and offset:
+            return _complete_partial_headers(partial_path, response.headers)
         response.raise_for_status()
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        logging.info(f"PDF downloaded successfully to: {filepath}")
-        return filepath
-    except requests.exceptions.RequestException as e:
-        logging.exception(f"Error downloading PDF from {pdf_url}. Error: {e}")
+        received = 0
+        with _open_partial_download(url, partial_path, offset, response.status_code, response.headers) as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+                received += len(chunk)
+                download_stats.add_bytes(len(chunk))
+        _check_download_complete(received, response.headers)
+        return response.headers
+
+# Download steps shared with the asyncio engine (scrapers.async_engine)
+
+def _partial_download_path(market_name, lang_code, catalog_index):
+    return os.path.join(PDF_DOWNLOAD_DIR, f"{market_name}_{lang_code}_catalog_{catalog_index}.pdf.part")
+
+def _download_headers(pdf_url, partial_path):
+    """
+    Request headers for the next attempt. A partial file is only resumed if it was started from the
+    same URL and the server gave it a strong validator, which is sent as If-Range: a server whose
+    file changed since then answers 200 with the whole new file instead of appending to the old one.
+    Otherwise the partial file is dropped and the cache validators are sent for a fresh request.
+    """
+    if os.path.exists(partial_path):
+        validator = _partial_validator(pdf_url, partial_path)
+        if validator:
+            return {'If-Range': validator}
+        logging.info(f"Discarding {os.path.basename(partial_path)}: it cannot be resumed safely.")
+        _discard_partial(partial_path)
+    return pdf_cache.conditional_headers(pdf_url)
+
+def _partial_validator(pdf_url, partial_path):
+    """The If-Range validator recorded for a partial file of `pdf_url`, or None."""
+    try:
+        with open(partial_path + '.meta', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
         return None
+    if meta.get('url') != pdf_url:
+        return None
+    return meta.get('etag') or meta.get('last_modified')
+
+def _discard_partial(partial_path):
+    for path in (partial_path, partial_path + '.meta'):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _resume_headers(partial_path, headers):
+    """Adds a Range header for the bytes already in `partial_path`. Returns (headers, offset)."""
+    headers = dict(headers or {})
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+    if offset:
+        headers['Range'] = f'bytes={offset}-'
+    return headers, offset
 
-def convert_pdf_to_images(pdf_path, output_image_dir, dpi=200):
-    """Converts a PDF file into a series of PNG images."""
-    if not pdf_path or not os.path.exists(pdf_path): return []
+def _open_partial_download(pdf_url, partial_path, offset, status, response_headers):
+    """
+    Opens the partial file for appending when the server resumed at `offset` (206). Otherwise the
+    file is truncated and the URL and validators of the new response are recorded next to it, so a
+    later attempt can resume it (see _download_headers).
+    """
+    if offset and status == 206:
+        logging.info(f"Resuming download at byte {offset}.")
+        return open(partial_path, 'ab')
+    etag = response_headers.get('ETag')
+    meta = {
+        'url': pdf_url,
+        # If-Range needs a strong validator; weak ETags ('W/"..."') cannot be used
+        'etag': etag if etag and not etag.startswith('W/') else None,
+        'last_modified': response_headers.get('Last-Modified')
+    }
+    with open(partial_path + '.meta', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    return open(partial_path, 'wb')
+
+def _complete_partial_headers(partial_path, response_headers):
+    """
+    Handles 416 to a Range resume, which means the partial file already holds the whole body. Checks
+    its size against the total in Content-Range and returns the validators recorded for it, for the
+    PDF cache. A partial file of another size is dropped and ConnectionError raised, so the retry
+    downloads it afresh.
+    """
+    total = response_headers.get('Content-Range', '').rpartition('/')[2]
+    if not total.isdigit() or int(total) != os.path.getsize(partial_path):
+        _discard_partial(partial_path)
+        raise ConnectionError(f"Server rejected the resume of {os.path.basename(partial_path)} (Content-Range '{total}').")
+    with open(partial_path + '.meta', encoding='utf-8') as f:
+        meta = json.load(f)
+    return {'ETag': meta.get('etag'), 'Last-Modified': meta.get('last_modified')}
+
+def _check_download_complete(received, response_headers):
+    """Raises ConnectionError if the body ended before Content-Length; a retry resumes it."""
+    expected = response_headers.get('Content-Length')
+    if expected is not None and 'Content-Encoding' not in response_headers and received < int(expected):
+        raise ConnectionError(f"Connection closed after {received} of {expected} bytes.")
+
+def _finish_download(pdf_url, partial_path, response_headers, market_name, lang_code, started):
+    """
+    Moves a completed download into the PDF cache, or returns the cached copy when the server
+    answered 304 (`response_headers` is None). Returns (path, sha256).
+    """
+    if response_headers is None:
+        filepath, sha256 = pdf_cache.hit(pdf_url)
+        if not filepath:
+            raise FileNotFoundError("Server answered 304 but the cached copy is gone.")
+        metrics.count('pdf_cache_hits', market=market_name, lang=lang_code)
+        logging.info(f"PDF not modified since last download. Using cached copy: {filepath}")
+        return filepath, sha256
+    filepath, sha256 = pdf_cache.store(pdf_url, partial_path, response_headers)
+    _discard_partial(partial_path)
+    elapsed = time.monotonic() - started
+    total_size = os.path.getsize(filepath)
+    download_stats.add_file(elapsed)
+    metrics.count('pdfs_downloaded', market=market_name, lang=lang_code)
+    metrics.count('pdf_bytes_downloaded', total_size, market=market_name, lang=lang_code)
+    logging.info(
+        f"PDF downloaded successfully to: {filepath} "
+        f"({total_size / 1e6:.1f} MB, {total_size / 1e6 / max(elapsed, 1e-6):.1f} MB/s)"
+    )
+    return filepath, sha256
+
+def _download_retry_delay(pdf_url, attempt, error, market_name, lang_code):
+    """Returns the backoff before the next download attempt, or None (after logging) when attempts are used up."""
+    if attempt == DOWNLOAD_MAX_ATTEMPTS:
+        logging.exception(f"Error downloading PDF from {pdf_url}. Error: {error}")
+        return None
+    delay = DOWNLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1)
+    download_stats.add_retry()
+    metrics.count('download_retries', market=market_name, lang=lang_code)
+    logging.warning(f"Download attempt {attempt} for {pdf_url} failed ({error}). Retrying in {delay}s...")
+    return delay
+
+class DownloadStats:
+    """Thread-safe running totals for all PDF downloads of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.files = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes += count
+
+    def add_file(self, seconds):
+        with self._lock:
+            self.files += 1
+            self.seconds += seconds
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def summary(self):
+        with self._lock:
+            rate = self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+            return f"{self.files} PDFs, {self.bytes / 1e6:.1f} MB, {rate:.1f} MB/s, {self.retries} retries"
+
+download_stats = DownloadStats()
+metrics = RunMetrics()
+pdf_cache = PdfCache(PDF_CACHE_DIR, PDF_CACHE_MAX_BYTES)
+publish_state = PublishState(PUBLISH_STATE_PATH)
+checkpoints = CheckpointJournal(CHECKPOINT_JOURNAL_PATH, CHECKPOINT_MAX_AGE_SECONDS)
+release_schedule = ReleaseSchedule(
+    RELEASE_SCHEDULE_PATH, DAEMON_FAST_SECONDS, DAEMON_OVERDUE_SECONDS, DAEMON_SLOW_SECONDS,
+    RELEASE_WINDOW_SECONDS, RELEASE_DEFAULT_LEAD_SECONDS, RELEASE_CADENCE_DAYS
+)
+try:
+    validity_timezone = zoneinfo.ZoneInfo(VALIDITY_TIMEZONE_NAME)
+except zoneinfo.ZoneInfoNotFoundError:
+    # Windows has no system time zone database unless the tzdata package is installed
+    validity_timezone = datetime.timezone.utc
+
+_render_executor = None
+_render_executor_lock = threading.Lock()
+
+def _get_render_executor():
+    """Returns the process pool shared by all render calls, creating it on first use."""
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is None:
+            _render_executor = ProcessPoolExecutor(
+                max_workers=max(1, RENDER_WORKERS),
+                mp_context=multiprocessing.get_context(RENDER_START_METHOD),
+                initializer=init_render_worker
+            )
+        return _render_executor
+
+def shutdown_render_executor():
+    """Stops the shared render process pool, if it was started."""
+    global _render_executor
+    with _render_executor_lock:
+        if _render_executor is not None:
+            _render_executor.shutdown()
+            _render_executor = None
+
+def convert_pdf_to_images(pdf_path, output_image_dir, dpi=200, workers=None, image_format=None, ladder=None, tiles=None, budget=None):
+    """
+    Converts a PDF file into page images encoded as `image_format` (default IMAGE_FORMAT), one per
+    size of `ladder` (default IMAGE_LADDER), plus a DZI tile pyramid per page when `tiles` (default
+    TILE_PYRAMID) is set. Every page is rendered within the memory `budget` (default RENDER_BUDGET).
+    Returns {variant_name: [paths in page order]}, or {} on failure.
+    Documents with at least RENDER_PARALLEL_MIN_PAGES pages are split into `workers` page ranges
+    (default RENDER_WORKERS) rendered on the shared process pool.
+    """
+    if not pdf_path or not os.path.exists(pdf_path): return {}
     logging.info(f"Converting PDF {os.path.basename(pdf_path)} to images...")
-    local_image_paths = []
+    workers = RENDER_WORKERS if workers is None else workers
+    image_format = image_format or IMAGE_FORMAT
+    ladder = ladder or IMAGE_LADDER
+    tiles = TILE_PYRAMID if tiles is None else tiles
+    budget = RENDER_BUDGET if budget is None else budget
+    render_args = (image_format, IMAGE_MEASURE_BASELINE, ladder, tiles, budget)
     try:
-        pdf_document = fitz.open(pdf_path)
-        for page_num in range(len(pdf_document)):
-            page = pdf_document.load_page(page_num)
-            mat = fitz.Matrix(dpi / 72, dpi / 72)
-            pix = page.get_pixmap(matrix=mat)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            image_filename = f"page_{page_num + 1:02d}.png"
-            image_path = os.path.join(output_image_dir, image_filename)
-            img.save(image_path)
-            local_image_paths.append(image_path)
-        logging.info(f"PDF conversion complete. {len(local_image_paths)} images generated.")
-        return local_image_paths
+        with fitz.open(pdf_path) as pdf_document:
+            page_count = len(pdf_document)
+            _log_render_plan(pdf_document, dpi, budget)
+        if workers <= 1 or page_count < RENDER_PARALLEL_MIN_PAGES:
+            pages = render_page_range(pdf_path, output_image_dir, dpi, 0, page_count, *render_args)
+        else:
+            ranges = split_page_ranges(page_count, workers)
+            logging.info(f"Rendering {page_count} pages in {len(ranges)} ranges on the process pool.")
+            executor = _get_render_executor()
+            futures = [
+                executor.submit(render_page_range, pdf_path, output_image_dir, dpi, start, stop, *render_args)
+                for start, stop in ranges
+            ]
+            pages = [page for future in futures for page in future.result()]
+        variant_names = [variant['name'] for variant in ladder] + ([tiles['name']] if tiles else [])
+        variant_paths = {name: [paths[name] for paths, _, _ in pages] for name in variant_names}
+        logging.info(f"PDF conversion complete. {len(pages)} pages generated in {len(ladder)} sizes.")
+        _log_encoding_savings(pages, image_format)
+        return variant_paths if pages else {}
     except Exception as e:
         logging.exception(f"Error converting PDF to images: {e}")
-        return []
+        return {}
+
+def _log_render_plan(pdf_document, dpi, budget):
+    """Logs the pages that plan_page_render renders in bands or at a lower DPI to stay within `budget`."""
+    for page_num, page in enumerate(pdf_document):
+        page_dpi, band_height = plan_page_render(page.rect, dpi, budget)
+        if band_height:
+            logging.info(
+                f"Page {page_num + 1} ({page.rect.width / 72:.1f}x{page.rect.height / 72:.1f} in) exceeds the "
+                f"{budget['memory_bytes'] / 1e6:.0f} MB render budget: rendering in bands of {band_height} rows at {page_dpi:.0f} DPI."
+            )
+
+def _log_encoding_savings(pages, image_format):
+    """Logs the encoded size of a document, compared to default PNG output when it was measured."""
+    encoded = sum(encoded_bytes for _, encoded_bytes, _ in pages)
+    baseline = sum(baseline_bytes for _, _, baseline_bytes in pages)
+    if baseline:
+        saved = baseline - encoded
+        logging.info(
+            f"Encoded {len(pages)} pages as {image_format}: {encoded / 1e6:.2f} MB vs {baseline / 1e6:.2f} MB PNG "
+            f"({saved / 1e6:.2f} MB saved, {100 * saved / baseline:.0f}%)."
+        )
+    else:
+        logging.info(f"Encoded {len(pages)} pages as {image_format}: {encoded / 1e6:.2f} MB.")
+
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
 
-def upload_images_to_storage(local_image_paths, market_name, lang_code, catalog_id):
-    """Uploads local images to Firebase Storage and returns their public URLs."""
-    if not local_image_paths: return []
-    logging.info(f"Uploading {len(local_image_paths)} images to Firebase Storage...")
-    public_urls = []
-    for local_path in local_image_paths:
+def _get_upload_executor():
+    """Returns the thread pool shared by all uploads, creating it on first use."""
+    global _upload_executor
+    with _upload_executor_lock:
+        if _upload_executor is None:
+            _upload_executor = ThreadPoolExecutor(max_workers=max(1, UPLOAD_WORKERS), thread_name_prefix='upload')
+        return _upload_executor
+
+# Page objects known to exist in the bucket, so repeated pages skip even the exists() check.
+# Only valid for one run: maintenance.py gc may delete objects between daemon cycles.
+_known_page_objects = set()
+_known_page_objects_lock = threading.Lock()
+
+def forget_known_page_objects():
+    """Drops the cache of existing page objects; the daemon calls this before every cycle."""
+    with _known_page_objects_lock:
+        _known_page_objects.clear()
+
+def _check_page_uploads(results):
+    """Logs the outcome of a batch of _upload_page results. Returns False if any page failed."""
+    failed = sum(1 for result in results if result is None)
+    if failed:
+        logging.error(f"Upload failed for {failed} of {len(results)} images. Nothing will be published.")
+        return False
+    reused = sum(1 for _, _, was_reused in results if was_reused)
+    logging.info(
+        f"Upload complete. {len(results)} images are now public; {reused} reused existing objects "
+        f"(dedup ratio {reused / len(results):.0%})."
+    )
+    return True
+
+def _upload_page(local_path, market_name):
+    """Hashes one page image file and uploads it unless an identical object already exists. Returns (url, sha256, reused) or None."""
+    return _store_page_object(file_sha256(local_path), os.path.splitext(local_path)[1], market_name, local_path=local_path)
+
+def _upload_page_bytes(data, extension, market_name):
+    """Same as _upload_page for an image that only exists in memory."""
+    return _store_page_object(hashlib.sha256(data).hexdigest(), extension, market_name, data=data)
+
+def _store_page_object(sha256, extension, market_name, local_path=None, data=None):
+    destination_blob_name = f"catalogs/{market_name}/pages/{sha256}{extension}"
+    blob = get_bucket().blob(destination_blob_name)
+    with _known_page_objects_lock:
+        known = destination_blob_name in _known_page_objects
+    try:
+        reused = known or (blob.exists() and _refresh_page_object(blob))
+    except Exception as e:
+        logging.warning(f"Could not check or refresh {destination_blob_name} ({e}). Uploading it.")
+        reused = False
+    if not reused and not _upload_with_retry(blob, extension, local_path=local_path, data=data):
+        return None
+    if reused:
+        metrics.count('page_objects_reused', market=market_name)
+    else:
+        metrics.count('page_objects_uploaded', market=market_name)
+        metrics.count('page_bytes_uploaded', len(data) if data is not None else os.path.getsize(local_path), market=market_name)
+    with _known_page_objects_lock:
+        _known_page_objects.add(destination_blob_name)
+    return blob.public_url, sha256, reused
+
+def _refresh_page_object(blob):
+    """
+    Patches the metadata of an existing page object that is about to be reused, which resets its
+    `updated` time. maintenance.py gc only deletes unreferenced objects older than GC_MIN_AGE_SECONDS,
+    so an old object that no published brochure references any more cannot be removed between
+    this run reusing it and publishing the catalog that points at it. Returns True.
+    """
+    blob.metadata = {'reusedAt': datetime.datetime.now(datetime.timezone.utc).isoformat()}
+    blob.patch()
+    return True
+
+def _upload_with_retry(blob, extension, local_path=None, data=None):
+    """
+    Uploads one file (or in-memory `data`) as a public object, retrying with exponential backoff.
+    Returns True on success.
+    """
+    content_type = _content_type_for(extension)
+    size = len(data) if data is not None else os.path.getsize(local_path)
+    for attempt in range(1, UPLOAD_MAX_ATTEMPTS + 1):
         try:
-            file_name = os.path.basename(local_path)
-            destination_blob_name = f"catalogs/{market_name}/{lang_code}/{catalog_id}/{file_name}"
-            blob = bucket.blob(destination_blob_name)
-            blob.upload_from_filename(local_path)
-            blob.make_public()
-            public_urls.append(blob.public_url)
+            if size > UPLOAD_RESUMABLE_THRESHOLD:
+                blob.chunk_size = UPLOAD_CHUNK_SIZE
+            blob.cache_control = PAGE_CACHE_CONTROL
+            # Setting the ACL with the upload saves the separate make_public() round-trip
+            if data is not None:
+                blob.upload_from_string(data, content_type=content_type, predefined_acl='publicRead')
+            else:
+                blob.upload_from_filename(local_path, content_type=content_type, predefined_acl='publicRead')
+            return True
         except Exception as e:
-            logging.exception(f"Failed to upload {file_name}. Error: {e}")
-    logging.info(f"Upload complete. {len(public_urls)} images are now public.")
-    return public_urls
-
-def clear_old_catalogs(market_name, language):
-    """Clears old Firestore entries for a specific market and language."""
-    logging.info(f"Clearing old Firestore entries for {market_name.upper()} ({language})...")
-    brochures_ref = db.collection('brochures')
+            if attempt == UPLOAD_MAX_ATTEMPTS:
+                logging.exception(f"Failed to upload {blob.name}. Error: {e}")
+                return False
+            delay = UPLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            metrics.count('upload_retries')
+            logging.warning(f"Upload attempt {attempt} for {blob.name} failed ({e}). Retrying in {delay}s...")
+            time.sleep(delay)
+
+def upload_page_variants(variant_paths, market_name, lang_code, catalog_id):
+    """
+    Uploads every size produced by convert_pdf_to_images, and every file of its tile pyramids, in
+    one concurrent batch and stores the catalog's page manifest at
+    `catalogs/{market}/{lang}/{catalog_id}/manifest.json`. Like stream_pdf_to_storage, pages whose
+    uploads all completed are recorded in the checkpoint journal, and pages recorded by an
+    interrupted run are not uploaded again.
+    Returns {variant_name: [public URLs]}, or {} if any page of any size failed.
+    """
+    resumed_pages, pending_paths, page_count = _pending_page_uploads(variant_paths, market_name, lang_code, catalog_id)
+    page_variants = _page_image_variants(pending_paths)
+    all_paths = [path for paths in page_variants.values() for path in paths]
+    if all_paths:
+        logging.info(f"Uploading {len(all_paths)} images to Firebase Storage...")
+    executor = _get_upload_executor()
+    futures = [executor.submit(_upload_page, local_path, market_name) for local_path in all_paths]
+    tile_futures = [
+        [executor.submit(_store_catalog_object, blob_name, local_path=local_path) for local_path, blob_name in files]
+        for files in _tile_pyramid_batch(pending_paths, market_name, lang_code, catalog_id)
+    ]
+    uploaded_by_variant = _group_by_variant(page_variants, [future.result() for future in futures])
+    if TILE_VARIANT in pending_paths:
+        uploaded_by_variant[TILE_VARIANT] = [
+            _pyramid_result([future.result() for future in page_futures]) for page_futures in tile_futures
+        ]
+    return _finish_page_uploads(uploaded_by_variant, resumed_pages, page_count, market_name, lang_code, catalog_id)
+
+def _pending_page_uploads(variant_paths, market_name, lang_code, catalog_id):
+    """
+    Splits convert_pdf_to_images output into the pages the checkpoint journal already has uploaded
+    and the rest. Returns (resumed_pages, {variant_name: [paths of pending pages]}, page_count).
+    """
+    page_count = len(next(iter(variant_paths.values()), []))
+    resumed_pages = _resumed_pages(market_name, lang_code, catalog_id, page_count, list(variant_paths))
+    pending_paths = {
+        name: [path for page_num, path in enumerate(paths) if page_num not in resumed_pages]
+        for name, paths in variant_paths.items()
+    }
+    return resumed_pages, pending_paths, page_count
+
+def _tile_pyramid_batch(pending_paths, market_name, lang_code, catalog_id):
+    """The (local_path, blob_name) files of every pending page's tile pyramid, one list per page."""
+    pyramids = [
+        tile_pyramid_files(dzi_path, market_name, lang_code, catalog_id)
+        for dzi_path in pending_paths.get(TILE_VARIANT, [])
+    ]
+    if pyramids:
+        logging.info(f"Uploading {sum(len(files) for files in pyramids)} tile pyramid files for {len(pyramids)} pages...")
+    return pyramids
+
+def _pyramid_result(file_results):
+    """The descriptor's upload result for one page's tile pyramid (uploaded last), or None if any file failed."""
+    return file_results[-1] if all(file_results) else None
+
+def _finish_page_uploads(uploaded_by_variant, resumed_pages, page_count, market_name, lang_code, catalog_id):
+    """
+    Records every pending page whose sizes all uploaded in the checkpoint journal, merges in the
+    resumed pages and publishes the page manifest. `uploaded_by_variant` holds one result (or None)
+    per pending page. Returns {variant_name: [public URLs]}, or {} if any page failed.
+    """
+    pending_pages = [page_num for page_num in range(page_count) if page_num not in resumed_pages]
+    pages = [resumed_pages.get(page_num) for page_num in range(page_count)]
+    for index, page_num in enumerate(pending_pages):
+        pages[page_num] = {name: results[index] for name, results in uploaded_by_variant.items()}
+        if all(pages[page_num].values()):
+            checkpoints.record(market_name, lang_code, 'page', f"{catalog_id}/{page_num}", pages[page_num])
+    merged = {name: [page[name] for page in pages] for name in uploaded_by_variant}
+    if not all(merged.get(TILE_VARIANT, [])):
+        logging.error("Tile pyramid upload failed. Nothing will be published.")
+        return {}
+    if not _check_page_uploads([upload for name, uploads in merged.items() if name != TILE_VARIANT for upload in uploads]):
+        return {}
+    return _publish_page_manifest(merged, market_name, lang_code, catalog_id)
+
+def _page_image_variants(variant_paths):
+    """The page image sizes of convert_pdf_to_images output, without the tile pyramid."""
+    return {name: paths for name, paths in variant_paths.items() if name != TILE_VARIANT}
+
+def _group_by_variant(page_variants, uploaded):
+    """Splits the flat upload results of every size back into {variant_name: [results in page order]}."""
+    uploaded_by_variant = {}
+    offset = 0
+    for variant_name, paths in page_variants.items():
+        uploaded_by_variant[variant_name] = uploaded[offset:offset + len(paths)]
+        offset += len(paths)
+    return uploaded_by_variant
+
+def tile_pyramid_files(dzi_path, market_name, lang_code, catalog_id):
+    """
+    Lists the files of the tile pyramid written by render_page_range for one page as
+    (local_path, blob_name) pairs, tiles first and the .dzi descriptor last.
+    Pyramids are stored per catalog under `catalogs/{market}/{lang}/{catalog_id}/tiles/`.
+    """
+    tiles_dir = os.path.dirname(dzi_path)
+    files_dir = os.path.splitext(dzi_path)[0] + '_files'
+    files = []
+    for dir_path, _, filenames in os.walk(files_dir):
+        for filename in sorted(filenames):
+            local_path = os.path.join(dir_path, filename)
+            files.append(local_path)
+    files.append(dzi_path)
+    return [
+        (local_path, f"{tile_blob_prefix(market_name, lang_code, catalog_id)}{os.path.relpath(local_path, tiles_dir).replace(os.sep, '/')}")
+        for local_path in files
+    ]
+
+def tile_blob_prefix(market_name, lang_code, catalog_id):
+    return f"catalogs/{market_name}/{lang_code}/{catalog_id}/tiles/"
+
+def _store_catalog_object(blob_name, local_path=None, data=None):
+    """Uploads a per-catalog object (tile or descriptor) by name. Returns (public_url, sha256, False) or None."""
+    blob = get_bucket().blob(blob_name)
+    if not _upload_with_retry(blob, os.path.splitext(blob_name)[1], local_path=local_path, data=data):
+        return None
+    metrics.count('tile_objects_uploaded')
+    sha256 = hashlib.sha256(data).hexdigest() if data is not None else file_sha256(local_path)
+    return blob.public_url, sha256, False
+
+def stream_pdf_to_storage(pdf_path, market_name, lang_code, catalog_id, dpi=200, workers=None, image_format=None, ladder=None, keep_files_dir=None, tiles=None, budget=None):
+    """
+    Streaming alternative to convert_pdf_to_images + upload_page_variants. Pages are rendered to
+    in-memory buffers and handed to the upload pool as soon as they are ready, so page N uploads
+    while page N+1 renders. At most STREAM_QUEUE_DEPTH pages wait in each stage, which caps memory.
+    Image files are only written when `keep_files_dir` is given. With `tiles` (default TILE_PYRAMID),
+    each page's tile pyramid is uploaded alongside its images. Pages are rendered within the memory
+    `budget` (default RENDER_BUDGET). Every page whose uploads completed is recorded in the checkpoint
+    journal; pages recorded by an interrupted run are neither rendered nor uploaded again.
+    Returns {variant_name: [public URLs]}, or {} if any page failed.
+    """
+    if not pdf_path or not os.path.exists(pdf_path): return {}
+    workers = RENDER_WORKERS if workers is None else workers
+    image_format = image_format or IMAGE_FORMAT
+    ladder = ladder or IMAGE_LADDER
+    tiles = TILE_PYRAMID if tiles is None else tiles
+    budget = RENDER_BUDGET if budget is None else budget
+    extension = f".{IMAGE_EXTENSIONS[image_format]}"
+    variant_names = [variant['name'] for variant in ladder] + ([tiles['name']] if tiles else [])
     try:
-        query = brochures_ref.where('marketName', '==', market_name).where('language', '==', language)
-        docs = query.stream()
-        deleted_count = 0
-        for doc in docs:
-            doc.reference.delete()
-            deleted_count += 1
-        logging.info(f"{deleted_count} old entries cleared successfully.")
+        with fitz.open(pdf_path) as pdf_document:
+            page_count = len(pdf_document)
+            _log_render_plan(pdf_document, dpi, budget)
+        logging.info(f"Streaming {page_count} pages of {os.path.basename(pdf_path)} to storage...")
+        render_executor = _get_render_executor() if workers > 1 and page_count >= RENDER_PARALLEL_MIN_PAGES else None
+        upload_executor = _get_upload_executor()
+        pending_renders = deque()
+        pending_uploads = deque()
+        uploaded_pages = [None] * page_count
+        resumed_pages = _resumed_pages(market_name, lang_code, catalog_id, page_count, variant_names)
+
+        def finish_oldest_upload():
+            page_num, futures, tile_futures = pending_uploads.popleft()
+            uploaded_pages[page_num] = {name: future.result() for name, future in futures.items()}
+            if tiles:
+                tile_results = [future.result() for future in tile_futures]
+                uploaded_pages[page_num][tiles['name']] = _pyramid_result(tile_results)
+            if all(uploaded_pages[page_num].values()):
+                checkpoints.record(market_name, lang_code, 'page', f"{catalog_id}/{page_num}", uploaded_pages[page_num])
+
+        def finish_oldest_render():
+            page_num, future = pending_renders.popleft()
+            encoded = future.result()
+            tile_files = encoded.pop(tiles['name']) if tiles else []
+            tile_futures = [
+                upload_executor.submit(_store_catalog_object, tile_blob_prefix(market_name, lang_code, catalog_id) + relative_path, data=data)
+                for relative_path, data in tile_files
+            ]
+            if keep_files_dir:
+                if tile_files:
+                    write_files(os.path.join(keep_files_dir, 'tiles'), tile_files)
+                for index, (name, data) in enumerate(encoded.items()):
+                    suffix = f".{name}" if index else ''
+                    with open(os.path.join(keep_files_dir, f"page_{page_num + 1:02d}{suffix}{extension}"), 'wb') as f:
+                        f.write(data)
+            pending_uploads.append((page_num, {
+                name: upload_executor.submit(_upload_page_bytes, data, extension, market_name)
+                for name, data in encoded.items()
+            }, tile_futures))
+            while len(pending_uploads) > STREAM_QUEUE_DEPTH:
+                finish_oldest_upload()
+
+        for page_num in range(page_count):
+            if page_num in resumed_pages:
+                uploaded_pages[page_num] = resumed_pages[page_num]
+                continue
+            render_args = (pdf_path, page_num, dpi, image_format, ladder, tiles, budget)
+            if render_executor:
+                future = render_executor.submit(render_page_to_memory, *render_args)
+            else:
+                future = Future()
+                future.set_result(render_page_to_memory(*render_args))
+            pending_renders.append((page_num, future))
+            while len(pending_renders) > (STREAM_QUEUE_DEPTH if render_executor else 0):
+                finish_oldest_render()
+        while pending_renders:
+            finish_oldest_render()
+        while pending_uploads:
+            finish_oldest_upload()
     except Exception as e:
-        logging.exception(f"Error clearing old Firestore entries: {e}")
-
-def add_catalog_to_firestore(market_name, catalog_title, catalog_validity, thumbnail_url, page_urls, language, week_type):
-    """Adds a new catalog to Firestore, including its week type ('current' or 'next')."""
-    if not page_urls:
-        logging.warning("No page URLs to upload, skipping Firestore update.")
-        return
-    logging.info(f"Adding new catalog to Firestore: '{catalog_title}' (Type: {week_type})")
-    brochures_ref = db.collection('brochures')
+        logging.exception(f"Error streaming PDF pages to storage: {e}")
+        return {}
+
+    uploaded_by_variant = {name: [page[name] for page in uploaded_pages] for name in variant_names}
+    all_uploads = [upload for uploads in uploaded_by_variant.values() for upload in uploads]
+    if any(upload is None for upload in all_uploads):
+        logging.error(f"Upload failed for {sum(1 for upload in all_uploads if upload is None)} images. Nothing will be published.")
+        return {}
+    reused = sum(1 for _, _, was_reused in all_uploads if was_reused)
+    logging.info(
+        f"Streaming complete. {len(all_uploads)} images are now public; {reused} reused existing objects "
+        f"(dedup ratio {reused / max(len(all_uploads), 1):.0%})."
+    )
+    return _publish_page_manifest(uploaded_by_variant, market_name, lang_code, catalog_id)
+
+def _resumed_pages(market_name, lang_code, catalog_id, page_count, variant_names):
+    """Returns {page_num: {variant: (url, sha256, reused)}} for the pages of a catalog the checkpoint journal has complete."""
+    resumed = {}
+    for key, uploads in checkpoints.completed(market_name, lang_code, 'page').items():
+        recorded_catalog, page_num = key.rsplit('/', 1)
+        # Pages of another catalog, or rendered with a different set of sizes, are not reused
+        if recorded_catalog == catalog_id and int(page_num) < page_count and sorted(uploads) == sorted(variant_names):
+            resumed[int(page_num)] = {name: tuple(uploads[name]) for name in variant_names}
+    if resumed:
+        logging.info(f"Resuming: {len(resumed)} of {page_count} pages were already uploaded by an interrupted run.")
+        metrics.count('pages_resumed', len(resumed), market=market_name, lang=lang_code)
+    return resumed
+
+def _publish_page_manifest(uploaded_by_variant, market_name, lang_code, catalog_id):
+    """Turns {variant: [(url, sha256, reused)]} into {variant: [urls]} and stores the matching page manifest."""
+    variant_urls = {}
+    manifest = {}
+    for variant_name, variant_pages in uploaded_by_variant.items():
+        variant_urls[variant_name] = [url for url, _, _ in variant_pages]
+        manifest[variant_name] = [
+            {'page': index + 1, 'sha256': sha256, 'url': url}
+            for index, (url, sha256, _) in enumerate(variant_pages)
+        ]
+    _write_page_manifest(manifest, market_name, lang_code, catalog_id)
+    return variant_urls
+
+def _write_page_manifest(manifest, market_name, lang_code, catalog_id):
+    """Uploads the {variant: [{page, sha256, url}]} manifest next to the catalog. Failures are logged, not fatal."""
+    manifest_blob_name = f"catalogs/{market_name}/{lang_code}/{catalog_id}/manifest.json"
     try:
-        new_catalog_data = {
-            'marketName': market_name,
-            'title': catalog_title,
-            'validity': catalog_validity,
-            'thumbnail': thumbnail_url,
-            'pages': page_urls,
-            'timestamp': firestore.SERVER_TIMESTAMP,
-            'language': language,
-            'weekType': week_type  # NEW FIELD FOR THE UI
-        }
-        doc_ref = brochures_ref.add(new_catalog_data)
-        logging.info(f"New catalog added to Firestore with ID: {doc_ref[1].id}")
+        blob = get_bucket().blob(manifest_blob_name)
+        blob.upload_from_string(json.dumps(manifest, indent=2), content_type='application/json')
+        logging.info(f"Page manifest written to {manifest_blob_name}.")
     except Exception as e:
-        logging.exception(f"Error adding document to Firestore: {e}")
+        logging.warning(f"Could not write page manifest {manifest_blob_name}. Error: {e}")
 
-def extract_start_date(validity_string):
+def _content_type_for(extension):
+    """Returns the MIME type for a page image or tile descriptor extension ('.webp', 'dzi')."""
+    extension = extension.lstrip('.').lower()
+    if extension == 'dzi':
+        return TILE_DESCRIPTOR_CONTENT_TYPE
+    image_format = 'jpeg' if extension in ('jpg', 'jpeg') else extension
+    return IMAGE_CONTENT_TYPES.get(image_format, 'application/octet-stream')
+
+def build_catalog_document(market_name, catalog_title, catalog_validity, thumbnail_url, page_urls, language, week_type, pdf_hash=None, page_variants=None, pdf_url=None, search_index_url=None):
     """
-    Extracts the first DD.MM date from a string and returns a date object.
-    Handles the year-end transition correctly.
+    Returns the Firestore 'brochures' document for one catalog (without the server timestamp).
+    'validFrom'/'validTo' are parsed from the validity text, so the app can query the brochures
+    valid at a given time with range filters (validTo is exclusive).
     """
-    match = re.search(r'(\d{1,2})\.(\d{1,2})\.?', validity_string)
-    if not match:
-        return None
+    valid_from, valid_to = validity_range(catalog_validity, validity_timezone, VALIDITY_DEFAULT_DAYS)
+    return {
+        'marketName': market_name,
+        'title': catalog_title,
+        'validity': catalog_validity,
+        'validFrom': valid_from,
+        'validTo': valid_to,
+        'thumbnail': thumbnail_url,
+        'pages': page_urls,
+        'language': language,
+        'weekType': week_type,  # NEW FIELD FOR THE UI
+        'pdfHash': pdf_hash,
+        'pdfUrl': pdf_url,
+        'pageVariants': page_variants or {},
+        'searchIndex': search_index_url
+    }
+
+def catalog_document_id(market_name, language, week_type):
+    """Stable 'brochures' document ID, so a republished catalog updates its document in place."""
+    return f"{market_name}_{language}_{week_type}"
+
+def publish_catalogs(market_name, language, catalog_documents, failed_week_types=()):
+    """
+    Atomically replaces the published catalogs of a market and language with `catalog_documents`
+    (dicts from build_catalog_document) in a single transaction. Documents use stable IDs from
+    catalog_document_id and are only written when their content changed; documents of this
+    market/language that are not in the new set are deleted in the same commit, except those of
+    `failed_week_types`: catalogs that are still live but could not be reprocessed this time keep
+    their published document. App listeners therefore never see an empty list, only the real
+    changes. Returns True on success.
+    """
+    logging.info(f"Publishing {len(catalog_documents)} catalogs for {market_name.upper()} ({language})...")
+    brochures_ref = get_db().collection('brochures')
+    query = brochures_ref.where('marketName', '==', market_name).where('language', '==', language)
+    new_documents = {
+        catalog_document_id(market_name, language, document['weekType']): document
+        for document in catalog_documents
+    }
+
+    def swap(transaction):
+        existing = {doc.id: doc for doc in query.stream(transaction=transaction)}
+        written, unchanged, deleted = 0, 0, 0
+        for doc_id, document in new_documents.items():
+            current = existing.get(doc_id)
+            if current is not None and _same_catalog(current.to_dict(), document):
+                unchanged += 1
+                continue
+            transaction.set(brochures_ref.document(doc_id), dict(document, timestamp=server_timestamp()))
+            written += 1
+        kept_ids = {catalog_document_id(market_name, language, week_type) for week_type in failed_week_types}
+        for doc_id, doc in existing.items():
+            if doc_id not in new_documents and doc_id not in kept_ids:
+                transaction.delete(doc.reference)
+                deleted += 1
+        return written, unchanged, deleted
 
-    day = int(match.group(1))
-    month = int(match.group(2))
-    today = datetime.date.today()
-    
-    # Handle year-end case (e.g., in December, a catalog for January is for next year)
-    year = today.year
-    if month < today.month:
-        year += 1
-        
     try:
-        return datetime.date(year, month, day)
-    except ValueError:
-        # Handles invalid dates like 31.02
-        return None
-    
+        written, unchanged, deleted = run_transaction(swap)
+        metrics.count('documents_written', written, market=market_name, lang=language)
+        metrics.count('documents_deleted', deleted, market=market_name, lang=language)
+        logging.info(f"Publish complete: {written} written, {unchanged} unchanged, {deleted} deleted.")
+        return True
+    except Exception as e:
+        logging.exception(f"Error publishing catalogs for {market_name.upper()} ({language}): {e}")
+        return False
+
+def _same_catalog(stored, document):
+    """True if a stored document already holds every field of `document`."""
+    return all(stored.get(key) == value for key, value in document.items())
+
+def extract_start_date(validity_string):
+    """Returns the first valid day of a validity text as a date, or None (see validity.parse_validity)."""
+    parsed = parse_validity(validity_string)
+    return parsed[0] if parsed else None
 
 def get_stored_validity_strings(market_name, language):
     """
@@ -229,11 +1167,129 @@ def get_stored_validity_strings(market_name, language):
     for a specific market and language.
     """
     try:
-        brochures_ref = db.collection('brochures')
+        brochures_ref = get_db().collection('brochures')
         query = brochures_ref.where('marketName', '==', market_name).where('language', '==', language)
-        docs = query.stream()
+        # Project to the one field we compare, instead of transferring the full page URL arrays
+        docs = query.select(['validity']).stream()
         # Create a list of all validity strings found in the database
         return [doc.to_dict().get('validity', '') for doc in docs]
     except Exception as e:
         logging.error(f"Could not fetch stored validity strings for {market_name} ({language}). Error: {e}")
-        return []
\ No newline at end of file
+        return []
+
+def get_published_catalogs(market_name, language):
+    """
+    Returns the stored brochures of a market and language as a list of dicts with their validity,
+    weekType, source pdfUrl/pdfHash, published pages, thumbnail, pageVariants and searchIndex. Used to
+    re-tag or reuse catalogs that are already published instead of processing them again.
+    """
+    try:
+        brochures_ref = get_db().collection('brochures')
+        query = brochures_ref.where('marketName', '==', market_name).where('language', '==', language)
+        fields = ['validity', 'weekType', 'pdfUrl', 'pdfHash', 'pages', 'thumbnail', 'pageVariants', 'searchIndex']
+        published = []
+        for doc in query.select(fields).stream():
+            data = doc.to_dict()
+            if data.get('pages'):
+                published.append({
+                    'validity': data.get('validity', ''),
+                    'weekType': data.get('weekType'),
+                    'pdfUrl': data.get('pdfUrl'),
+                    'pdfHash': data.get('pdfHash'),
+                    'pages': data['pages'],
+                    'thumbnail': data.get('thumbnail', ''),
+                    'pageVariants': data.get('pageVariants', {}),
+                    'searchIndex': data.get('searchIndex')
+                })
+        return published
+    except Exception as e:
+        logging.error(f"Could not fetch published catalogs for {market_name} ({language}). Error: {e}")
+        return []
+
+def find_published_catalog(published_catalogs, pdf_url, validity_string):
+    """
+    Returns the published catalog (from get_published_catalogs) that a live catalog already is, or None.
+    A catalog matches on its validity string, unless both sides know their source URL and it differs:
+    a brochure re-uploaded under a new URL is downloaded again and then matched by PDF hash instead.
+    """
+    for catalog in published_catalogs:
+        if catalog['validity'] != validity_string:
+            continue
+        if catalog.get('pdfUrl') and pdf_url and catalog['pdfUrl'] != pdf_url:
+            continue
+        return catalog
+    return None
+
+# =========================================================================================
+# SEARCH INDEX
+# =========================================================================================
+
+_search_index_cache = {}
+_search_index_cache_lock = threading.Lock()
+
+def search_index_blob_name(market_name, lang_code, catalog_id):
+    return f"catalogs/{market_name}/{lang_code}/{catalog_id}/search_index.json"
+
+def index_catalog_text(pdf_path, market_name, lang_code, catalog_id):
+    """
+    Extracts the words, positions and prices of every page from the PDF's text layer and uploads the
+    catalog's inverted index next to its page manifest. Returns the index's public URL, or None.
+    A missing index only disables search for the catalog, so failures are logged, not fatal.
+    """
+    blob_name = search_index_blob_name(market_name, lang_code, catalog_id)
+    try:
+        index = build_search_index(extract_page_words(pdf_path))
+        data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        blob = get_bucket().blob(blob_name)
+        blob.cache_control = PAGE_CACHE_CONTROL
+        blob.upload_from_string(data, content_type='application/json', predefined_acl='publicRead')
+        metrics.count('index_terms', len(index['terms']), market=market_name, lang=lang_code)
+        logging.info(f"Search index written to {blob_name} ({len(index['terms'])} terms, {len(data) / 1e3:.0f} KB).")
+        return blob.public_url
+    except Exception as e:
+        logging.warning(f"Could not build search index {blob_name}. Error: {e}")
+        return None
+
+def load_search_index(search_index_url):
+    """
+    Returns the SearchIndex behind a brochure's stored 'searchIndex' URL, or None if it cannot be
+    loaded. Recently used indexes stay in memory.
+    """
+    blob_name = blob_name_from_url(search_index_url)
+    if not blob_name:
+        logging.warning(f"Search index URL {search_index_url} is not a stored object.")
+        return None
+    with _search_index_cache_lock:
+        if blob_name in _search_index_cache:
+            _search_index_cache[blob_name] = _search_index_cache.pop(blob_name)
+            return _search_index_cache[blob_name]
+    try:
+        index = SearchIndex.from_json(get_bucket().blob(blob_name).download_as_bytes())
+    except Exception as e:
+        logging.warning(f"Could not load search index {blob_name}. Error: {e}")
+        return None
+    with _search_index_cache_lock:
+        _search_index_cache[blob_name] = index
+        while len(_search_index_cache) > SEARCH_INDEX_CACHE_SIZE:
+            _search_index_cache.pop(next(iter(_search_index_cache)))
+    return index
+
+def search_brochures(market_name, language, query, limit=20):
+    """
+    Searches the published brochures of a market and language for `query` (every word must occur on
+    the page; words match as prefixes). Returns up to `limit` hits, best first, as dicts with the
+    brochure's weekType and validity, the 1-based page, its image URL, the hit boxes (fractions of
+    the page size) and the nearest price on the page.
+    """
+    results = []
+    for catalog in get_published_catalogs(market_name, language):
+        if not catalog.get('searchIndex'):
+            continue
+        index = load_search_index(catalog['searchIndex'])
+        if index is None:
+            continue
+        for hit in index.search(query):
+            page_url = catalog['pages'][hit['page'] - 1] if hit['page'] <= len(catalog['pages']) else None
+            results.append(dict(hit, weekType=catalog['weekType'], validity=catalog['validity'], pageUrl=page_url))
+    results.sort(key=lambda hit: -len(hit['hits']))
+    return results[:limit]
@@ -0,0 +1,131 @@
+import re
+import datetime
+import functools
+import unicodedata
+
+# =========================================================================================
+# VALIDITY PARSING
+# =========================================================================================
+# Brochure validity texts as scraped, e.g. Lidl's '13.10.-18.10.' or Aldi's
+# 'Gültig ab Montag, 13.10.2025', 'Valables du lundi 13 octobre au samedi 18 octobre',
+# 'Valide dal 29.12. al 3.1.'. Dates are DD.MM[.YY[YY]] or 'DD[.|er|°] <month name> [YYYY]'; the
+# first day of a range may also be a bare day ('dal 2 al 7 gennaio', 'du 13 au 18 octobre', '2.-7. Januar').
+
+MONTH_NAMES = {
+    # de
+    'januar': 1, 'jan': 1, 'februar': 2, 'feb': 2, 'marz': 3, 'maerz': 3, 'mar': 3, 'april': 4, 'apr': 4,
+    'mai': 5, 'juni': 6, 'jun': 6, 'juli': 7, 'jul': 7, 'august': 8, 'aug': 8, 'september': 9, 'sept': 9,
+    'sep': 9, 'oktober': 10, 'okt': 10, 'november': 11, 'nov': 11, 'dezember': 12, 'dez': 12,
+    # fr
+    'janvier': 1, 'janv': 1, 'fevrier': 2, 'fevr': 2, 'fev': 2, 'mars': 3, 'avril': 4, 'avr': 4, 'juin': 6,
+    'juillet': 7, 'juil': 7, 'aout': 8, 'septembre': 9, 'octobre': 10, 'oct': 10, 'novembre': 11,
+    'decembre': 12, 'dec': 12,
+    # it
+    'gennaio': 1, 'genn': 1, 'gen': 1, 'febbraio': 2, 'febbr': 2, 'marzo': 3, 'aprile': 4, 'maggio': 5,
+    'mag': 5, 'giugno': 6, 'giu': 6, 'luglio': 7, 'lug': 7, 'agosto': 8, 'ago': 8, 'settembre': 9,
+    'sett': 9, 'set': 9, 'ottobre': 10, 'ott': 10, 'novembre': 11, 'dicembre': 12, 'dic': 12
+}
+
+_NUMERIC_DATE = re.compile(r'(?<![\d.])(\d{1,2})\.\s?(\d{1,2})(?:\.(\d{4}|\d{2}(?!\d))?)?(?![\d:])')
+_NAMED_DATE = re.compile(r'(?<!\d)(\d{1,2})(?:\.|er|°|º)?\s+([a-z]{3,9})\.?(?:\s+(\d{4}))?')
+# A bare day, a range word ('-', 'bis', 'au', 'al', 'a') and an optional weekday before a named date,
+# which is captured in the lookahead so the bare day can take its month and year
+_BARE_RANGE_START = re.compile(
+    r'(?<![\d.])(\d{1,2})(?:\.|er|°|º)?\s*(?:-|–|(?:bis|au|al|a)(?![a-z]))\s*(?:[a-z]+,?\s+)?'
+    r'(?=(\d{1,2})(?:\.|er|°|º)?\s+([a-z]{3,9})\.?(?:\s+(\d{4}))?)'
+)
+
+def parse_validity(validity_string, today=None):
+    """
+    Returns (first_day, last_day) as dates for a validity text, or None if it contains no date.
+    The first date found is the start, the last one the end; a text with a single date ('ab', 'dès',
+    'da') is valid for `default_days` from it (see validity_range). Years missing from the text are
+    taken from the other end of the range or, failing that, chosen so the start lies closest to
+    `today`, which handles catalogs spanning New Year and texts seen around it. Results are cached.
+    """
+    return _parse_validity(validity_string or '', today or datetime.date.today())
+
+@functools.lru_cache(maxsize=512)
+def _parse_validity(validity_string, today):
+    dates = _find_dates(_normalize(validity_string))
+    if not dates:
+        return None
+    (start_day, start_month, start_year), (end_day, end_month, end_year) = dates[0], dates[-1]
+    if start_year is None and end_year is not None:
+        start_year = end_year - 1 if (start_month, start_day) > (end_month, end_day) else end_year
+    if start_year is None:
+        candidates = [_date(year, start_month, start_day) for year in (today.year - 1, today.year, today.year + 1)]
+        candidates = [candidate for candidate in candidates if candidate]
+        first_day = min(candidates, key=lambda candidate: abs(candidate - today)) if candidates else None
+        start_year = first_day.year if first_day else None
+    else:
+        first_day = _date(start_year, start_month, start_day)
+    if first_day is None:
+        return None
+    if len(dates) == 1:
+        return first_day, None
+    if end_year is None:
+        end_year = start_year + 1 if (end_month, end_day) < (start_month, start_day) else start_year
+    last_day = _date(end_year, end_month, end_day)
+    if last_day is None or last_day < first_day:
+        return first_day, None
+    return first_day, last_day
+
+def validity_range(validity_string, timezone, default_days, today=None):
+    """
+    Returns (valid_from, valid_to) as timezone-aware datetimes for Firestore Timestamp fields, or
+    (None, None). valid_from is midnight of the first day; valid_to is midnight after the last day,
+    so a brochure is valid while valid_from <= now < valid_to. Without an end date the brochure is
+    taken to be valid for `default_days`.
+    """
+    parsed = parse_validity(validity_string, today)
+    if not parsed:
+        return None, None
+    first_day, last_day = parsed
+    last_day = last_day or first_day + datetime.timedelta(days=default_days - 1)
+    return (
+        datetime.datetime.combine(first_day, datetime.time(), tzinfo=timezone),
+        datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time(), tzinfo=timezone)
+    )
+
+def _normalize(text):
+    """Lower-cases text and strips accents and umlauts ('März' -> 'marz', 'décembre' -> 'decembre')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def _find_dates(text):
+    """Returns every (day, month, year or None) in the text, in order of appearance."""
+    found = []
+    for match in _NUMERIC_DATE.finditer(text):
+        found.append((match.start(), int(match.group(1)), int(match.group(2)), _full_year(match.group(3))))
+    for match in _NAMED_DATE.finditer(text):
+        month = MONTH_NAMES.get(match.group(2))
+        if month:
+            found.append((match.start(), int(match.group(1)), month, _full_year(match.group(3))))
+    for match in _BARE_RANGE_START.finditer(text):
+        month = MONTH_NAMES.get(match.group(3))
+        if month:
+            found.append((match.start(), int(match.group(1)), *_bare_day_month(
+                int(match.group(1)), int(match.group(2)), month, _full_year(match.group(4))
+            )))
+    return [(day, month, year) for _, day, month, year in sorted(found) if 1 <= day <= 31 and 1 <= month <= 12]
+
+def _bare_day_month(day, end_day, end_month, end_year):
+    """Returns (month, year or None) of a bare first day: the end date's, or the month before if the day is later."""
+    if day <= end_day:
+        return end_month, end_year
+    if end_month == 1:
+        return 12, end_year - 1 if end_year else None
+    return end_month - 1, end_year
+
+def _full_year(year):
+    if not year:
+        return None
+    return int(year) + 2000 if len(year) == 2 else int(year)
+
+def _date(year, month, day):
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        # Invalid dates like 31.02
+        return None
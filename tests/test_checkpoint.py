@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from scrapers import checkpoint
+from scrapers.checkpoint import CheckpointJournal
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(checkpoint.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'state' / 'checkpoints.jsonl')
+
+
+def lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_recorded_units_survive_a_restart(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'scrape', '', [{'week_type': 'current'}])
+    journal.record('lidl', 'de', 'page', 'abc/0', {'full': 'https://cdn/0.webp'})
+    journal.record('lidl', 'de', 'page', 'abc/1', {'full': 'https://cdn/1.webp'})
+
+    reloaded = CheckpointJournal(path, 3600)
+
+    assert reloaded.get('lidl', 'de', 'scrape') == [{'week_type': 'current'}]
+    assert reloaded.completed('lidl', 'de', 'page') == {
+        'abc/0': {'full': 'https://cdn/0.webp'}, 'abc/1': {'full': 'https://cdn/1.webp'}
+    }
+    assert reloaded.get('lidl', 'fr', 'scrape') is None
+    assert reloaded.has_pending()
+
+
+def test_later_record_of_a_unit_wins(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'download', 'https://cdn/a.pdf', ['old.pdf', 'old'])
+    journal.record('lidl', 'de', 'download', 'https://cdn/a.pdf', ['new.pdf', 'new'])
+
+    assert CheckpointJournal(path, 3600).get('lidl', 'de', 'download', 'https://cdn/a.pdf') == ['new.pdf', 'new']
+
+
+def test_expired_entries_are_not_resumed(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'scrape', '', ['catalog'])
+
+    clock[0] += 3600
+
+    assert journal.get('lidl', 'de', 'scrape') is None
+    assert journal.completed('lidl', 'de', 'scrape') == {}
+    assert not journal.has_pending()
+
+
+def test_torn_last_line_is_ignored_and_rewritten(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'page', 'abc/0', 'https://cdn/0.webp')
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"job":"lidl/de","unit":"page","key":"abc/1","va')
+
+    reloaded = CheckpointJournal(path, 3600)
+    assert reloaded.completed('lidl', 'de', 'page') == {'abc/0': 'https://cdn/0.webp'}
+    reloaded.record('lidl', 'de', 'page', 'abc/1', 'https://cdn/1.webp')
+
+    assert [entry['key'] for entry in lines(path)] == ['abc/0', 'abc/1']
+    assert CheckpointJournal(path, 3600).completed('lidl', 'de', 'page') == {
+        'abc/0': 'https://cdn/0.webp', 'abc/1': 'https://cdn/1.webp'
+    }
+
+
+def test_finish_drops_the_job_and_compacts_the_file(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'page', 'abc/0', 'https://cdn/0.webp')
+    journal.record('lidl', 'de', 'page', 'abc/0', 'https://cdn/0.webp')
+    journal.record('lidl', 'fr', 'scrape', '', ['catalog'])
+    clock[0] += 1800
+    journal.record('aldi', 'de', 'scrape', '', ['catalog'])
+    clock[0] += 1800
+
+    journal.finish('lidl', 'de')
+
+    # lidl/fr expired by now, so only the aldi entry is left
+    assert [entry['job'] for entry in lines(path)] == ['aldi/de']
+    assert CheckpointJournal(path, 3600).completed('lidl', 'de', 'page') == {}
+
+
+def test_finishing_the_last_job_removes_the_file(path, clock):
+    journal = CheckpointJournal(path, 3600)
+    journal.record('lidl', 'de', 'publish', '', True)
+
+    journal.finish('lidl', 'de')
+
+    assert not CheckpointJournal(path, 3600).has_pending()
+    assert not journal.has_pending()
+    with pytest.raises(FileNotFoundError):
+        lines(path)
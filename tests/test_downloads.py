@@ -0,0 +1,136 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+for module_name in ('requests', 'fitz', 'PIL'):
+    pytest.importorskip(module_name)
+
+from scrapers import utils
+from scrapers.pdf_cache import PdfCache
+
+OLD_BROCHURE = b'%PDF-old ' + bytes(range(256)) * 64
+NEW_BROCHURE = b'%PDF-new ' + bytes(reversed(range(256))) * 64
+
+
+class BrochureHandler(BaseHTTPRequestHandler):
+    """Serves `server.body` with a strong ETag and honours Range and If-Range like a CDN does."""
+
+    def do_GET(self):
+        body, etag = self.server.body, self.server.etag
+        self.server.requests.append(dict(self.headers))
+        byte_range = self.headers.get('Range')
+        if byte_range and self.headers.get('If-Range') in (None, etag):
+            start = int(byte_range[len('bytes='):].rstrip('-'))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{len(body)}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(body) - 1}/{len(body)}")
+            body = body[start:]
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        # Drop the connection half-way, like a flaky network, while `cut_after` is set
+        self.wfile.write(body[:self.server.cut_after] if self.server.cut_after else body)
+        if self.server.cut_after:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), BrochureHandler)
+    server.body, server.etag, server.cut_after, server.requests = OLD_BROCHURE, '"old"', None, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/brochure.pdf"
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def download_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'PDF_DOWNLOAD_DIR', str(tmp_path / 'temp_pdfs'))
+    monkeypatch.setattr(utils, 'pdf_cache', PdfCache(str(tmp_path / 'pdf_cache'), 10 ** 9))
+    monkeypatch.setattr(utils, 'DOWNLOAD_BACKOFF_SECONDS', 0)
+    # Small chunks, so an interrupted transfer leaves a non-empty partial file
+    monkeypatch.setattr(utils, 'DOWNLOAD_CHUNK_SIZE', 1024)
+    os.makedirs(utils.PDF_DOWNLOAD_DIR)
+
+
+def interrupted_download(server, monkeypatch):
+    """Leaves a partial download of the served brochure behind, as a run killed mid-transfer would."""
+    server.cut_after = 4096
+    monkeypatch.setattr(utils, 'DOWNLOAD_MAX_ATTEMPTS', 1)
+    assert utils.download_pdf(server.url, 'lidl', 'de', 0) == (None, None)
+    monkeypatch.setattr(utils, 'DOWNLOAD_MAX_ATTEMPTS', 4)
+    server.cut_after = None
+    server.requests.clear()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_unchanged_brochure_resumes_from_the_partial_file(server, monkeypatch):
+    interrupted_download(server, monkeypatch)
+
+    path, _ = utils.download_pdf(server.url, 'lidl', 'de', 0)
+
+    assert read(path) == OLD_BROCHURE
+    assert server.requests[0]['Range'] == 'bytes=4096-'
+    assert server.requests[0]['If-Range'] == '"old"'
+    assert not os.listdir(utils.PDF_DOWNLOAD_DIR)
+
+
+def test_replaced_brochure_is_downloaded_whole_instead_of_appended(server, monkeypatch):
+    interrupted_download(server, monkeypatch)
+    server.body, server.etag = NEW_BROCHURE, '"new"'
+
+    path, _ = utils.download_pdf(server.url, 'lidl', 'de', 0)
+
+    assert read(path) == NEW_BROCHURE
+
+
+def test_partial_file_of_another_url_is_not_resumed(server, monkeypatch):
+    interrupted_download(server, monkeypatch)
+    server.body, server.etag = NEW_BROCHURE, '"new"'
+    other_url = server.url.replace('brochure.pdf', 'next.pdf')
+
+    path, _ = utils.download_pdf(other_url, 'lidl', 'de', 0)
+
+    assert read(path) == NEW_BROCHURE
+    assert 'Range' not in server.requests[0]
+
+
+def test_complete_partial_file_is_accepted_only_at_the_full_size(server, monkeypatch):
+    interrupted_download(server, monkeypatch)
+    partial_path = utils._partial_download_path('lidl', 'de', 0)
+    with open(partial_path, 'wb') as f:
+        f.write(OLD_BROCHURE + b'stale trailing bytes')
+
+    path, _ = utils.download_pdf(server.url, 'lidl', 'de', 0)
+
+    assert read(path) == OLD_BROCHURE
+    assert [request.get('Range') for request in server.requests] == [f"bytes={len(OLD_BROCHURE) + 20}-", None]
+
+
+def test_partial_file_holding_the_whole_brochure_is_accepted(server, monkeypatch):
+    interrupted_download(server, monkeypatch)
+    with open(utils._partial_download_path('lidl', 'de', 0), 'wb') as f:
+        f.write(OLD_BROCHURE)
+
+    path, _ = utils.download_pdf(server.url, 'lidl', 'de', 0)
+
+    assert read(path) == OLD_BROCHURE
+    assert len(server.requests) == 1
+    assert utils.pdf_cache.conditional_headers(server.url) == {'If-None-Match': '"old"'}
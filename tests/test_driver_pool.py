@@ -0,0 +1,84 @@
+import pytest
+
+# scrapers.utils imports the scraping and rendering stack at module level
+for module_name in ('requests', 'fitz', 'PIL'):
+    pytest.importorskip(module_name)
+
+from scrapers.driver_pool import WebDriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+        self.healthy = True
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise ConnectionError("browser gone")
+        return 1 if script == "return 1;" else 'https://www.lidl.ch'
+
+    def execute_cdp_cmd(self, command, params):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def pool():
+    return WebDriverPool(2, 3, factory=FakeDriver)
+
+
+def test_released_session_is_leased_again(pool):
+    with pool.lease('lidl') as session:
+        pass
+
+    with pool.lease('lidl') as again:
+        assert again is session
+        assert again.uses == 2
+
+
+def test_session_is_recycled_after_max_uses(pool):
+    for _ in range(3):
+        with pool.lease('lidl') as session:
+            pass
+
+    assert session.driver.quit_called
+    with pool.lease('lidl') as fresh:
+        assert fresh is not session
+
+
+def test_broken_session_is_discarded(pool):
+    with pytest.raises(RuntimeError):
+        with pool.lease('lidl') as session:
+            session.driver.healthy = False
+            raise RuntimeError("scrape failed")
+
+    assert session.driver.quit_called
+    assert pool._total == 0
+
+
+def test_session_released_after_close_is_quit_not_pooled(pool):
+    session = pool.acquire('lidl')
+    pool.close_all()
+
+    pool.release(session)
+
+    assert session.driver.quit_called
+    assert pool._idle == [] and pool._total == 0
+    with pytest.raises(RuntimeError):
+        pool.acquire('lidl')
+
+
+def test_close_all_quits_idle_sessions(pool):
+    first, second = pool.acquire('lidl'), pool.acquire('aldi')
+    pool.release(first)
+
+    pool.close_all()
+    pool.release(second)
+
+    assert first.driver.quit_called and second.driver.quit_called
+    assert pool._total == 0
@@ -0,0 +1,114 @@
+import itertools
+import os
+from pathlib import Path
+
+import pytest
+
+from scrapers import pdf_cache
+from scrapers.pdf_cache import PdfCache, file_sha256
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    """A clock that ticks once per call, so last-use order never depends on timer resolution."""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(pdf_cache.time, 'time', lambda: next(ticks))
+
+
+@pytest.fixture
+def downloads(tmp_path):
+    def download(name, body):
+        path = tmp_path / 'downloads' / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(body)
+        return str(path)
+    return download
+
+
+def test_stored_validators_become_conditional_headers(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 10 ** 6)
+
+    cache.store('https://cdn/a.pdf', downloads('a.pdf', b'a'), {'ETag': '"a1"', 'Last-Modified': 'Mon, 13 Oct 2025 06:00:00 GMT'})
+    cache.store('https://cdn/b.pdf', downloads('b.pdf', b'b'), {'ETag': '"b1"'})
+
+    assert cache.conditional_headers('https://cdn/a.pdf') == {
+        'If-None-Match': '"a1"', 'If-Modified-Since': 'Mon, 13 Oct 2025 06:00:00 GMT'
+    }
+    assert cache.conditional_headers('https://cdn/b.pdf') == {'If-None-Match': '"b1"'}
+    assert cache.conditional_headers('https://cdn/c.pdf') == {}
+
+
+def test_hit_returns_the_cached_body(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 10 ** 6)
+    downloaded = downloads('a.pdf', b'brochure')
+    sha256 = file_sha256(downloaded)
+
+    path, stored_sha256 = cache.store('https://cdn/a.pdf', downloaded, {})
+
+    assert stored_sha256 == sha256
+    assert not os.path.exists(downloaded)
+    assert cache.hit('https://cdn/a.pdf') == (path, sha256)
+    assert Path(path).read_bytes() == b'brochure'
+
+
+def test_urls_with_the_same_body_share_one_file(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 10 ** 6)
+
+    first_path, _ = cache.store('https://cdn/de.pdf', downloads('de.pdf', b'same'), {})
+    second_path, _ = cache.store('https://cdn/fr.pdf', downloads('fr.pdf', b'same'), {})
+
+    assert first_path == second_path
+    assert sorted(os.listdir(tmp_path / 'cache')) == sorted([os.path.basename(first_path), 'index.json'])
+
+
+def test_least_recently_used_bodies_are_evicted(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 250)
+    cache.store('https://cdn/a.pdf', downloads('a.pdf', b'a' * 100), {'ETag': '"a"'})
+    cache.store('https://cdn/b.pdf', downloads('b.pdf', b'b' * 100), {'ETag': '"b"'})
+    cache.hit('https://cdn/a.pdf')
+
+    cache.store('https://cdn/c.pdf', downloads('c.pdf', b'c' * 100), {'ETag': '"c"'})
+
+    assert cache.hit('https://cdn/b.pdf') == (None, None)
+    assert cache.conditional_headers('https://cdn/b.pdf') == {}
+    assert cache.hit('https://cdn/a.pdf')[0] is not None
+    assert cache.hit('https://cdn/c.pdf')[0] is not None
+
+
+def test_new_body_is_kept_even_if_larger_than_the_cache(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 50)
+    cache.store('https://cdn/a.pdf', downloads('a.pdf', b'a' * 40), {})
+
+    path, _ = cache.store('https://cdn/b.pdf', downloads('b.pdf', b'b' * 100), {})
+
+    assert cache.hit('https://cdn/b.pdf')[0] == path
+    assert cache.hit('https://cdn/a.pdf') == (None, None)
+
+
+def test_index_survives_a_restart(tmp_path, downloads):
+    PdfCache(str(tmp_path / 'cache'), 10 ** 6).store('https://cdn/a.pdf', downloads('a.pdf', b'a'), {'ETag': '"a"'})
+
+    cache = PdfCache(str(tmp_path / 'cache'), 10 ** 6)
+
+    assert cache.conditional_headers('https://cdn/a.pdf') == {'If-None-Match': '"a"'}
+
+
+def test_corrupt_index_starts_an_empty_cache(tmp_path, downloads):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    (cache_dir / 'index.json').write_text('{"https://cdn/a.pdf": {"sha256": ')
+    cache = PdfCache(str(cache_dir), 10 ** 6)
+
+    assert cache.hit('https://cdn/a.pdf') == (None, None)
+    assert cache.conditional_headers('https://cdn/a.pdf') == {}
+    cache.store('https://cdn/a.pdf', downloads('a.pdf', b'a'), {'ETag': '"a"'})
+    assert PdfCache(str(cache_dir), 10 ** 6).conditional_headers('https://cdn/a.pdf') == {'If-None-Match': '"a"'}
+
+
+def test_entry_whose_body_was_deleted_is_a_miss(tmp_path, downloads):
+    cache = PdfCache(str(tmp_path / 'cache'), 10 ** 6)
+    path, _ = cache.store('https://cdn/a.pdf', downloads('a.pdf', b'a'), {'ETag': '"a"'})
+    os.remove(path)
+
+    assert cache.hit('https://cdn/a.pdf') == (None, None)
+    assert cache.conditional_headers('https://cdn/a.pdf') == {}
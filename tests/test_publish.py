@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+# scrapers.utils imports the scraping and rendering stack at module level
+for module_name in ('requests', 'fitz', 'PIL'):
+    pytest.importorskip(module_name)
+
+from scrapers import utils
+from scrapers.local_backend import LocalBucket, LocalFirestore
+from scrapers.search_index import build_search_index
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = LocalFirestore()
+    monkeypatch.setattr(utils, 'BACKEND', 'local')
+    monkeypatch.setattr(utils, 'get_db', lambda: db)
+    return db
+
+
+def catalog(week_type, validity, title='Prospekt'):
+    return utils.build_catalog_document(
+        'lidl', title, validity, f"https://cdn/{week_type}/thumb.webp", [f"https://cdn/{week_type}/1.webp"],
+        'de', week_type, pdf_hash=f"hash-{week_type}"
+    )
+
+
+def published(db):
+    return {doc.id: doc.to_dict() for doc in db.collection('brochures').stream()}
+
+
+def test_publish_writes_documents_under_stable_ids(db):
+    assert utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025'), catalog('next', '20.10. - 25.10.2025')])
+
+    documents = published(db)
+    assert set(documents) == {'lidl_de_current', 'lidl_de_next'}
+    assert documents['lidl_de_next']['pdfHash'] == 'hash-next'
+    assert documents['lidl_de_next']['timestamp'] is not None
+
+
+def test_unchanged_document_is_not_rewritten(db):
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025')])
+    first_timestamp = published(db)['lidl_de_current']['timestamp']
+
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025')])
+
+    assert published(db)['lidl_de_current']['timestamp'] == first_timestamp
+
+
+def test_catalog_that_is_no_longer_live_is_deleted(db):
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025'), catalog('next', '20.10. - 25.10.2025')])
+
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '20.10. - 25.10.2025')])
+
+    assert set(published(db)) == {'lidl_de_current'}
+
+
+def test_catalog_that_failed_to_reprocess_keeps_its_document(db):
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025'), catalog('next', '20.10. - 25.10.2025')])
+
+    utils.publish_catalogs('lidl', 'de', [catalog('current', '13.10. - 18.10.2025', title='Neu')], failed_week_types=['next'])
+
+    documents = published(db)
+    assert documents['lidl_de_current']['title'] == 'Neu'
+    assert documents['lidl_de_next']['pdfHash'] == 'hash-next'
+
+
+def test_publish_leaves_other_markets_and_languages_alone(db):
+    db.collection('brochures').document('lidl_fr_current').set({'marketName': 'lidl', 'language': 'fr', 'weekType': 'current'})
+    db.collection('brochures').document('aldi_de_current').set({'marketName': 'aldi', 'language': 'de', 'weekType': 'current'})
+
+    utils.publish_catalogs('lidl', 'de', [])
+
+    assert set(published(db)) == {'lidl_fr_current', 'aldi_de_current'}
+
+
+def test_search_loads_the_index_the_document_references(db, tmp_path, monkeypatch):
+    bucket = LocalBucket(str(tmp_path / 'bucket'))
+    monkeypatch.setattr(utils, 'get_bucket', lambda: bucket)
+    monkeypatch.setattr(utils, '_search_index_cache', {})
+    index = build_search_index([[('Kaffee', 0.1, 0.1, 0.2, 0.15, 0, 0)]])
+    # Stored under a catalog ID that is not derived from the PDF hash, so only the reference finds it
+    blob = bucket.blob('catalogs/lidl/de/reprocessed/search_index.json')
+    blob.upload_from_string(json.dumps(index))
+    document = dict(catalog('current', '13.10. - 18.10.2025'), searchIndex=blob.public_url)
+    utils.publish_catalogs('lidl', 'de', [document, catalog('next', '20.10. - 25.10.2025')])
+
+    hit, = utils.search_brochures('lidl', 'de', 'kaffee')
+
+    assert hit['weekType'] == 'current'
+    assert hit['pageUrl'] == 'https://cdn/current/1.webp'
+    assert hit['hits'] == [[0.1, 0.1, 0.2, 0.15]]
@@ -0,0 +1,89 @@
+import pytest
+
+from scrapers import publish_state
+from scrapers.publish_state import PublishState
+
+LIVE = ['20.10.-25.10.', '13.10.-18.10.']
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(publish_state.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def state(tmp_path, clock):
+    return PublishState(str(tmp_path / 'state' / 'publish_state.json'))
+
+
+def test_unknown_market_does_not_match(state):
+    assert not state.matches('lidl', 'de', LIVE, 3600)
+
+
+def test_same_validity_in_any_order_matches(state):
+    state.update('lidl', 'de', validity=LIVE, pdf_hashes=['a', 'b'])
+
+    assert state.matches('lidl', 'de', list(reversed(LIVE)), 3600)
+    assert state.get('lidl', 'de')['validity'] == sorted(LIVE)
+
+
+def test_changed_validity_does_not_match(state):
+    state.update('lidl', 'de', validity=LIVE)
+
+    assert not state.matches('lidl', 'de', ['27.10.-01.11.', '20.10.-25.10.'], 3600)
+    assert not state.matches('lidl', 'de', LIVE[:1], 3600)
+
+
+def test_match_expires_after_the_recheck_interval(state, clock):
+    state.update('lidl', 'de', validity=LIVE)
+
+    clock[0] += 3599
+    assert state.matches('lidl', 'de', LIVE, 3600)
+    clock[0] += 1
+    assert not state.matches('lidl', 'de', LIVE, 3600)
+
+
+def test_update_merges_fields_and_refreshes_the_check_time(state, clock):
+    state.update('lidl', 'de', validity=LIVE, pdf_hashes=['a'])
+    clock[0] += 100
+
+    state.update('lidl', 'de', document_ids=['lidl_de_current'])
+
+    entry = state.get('lidl', 'de')
+    assert entry['pdf_hashes'] == ['a']
+    assert entry['document_ids'] == ['lidl_de_current']
+    assert entry['checked_at'] == clock[0]
+
+
+def test_forget_drops_only_that_market_and_language(state):
+    state.update('lidl', 'de', validity=LIVE)
+    state.update('lidl', 'fr', validity=LIVE)
+
+    state.forget('lidl', 'de')
+    state.forget('aldi', 'de')
+
+    assert state.get('lidl', 'de') is None
+    assert not state.matches('lidl', 'de', LIVE, 3600)
+    assert state.matches('lidl', 'fr', LIVE, 3600)
+
+
+def test_state_survives_a_restart(state):
+    state.update('lidl', 'de', validity=LIVE)
+    state.forget('lidl', 'fr')
+
+    reloaded = PublishState(state.path)
+
+    assert reloaded.matches('lidl', 'de', LIVE, 3600)
+
+
+def test_corrupt_state_file_is_treated_as_empty(tmp_path, clock):
+    path = tmp_path / 'publish_state.json'
+    path.write_text('{"lidl/de": ')
+
+    state = PublishState(str(path))
+
+    assert state.get('lidl', 'de') is None
+    state.update('lidl', 'de', validity=LIVE)
+    assert PublishState(str(path)).matches('lidl', 'de', LIVE, 3600)
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+from scrapers.release_schedule import ReleaseSchedule
+
+HOUR = 3600
+MONDAY = datetime.date(2025, 10, 13)
+# The brochure after MONDAY's starts on 20 Oct; with the default 3 day lead it is expected on 17 Oct 00:00
+EXPECTED = datetime.datetime(2025, 10, 17)
+
+
+@pytest.fixture
+def schedule(tmp_path):
+    return ReleaseSchedule(
+        str(tmp_path / 'state' / 'release_schedule.json'), fast_seconds=900, overdue_seconds=HOUR,
+        slow_seconds=6 * HOUR, window_seconds=12 * HOUR, default_lead_seconds=72 * HOUR
+    )
+
+
+def test_release_is_expected_one_cadence_after_the_newest_start(schedule):
+    assert schedule.expected_release('lidl', 'de', [MONDAY - datetime.timedelta(days=7), MONDAY]) == EXPECTED
+    assert schedule.expected_release('lidl', 'de', []) is None
+
+
+@pytest.mark.parametrize('now, delay', [
+    # Far from the window: the slow interval
+    (datetime.datetime(2025, 10, 14, 9), 6 * HOUR),
+    # Shortly before the window: until it opens
+    (EXPECTED - datetime.timedelta(hours=14), 2 * HOUR),
+    # Inside the window, on either side of the expected release
+    (EXPECTED - datetime.timedelta(hours=12), 900),
+    (EXPECTED + datetime.timedelta(hours=11), 900),
+    # The window passed without a new brochure
+    (EXPECTED + datetime.timedelta(hours=13), HOUR),
+])
+def test_next_poll_delay(schedule, now, delay):
+    assert schedule.next_poll_delay('lidl', 'de', [MONDAY], now) == delay
+
+
+def test_unknown_start_dates_poll_at_the_overdue_interval(schedule):
+    assert schedule.next_poll_delay('lidl', 'de', [], datetime.datetime(2025, 10, 14)) == HOUR
+
+
+def test_first_observed_release_sets_the_lead(schedule):
+    schedule.observe_release('lidl', 'de', datetime.date(2025, 10, 20), seen_at=datetime.datetime(2025, 10, 18, 6))
+
+    assert schedule.lead_seconds('lidl', 'de') == 42 * HOUR
+    assert schedule.lead_seconds('lidl', 'fr') == 72 * HOUR
+    assert schedule.expected_release('lidl', 'de', [MONDAY]) == datetime.datetime(2025, 10, 18, 6)
+
+
+def test_later_releases_are_averaged_into_the_lead(schedule):
+    schedule.observe_release('lidl', 'de', datetime.date(2025, 10, 20), seen_at=datetime.datetime(2025, 10, 18))
+    schedule.observe_release('lidl', 'de', datetime.date(2025, 10, 27), seen_at=datetime.datetime(2025, 10, 26))
+
+    assert schedule.lead_seconds('lidl', 'de') == 36 * HOUR
+
+
+def test_learned_lead_survives_a_restart(schedule):
+    schedule.observe_release('lidl', 'de', datetime.date(2025, 10, 20), seen_at=datetime.datetime(2025, 10, 18))
+
+    reloaded = ReleaseSchedule(schedule.path, 900, HOUR, 6 * HOUR, 12 * HOUR, 72 * HOUR)
+
+    assert reloaded.lead_seconds('lidl', 'de') == 48 * HOUR
@@ -0,0 +1,77 @@
+import pytest
+
+fitz = pytest.importorskip('fitz')
+pytest.importorskip('PIL')
+
+from scrapers.render import plan_page_render, render_page_image, split_page_ranges
+
+A4 = fitz.Rect(0, 0, 595, 842)
+BUDGET = {'memory_bytes': 48 * 1024 * 1024, 'band_bytes': 4 * 1024 * 1024, 'min_dpi': 50}
+
+
+@pytest.mark.parametrize('page_count, parts, expected', [
+    (10, 3, [(0, 4), (4, 7), (7, 10)]),
+    (4, 4, [(0, 1), (1, 2), (2, 3), (3, 4)]),
+    (3, 8, [(0, 1), (1, 2), (2, 3)]),
+    (5, 1, [(0, 5)]),
+    (5, 0, [(0, 5)]),
+])
+def test_split_page_ranges(page_count, parts, expected):
+    assert split_page_ranges(page_count, parts) == expected
+
+
+def test_split_page_ranges_covers_every_page_once():
+    ranges = split_page_ranges(101, 8)
+
+    assert [page for start, stop in ranges for page in range(start, stop)] == list(range(101))
+    assert max(stop - start for start, stop in ranges) - min(stop - start for start, stop in ranges) <= 1
+
+
+def test_without_budget_the_page_is_rendered_whole():
+    assert plan_page_render(A4, 300, None) == (300, None)
+
+
+def test_page_that_fits_is_rendered_in_one_pixmap():
+    assert plan_page_render(A4, 150, BUDGET) == (150, None)
+
+
+def test_larger_page_is_rendered_in_bands_at_full_dpi():
+    dpi, band_height = plan_page_render(A4, 300, BUDGET)
+
+    width = 595 * 300 / 72
+    assert dpi == 300
+    assert band_height * width * 7 <= BUDGET['band_bytes']
+    assert band_height > 0
+
+
+def test_poster_gets_a_lower_dpi_that_fits_the_budget():
+    poster = fitz.Rect(0, 0, 2384, 3370)
+
+    dpi, band_height = plan_page_render(poster, 300, BUDGET)
+
+    image_bytes = (2384 * dpi / 72) * (3370 * dpi / 72) * 4
+    assert BUDGET['min_dpi'] <= dpi < 300
+    assert image_bytes <= BUDGET['memory_bytes'] - BUDGET['band_bytes'] + 1
+    assert band_height > 0
+
+
+def test_dpi_never_drops_below_the_minimum():
+    billboard = fitz.Rect(0, 0, 20000, 20000)
+
+    assert plan_page_render(billboard, 300, BUDGET)[0] == BUDGET['min_dpi']
+
+
+def test_banded_render_matches_the_single_pixmap_render():
+    pdf_document = fitz.open()
+    page = pdf_document.new_page(width=200, height=300)
+    page.draw_rect(fitz.Rect(20, 40, 180, 260), color=(1, 0, 0), fill=(0, 0, 1))
+    page.insert_text((30, 100), "Kaffee 4.99", fontsize=18)
+    # Room for the image and bands of a few rows only, so the page is rendered in many bands
+    budget = {'memory_bytes': 500 * 750 * 4 + 20000, 'band_bytes': 20000, 'min_dpi': 72}
+
+    assert plan_page_render(page.rect, 180, budget)[1] < 750
+    banded = render_page_image(page, 180, budget)
+    whole = render_page_image(page, 180)
+
+    assert banded.size == whole.size
+    assert banded.tobytes() == whole.tobytes()
@@ -0,0 +1,49 @@
+import pytest
+
+for module_name in ('requests', 'fitz', 'PIL', 'selenium'):
+    pytest.importorskip(module_name)
+
+from scrapers import scraper_lidl
+
+MARKET_URL = 'https://www.lidl.ch/c/de-CH/prospekte/s10019682'
+FLYER_URL = 'https://www.lidl.ch/l/de/prospekte/aktionsprospekt-13-10/view/flyer/page/1'
+MARKET_HTML = f'<a class="flyer" href="{FLYER_URL}"><span>Aktionsprospekt</span> 13.10. – 18.10.</a>'
+TERMS_LINKS = (
+    '<a href="https://www.lidl.ch/static/agb.pdf">AGB</a>'
+    '<a class="link" href="https://www.lidl.ch/download/rueckruf.pdf">Rückruf</a>'
+)
+
+
+@pytest.mark.parametrize('preview_html, pdf_url', [
+    (TERMS_LINKS + '<a class="button button--primary" href="https://object.lidl/ch-de-42.pdf?t=1&amp;s=2">PDF herunterladen</a>',
+     'https://object.lidl/ch-de-42.pdf?t=1&s=2'),
+    (TERMS_LINKS + '<a download href="https://object.lidl/ch-de-42.pdf">PDF</a>', 'https://object.lidl/ch-de-42.pdf'),
+    (TERMS_LINKS + '<script>{"flyer":{"pdfUrl":"https:\\/\\/object.lidl\\/ch-de-42.pdf"}}</script>', 'https://object.lidl/ch-de-42.pdf'),
+    (TERMS_LINKS, None),
+])
+def test_flyer_pdf_is_taken_from_the_download_link_or_json(preview_html, pdf_url):
+    assert scraper_lidl.find_flyer_pdf_url(preview_html) == pdf_url
+
+
+def test_http_path_returns_the_flyer_pdf_and_validity(monkeypatch):
+    pages = {MARKET_URL: MARKET_HTML, FLYER_URL: '<a download href="https://object.lidl/ch-de-42.pdf">PDF</a>'}
+    monkeypatch.setattr(scraper_lidl, 'fetch_page', pages.get)
+
+    assert scraper_lidl._scrape_lidl_http(MARKET_URL) == [('https://object.lidl/ch-de-42.pdf', '13.10. - 18.10.')]
+
+
+def test_preview_without_a_download_link_falls_back_to_selenium(monkeypatch):
+    pages = {MARKET_URL: MARKET_HTML, FLYER_URL: TERMS_LINKS}
+    monkeypatch.setattr(scraper_lidl, 'fetch_page', pages.get)
+    monkeypatch.setattr(scraper_lidl, '_scrape_lidl_page', lambda session, market_name, market_url: [('https://selenium/flyer.pdf', '13.10. - 18.10.')])
+    monkeypatch.setattr(scraper_lidl.driver_pool, 'lease', lambda market_name: _Lease())
+
+    assert scraper_lidl.scrape_lidl_ch('lidl', 'de', MARKET_URL) == [('https://selenium/flyer.pdf', '13.10. - 18.10.')]
+
+
+class _Lease:
+    def __enter__(self):
+        return object()
+
+    def __exit__(self, *exc_info):
+        return False
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from scrapers.search_index import SearchIndex, _price_at, build_search_index, normalize_term, terms_of
+
+
+def word(text, x0, y0, block=0, line=0):
+    """A word tuple as extract_page_words returns it, 0.1 wide and 0.05 high."""
+    return (text, x0, y0, x0 + 0.1, y0 + 0.05, block, line)
+
+
+PAGES = [
+    [word('Kaffeebohnen', 0.1, 0.1), word('Crema', 0.25, 0.1), word('4', 0.1, 0.2, line=1), word('99', 0.15, 0.2, line=1)],
+    [word('Käse', 0.5, 0.5), word('Gouda', 0.6, 0.5), word('2.95', 0.5, 0.6, line=1)],
+    [word('Kaffee', 0.1, 0.1), word('Crème', 0.1, 0.3, block=1), word('brûlée', 0.2, 0.3, block=1), word('Crêpes', 0.1, 0.6, block=2)],
+]
+
+
+@pytest.fixture
+def index():
+    return SearchIndex.from_json(json.dumps(build_search_index(PAGES)))
+
+
+def test_terms_are_case_folded_without_accents():
+    assert normalize_term('Crème') == 'creme'
+    assert terms_of("Käse-Sahne, 1 x Äpfel") == ['kase-sahne', 'apfel']
+
+
+def test_index_stores_boxes_and_postings_per_page():
+    index = build_search_index(PAGES)
+
+    assert index['pages'][1]['boxes'][0] == [0.5, 0.5, 0.6, 0.55]
+    assert index['terms']['gouda'] == [1, 1]
+    assert index['terms']['kaffee'] == [2, 0]
+
+
+def test_prefix_search_matches_longer_words(index):
+    assert [result['page'] for result in index.search('kaffee')] == [1, 3]
+    assert [result['page'] for result in index.search('kaffee', prefix=False)] == [3]
+
+
+def test_accented_text_matches_unaccented_queries(index):
+    assert [result['page'] for result in index.search('kase')] == [2]
+    assert [result['page'] for result in index.search('CREME BRULEE')] == [3]
+
+
+def test_every_query_term_must_be_on_the_page(index):
+    assert [result['page'] for result in index.search('kaffee crema')] == [1]
+    assert index.search('kaffee gouda') == []
+
+
+def test_queries_shorter_than_a_term_find_nothing(index):
+    assert index.search('c') == []
+    assert index.search('') == []
+
+
+def test_results_carry_hit_boxes_and_nearest_price(index):
+    result, = index.search('kaffee crema')
+
+    assert result['hits'] == [[0.1, 0.1, 0.2, 0.15], [0.25, 0.1, 0.35, 0.15]]
+    assert result['price'] == '4.99'
+    assert index.search('gouda')[0]['price'] == '2.95'
+    assert index.search('brulee')[0]['price'] is None
+
+
+def test_pages_with_more_hits_rank_first(index):
+    assert [result['page'] for result in index.search('cr')] == [3, 1]
+    assert [result['page'] for result in index.search('cr', limit=1)] == [3]
+
+
+@pytest.mark.parametrize('texts, expected', [
+    (['2.95'], '2.95'),
+    (['2,95'], '2,95'),
+    (['3.–'], '3.–'),
+    (['4', '99'], '4.99'),
+    (['4.', '99'], '4.99'),
+    (['4', '.99'], '4.99'),
+    (['5', '–'], '5.–'),
+    (['12345'], None),
+    (['Gouda'], None),
+    (['4.'], None),
+])
+def test_price_at(texts, expected):
+    words = [word(text, 0.1 * position, 0.1) for position, text in enumerate(texts)]
+
+    assert _price_at(words, 0) == expected
+
+
+def test_cents_on_another_line_are_not_joined():
+    assert _price_at([word('4', 0.1, 0.1), word('99', 0.1, 0.3, line=1)], 0) is None
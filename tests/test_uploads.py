@@ -0,0 +1,124 @@
+import os
+import time
+
+import pytest
+
+# scrapers.utils imports the scraping and rendering stack at module level
+for module_name in ('requests', 'fitz', 'PIL'):
+    pytest.importorskip(module_name)
+
+import maintenance
+from scrapers import utils
+from scrapers.checkpoint import CheckpointJournal
+from scrapers.local_backend import LocalBucket
+
+
+class RecordingBucket(LocalBucket):
+    """LocalBucket that keeps every blob it hands out, so tests can inspect their upload metadata."""
+
+    def __init__(self, root_dir):
+        super().__init__(root_dir)
+        self.blobs = {}
+        self.failing = set()
+
+    def blob(self, name):
+        blob = self.blobs.setdefault(name, super().blob(name))
+        if name in self.failing:
+            blob.upload_from_filename = blob.upload_from_string = _fail_upload
+        return blob
+
+
+def _fail_upload(*args, **kwargs):
+    raise ConnectionError("upload failed")
+
+
+@pytest.fixture
+def bucket(tmp_path, monkeypatch):
+    bucket = RecordingBucket(str(tmp_path / 'bucket'))
+    monkeypatch.setattr(utils, 'get_bucket', lambda: bucket)
+    monkeypatch.setattr(utils, '_known_page_objects', set())
+    monkeypatch.setattr(utils, 'checkpoints', CheckpointJournal(str(tmp_path / 'checkpoints.jsonl'), 3600))
+    monkeypatch.setattr(utils, 'UPLOAD_MAX_ATTEMPTS', 1)
+    return bucket
+
+
+@pytest.mark.parametrize('extension, content_type', [
+    ('.webp', 'image/webp'), ('.avif', 'image/avif'), ('.jpg', 'image/jpeg'), ('.png', 'image/png')
+])
+def test_page_bytes_are_uploaded_with_their_image_type(bucket, extension, content_type):
+    url, sha256, reused = utils._upload_page_bytes(b'page', extension, 'lidl')
+
+    blob = bucket.blobs[f"catalogs/lidl/pages/{sha256}{extension}"]
+    assert blob.content_type == content_type
+    assert blob.cache_control == utils.PAGE_CACHE_CONTROL
+    assert not reused
+
+
+def test_page_files_are_uploaded_with_their_image_type(bucket, tmp_path):
+    page_path = tmp_path / 'page_01.webp'
+    page_path.write_bytes(b'page')
+
+    _, sha256, _ = utils._upload_page(str(page_path), 'lidl')
+
+    assert bucket.blobs[f"catalogs/lidl/pages/{sha256}.webp"].content_type == 'image/webp'
+
+
+def test_tile_pyramids_are_uploaded_with_descriptor_and_tile_types(bucket, tmp_path):
+    tiles_dir = tmp_path / 'tiles'
+    (tiles_dir / 'page_01_files' / '0').mkdir(parents=True)
+    (tiles_dir / 'page_01_files' / '0' / '0_0.webp').write_bytes(b'tile')
+    (tiles_dir / 'page_01.dzi').write_text('<Image/>')
+    page_path = tmp_path / 'page_01.webp'
+    page_path.write_bytes(b'page')
+
+    urls = utils.upload_page_variants(
+        {'full': [str(page_path)], utils.TILE_VARIANT: [str(tiles_dir / 'page_01.dzi')]}, 'lidl', 'de', 'abc'
+    )
+
+    prefix = utils.tile_blob_prefix('lidl', 'de', 'abc')
+    assert urls[utils.TILE_VARIANT] == [bucket.blobs[f"{prefix}page_01.dzi"].public_url]
+    assert bucket.blobs[f"{prefix}page_01.dzi"].content_type == utils.TILE_DESCRIPTOR_CONTENT_TYPE
+    assert bucket.blobs[f"{prefix}page_01_files/0/0_0.webp"].content_type == 'image/webp'
+
+
+def test_streamed_tiles_are_uploaded_with_their_image_type(bucket):
+    prefix = utils.tile_blob_prefix('lidl', 'de', 'abc')
+
+    assert utils._store_catalog_object(f"{prefix}page_01_files/0/0_0.jpg", data=b'tile')
+
+    assert bucket.blobs[f"{prefix}page_01_files/0/0_0.jpg"].content_type == 'image/jpeg'
+
+
+def test_staged_upload_resumes_the_pages_an_interrupted_run_uploaded(bucket, tmp_path):
+    page_paths = []
+    for page_num, data in enumerate([b'one', b'two']):
+        page_path = tmp_path / f"page_{page_num + 1:02d}.webp"
+        page_path.write_bytes(data)
+        page_paths.append(str(page_path))
+    first_page, second_page = (f"catalogs/lidl/pages/{utils.file_sha256(path)}.webp" for path in page_paths)
+    bucket.failing.add(second_page)
+
+    assert utils.upload_page_variants({'full': page_paths}, 'lidl', 'de', 'abc') == {}
+    assert list(utils.checkpoints.completed('lidl', 'de', 'page')) == ['abc/0']
+
+    bucket.failing.clear()
+    bucket.blobs.clear()
+    urls = utils.upload_page_variants({'full': page_paths}, 'lidl', 'de', 'abc')
+
+    assert first_page not in bucket.blobs
+    assert urls == {'full': [bucket.blob(first_page).public_url, bucket.blobs[second_page].public_url]}
+    assert sorted(utils.checkpoints.completed('lidl', 'de', 'page')) == ['abc/0', 'abc/1']
+
+
+def test_reused_page_object_is_refreshed_so_gc_keeps_it(bucket):
+    _, sha256, _ = utils._upload_page_bytes(b'page', '.webp', 'lidl')
+    name = f"catalogs/lidl/pages/{sha256}.webp"
+    three_days_ago = time.time() - 3 * 24 * 3600
+    os.utime(bucket.blob(name)._path, (three_days_ago, three_days_ago))
+    utils.forget_known_page_objects()
+    assert maintenance.find_orphans('catalogs/', set(), set(), utils.GC_MIN_AGE_SECONDS)[0] == [(name, 4)]
+
+    _, _, reused = utils._upload_page_bytes(b'page', '.webp', 'lidl')
+
+    assert reused
+    assert maintenance.find_orphans('catalogs/', set(), set(), utils.GC_MIN_AGE_SECONDS)[0] == []
@@ -0,0 +1,56 @@
+import datetime
+
+import pytest
+
+from scrapers.validity import parse_validity, validity_range
+
+OCTOBER = datetime.date(2025, 10, 10)
+NEW_YEARS_EVE = datetime.date(2025, 12, 31)
+
+
+@pytest.mark.parametrize('validity, today, expected', [
+    # de
+    ('13.10.-18.10.', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('Gültig vom 13. Oktober bis 18. Oktober 2025', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('vom 13. bis 18. Oktober', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('13.-18. Oktober', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('vom 2. bis zum 7. Januar', NEW_YEARS_EVE, ((2026, 1, 2), (2026, 1, 7))),
+    # fr
+    ('Valables du lundi 13 octobre au samedi 18 octobre', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('du 13 au 18 octobre', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('Valables du lundi 13 au samedi 18 octobre', OCTOBER, ((2025, 10, 13), (2025, 10, 18))),
+    ('du 29 au 3 janvier', NEW_YEARS_EVE, ((2025, 12, 29), (2026, 1, 3))),
+    ('du 30 décembre 2025 au 3 janvier 2026', NEW_YEARS_EVE, ((2025, 12, 30), (2026, 1, 3))),
+    # it
+    ('Valide dal 29.12. al 3.1.', NEW_YEARS_EVE, ((2025, 12, 29), (2026, 1, 3))),
+    ('dal 2 al 7 gennaio', NEW_YEARS_EVE, ((2026, 1, 2), (2026, 1, 7))),
+    ('dal 2 al 7 gennaio', OCTOBER, ((2026, 1, 2), (2026, 1, 7))),
+    ('Offerte valide da 8 a 20 ottobre 2025', OCTOBER, ((2025, 10, 8), (2025, 10, 20))),
+])
+def test_validity_ranges(validity, today, expected):
+    first_day, last_day = expected
+
+    assert parse_validity(validity, today) == (datetime.date(*first_day), datetime.date(*last_day))
+
+
+@pytest.mark.parametrize('validity', [
+    'Gültig ab Montag, 13.10.2025',
+    'Valables dès le 13 octobre',
+    'Valide da lunedì 13 ottobre',
+])
+def test_single_date_has_no_end(validity):
+    assert parse_validity(validity, OCTOBER) == (datetime.date(2025, 10, 13), None)
+
+
+@pytest.mark.parametrize('validity', ['', 'Neue Angebote', 'Geöffnet 8 - 20 Uhr'])
+def test_text_without_a_date_is_not_parsed(validity):
+    assert parse_validity(validity, OCTOBER) is None
+
+
+def test_validity_range_ends_at_midnight_after_the_last_day():
+    timezone = datetime.timezone.utc
+
+    valid_from, valid_to = validity_range('du 13 au 18 octobre', timezone, 7, OCTOBER)
+
+    assert valid_from == datetime.datetime(2025, 10, 13, tzinfo=timezone)
+    assert valid_to == datetime.datetime(2025, 10, 19, tzinfo=timezone)